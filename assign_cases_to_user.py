@@ -5,7 +5,8 @@ Assign orphaned cases to the shantharam user (ID: 4)
 
 import os
 import requests
-from database_setup import DatabaseManager
+from database_setup import DatabaseManager, CHANGE_VERSION
+from public_address import public_address
 
 # Configuration
 API_REQUEST_TIMEOUT = int(os.getenv('API_REQUEST_TIMEOUT', '5'))
@@ -25,10 +26,9 @@ def get_api_base_url():
             api_port = os.getenv('API_PORT', '5002')
             return f'http://localhost:{api_port}'
         
-        # Try to get public IP
-        response = requests.get('https://api.ipify.org', timeout=API_REQUEST_TIMEOUT)
-        if response.status_code == 200:
-            public_ip = response.text.strip()
+        # Use the cached public IP (resolved in the background, never on import)
+        public_ip = public_address.get()
+        if public_ip:
             api_port = os.getenv('API_PORT', '5002')
             return f'http://{public_ip}:{api_port}'
     except Exception as e:
@@ -72,10 +72,13 @@ def assign_cases_to_shantharam():
         for case in orphaned_cases:
             print(f"   CNR: {case[0]}, Title: {case[1]}")
         
-        # Assign orphaned cases to shantharam (ID: 4)
-        cursor.execute("UPDATE cases SET user_id = 4 WHERE user_id IS NULL")
+        # Assign orphaned cases to shantharam (ID: 4); a new change version lets delta syncs see the new owner
+        cursor.execute(f"UPDATE cases SET user_id = 4, change_version = {CHANGE_VERSION} WHERE user_id IS NULL")
         updated_count = cursor.rowcount
         
+        # Move their clients to the new owner as well
+        db.sync_case_clients(conn, [case[0] for case in orphaned_cases])
+        
         conn.commit()
         
         print(f"✅ Successfully assigned {updated_count} case(s) to shantharam")
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Dashboard payload benchmark
+Seeds a throwaway user with synthetic cases and history, then times
+/api/user/dashboard-data with the Python engine (rows -> dicts -> jsonify)
+and the SQL engine (Postgres builds the JSON, DASHBOARD_ENGINE=sql) at each
+size, checks both return the same dashboard_data and removes the data again.
+
+The Python engine's per-event debug prints go to /dev/null while timing, so
+terminal speed does not count against it.
+
+Usage:
+    python benchmark_dashboard.py [--sizes 1000,10000,100000] [--runs 3]
+"""
+
+import os
+import json
+import time
+import secrets
+import argparse
+import statistics
+import contextlib
+from datetime import datetime, timedelta
+
+from psycopg2.extras import execute_values
+
+import legal_api
+
+# Configuration constants
+BENCH_USERNAME = 'dashboard_benchmark'
+CNR_PREFIX = 'BENCH'                     # + 11 digits = the 16-character CNR column
+HISTORY_PER_CASE = 10
+CLIENTS_PER_CASE = 0.2                   # Distinct client names per case, so clients repeat across cases
+ENGINES = ('python', 'sql')
+
+
+def cleanup_cases(db):
+    """Remove the seeded cases but keep the benchmark user for the next size"""
+    conn = db.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM case_history WHERE cnr_number LIKE %s", (CNR_PREFIX + '%',))
+        cursor.execute("DELETE FROM cases WHERE cnr_number LIKE %s", (CNR_PREFIX + '%',))
+        # The benchmark user's clients only ever come from seeded cases
+        cursor.execute("DELETE FROM clients WHERE user_id IN (SELECT id FROM users WHERE username = %s)",
+                       (BENCH_USERNAME,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def cleanup(db):
+    """Remove the benchmark user and everything seeded for it"""
+    cleanup_cases(db)
+    conn = db.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM user_sessions WHERE user_id IN (SELECT id FROM users WHERE username = %s)",
+                       (BENCH_USERNAME,))
+        cursor.execute("DELETE FROM users WHERE username = %s", (BENCH_USERNAME,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def seed(db, user_id, history_rows):
+    """Insert history_rows / HISTORY_PER_CASE cases for user_id with HISTORY_PER_CASE rows each.
+
+    Rows go in with execute_values for speed; the clients tables and the
+    hearing summary are then brought up to date the way case writes do.
+    """
+    case_count = max(history_rows // HISTORY_PER_CASE, 1)
+    client_count = max(int(case_count * CLIENTS_PER_CASE), 1)
+    base = datetime(2024, 1, 1)
+
+    cases, history = [], []
+    for i in range(case_count):
+        cnr = f"{CNR_PREFIX}{i:011d}"
+        cases.append((
+            cnr, f"Benchmark Case {i}", f"Client {i % client_count}", f"Petitioner {i}", f"Respondent {i}",
+            'Civil' if i % 2 else 'Criminal', f"Court {i % 7}", f"Judge {i % 13}",
+            'Active' if i % 3 else 'Disposed', (base + timedelta(days=i % 365)).date(), user_id,
+            base + timedelta(minutes=i), base + timedelta(minutes=i)
+        ))
+        for j in range(HISTORY_PER_CASE):
+            # Every fifth hearing date is unknown, as in scraped history
+            hearing = None if j % 5 == 4 else (base + timedelta(days=30 * j + i % 30)).date()
+            history.append((cnr, f"Judge {i % 13}", (base + timedelta(days=30 * j)).date(), hearing,
+                            f"Hearing {j}", user_id, base + timedelta(minutes=i, seconds=j)))
+
+    conn = db.get_connection()
+    try:
+        cursor = conn.cursor()
+        execute_values(cursor, """
+            INSERT INTO cases (cnr_number, case_title, client_name, petitioner, respondent, case_type,
+                               court_name, judge_name, status, filing_date, user_id, created_at, updated_at)
+            VALUES %s
+        """, cases, page_size=1000)
+        execute_values(cursor, """
+            INSERT INTO case_history (cnr_number, judge, business_date, hearing_date, purpose, user_id, created_at)
+            VALUES %s
+        """, history, page_size=1000)
+        cnr_numbers = [case[0] for case in cases]
+        db.sync_case_clients(conn, cnr_numbers)
+        db.refresh_hearing_summary(conn, cnr_numbers)
+        conn.commit()
+    finally:
+        conn.close()
+    return case_count
+
+
+def time_engine(client, token, engine, runs):
+    """Median seconds and payload bytes of the dashboard request on ``engine``, plus its dashboard_data"""
+    samples = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(runs):
+            started = time.perf_counter()
+            response = client.get(f'/api/user/dashboard-data?engine={engine}',
+                                  headers={'Authorization': f'Bearer {token}'})
+            body = response.get_data()
+            samples.append(time.perf_counter() - started)
+    payload = json.loads(body)
+    if not payload.get('success'):
+        raise RuntimeError(f"{engine} engine failed: {payload.get('error')}")
+    return statistics.median(samples), len(body), payload['dashboard_data']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the Python and SQL dashboard engines')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma-separated history row counts')
+    parser.add_argument('--runs', type=int, default=3, help='requests per engine and size')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    db = legal_api.legal_api.db
+    client = legal_api.app.test_client()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    results = []
+    cleanup(db)
+    try:
+        user_id = db.create_user(BENCH_USERNAME, 'x', f'{BENCH_USERNAME}@example.invalid', 'Dashboard Benchmark')
+        token = secrets.token_urlsafe(32)
+        db.create_user_session(user_id, token, datetime.now() + timedelta(hours=1))
+
+        for size in sizes:
+            case_count = seed(db, user_id, size)
+            result = {'history_rows': size, 'cases': case_count}
+            outputs = {}
+            for engine in ENGINES:
+                seconds, size_bytes, outputs[engine] = time_engine(client, token, engine, args.runs)
+                result[engine] = {'seconds': round(seconds, 3), 'bytes': size_bytes}
+            result['same_data'] = outputs['python'] == outputs['sql']
+            result['speedup'] = round(result['python']['seconds'] / max(result['sql']['seconds'], 1e-9), 1)
+            results.append(result)
+            cleanup_cases(db)
+    finally:
+        cleanup(db)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"📊 Dashboard benchmark (median of {args.runs} requests)")
+    print(f"{'History rows':>13}{'Cases':>8}{'Python (s)':>12}{'SQL (s)':>10}{'Speedup':>9}{'Python KB':>11}{'SQL KB':>9}  Same data")
+    for r in results:
+        print(f"{r['history_rows']:>13}{r['cases']:>8}{r['python']['seconds']:>12.3f}{r['sql']['seconds']:>10.3f}"
+              f"{r['speedup']:>8.1f}x{r['python']['bytes'] / 1024:>11.0f}{r['sql']['bytes'] / 1024:>9.0f}"
+              f"  {'✅' if r['same_data'] else '❌'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the API
+Imports the API in fresh interpreters and reports import time and peak RSS
+for the current (lazy) startup next to the old eager one, where the scraper,
+Selenium, torch and transformers were all imported with legal_api.
+
+Usage:
+    python benchmark_startup.py [--runs 5]
+"""
+
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Each scenario runs in its own interpreter so nothing is already imported
+SCENARIOS = {
+    'python (baseline)': '',
+    'legal_api (lazy)': 'import legal_api',
+    'legal_api (eager, old)': (
+        'import legal_api, scrapper\n'
+        'import torch, transformers, PIL.Image\n'
+        'from transformers import VisionEncoderDecoderModel, TrOCRProcessor'
+    ),
+}
+
+PROBE = '''
+import sys, time, resource
+start = time.perf_counter()
+exec(compile({code!r}, '<scenario>', 'exec'))
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is in KB on Linux and in bytes on macOS
+rss_mb = rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+print('__RESULT__', elapsed, rss_mb, len(sys.modules))
+'''
+
+
+def run_scenario(code):
+    """Run one scenario in a fresh interpreter; returns (seconds, rss_mb, modules) or an error string"""
+    proc = subprocess.run([sys.executable, '-c', PROBE.format(code=code)], capture_output=True, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith('__RESULT__'):
+            _, elapsed, rss_mb, modules = line.split()
+            return float(elapsed), float(rss_mb), int(modules)
+    error = (proc.stderr.strip().splitlines() or ['no output'])[-1]
+    return error
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure API import time and memory')
+    parser.add_argument('--runs', type=int, default=5, help='interpreters to start per scenario')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        samples = []
+        for _ in range(args.runs):
+            sample = run_scenario(code)
+            if isinstance(sample, str):
+                results[name] = {'error': sample}
+                break
+            samples.append(sample)
+        else:
+            results[name] = {
+                'import_seconds': round(statistics.median(s[0] for s in samples), 3),
+                'peak_rss_mb': round(statistics.median(s[1] for s in samples), 1),
+                'modules': samples[0][2]
+            }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"📊 Startup benchmark (median of {args.runs} runs)")
+    print(f"{'Scenario':<26}{'Import (s)':>12}{'Peak RSS (MB)':>16}{'Modules':>10}")
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"{name:<26}  ❌ {result['error']}")
+        else:
+            print(f"{name:<26}{result['import_seconds']:>12.3f}{result['peak_rss_mb']:>16.1f}{result['modules']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,7 +8,91 @@ class CacheManager {
         this.CACHE_KEY = 'userDashboardData';
         this.CACHE_VERSION_KEY = 'cacheVersion';
         this.CACHE_UPDATED_KEY = 'cacheUpdated';
+        this.CHANGE_VERSION_KEY = 'changeWatermark'; // Renamed when versions became transaction ids
+        this.FULL_LOAD_KEY = 'changeFullLoad';
         this.MAX_CACHE_AGE = 5 * 60 * 1000; // 5 minutes
+        this.FULL_RELOAD_AGE = 6 * 60 * 60 * 1000; // 6 hours; deltas are used in between
+    }
+
+    /**
+     * Load dashboard data: the cached copy brought up to date with
+     * /api/changes when possible, otherwise a full /api/user/dashboard-data load.
+     * Returns { success, dashboard_data } like the dashboard-data endpoint.
+     */
+    async loadDashboardData() {
+        const token = localStorage.getItem('userToken');
+        const headers = {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+        };
+        
+        const cachedData = this.getCachedData();
+        const changeVersion = localStorage.getItem(this.CHANGE_VERSION_KEY);
+        const fullLoadAge = Date.now() - parseInt(localStorage.getItem(this.FULL_LOAD_KEY) || '0');
+        
+        if (cachedData && cachedData.cases && changeVersion !== null && fullLoadAge < this.FULL_RELOAD_AGE) {
+            try {
+                const response = await fetch(config.getApiUrl(`/changes?since=${encodeURIComponent(changeVersion)}`), { headers });
+                if (response.ok) {
+                    const delta = await response.json();
+                    if (delta.success && !delta.reset) {
+                        this.applyChanges(delta);
+                        console.log(`🔄 CacheManager: Delta sync to version ${delta.version}: ${delta.changes.length} changed, ${delta.deleted.length} deleted`);
+                        return { success: true, dashboard_data: this.getCachedData() };
+                    }
+                }
+                console.log('⚠️ CacheManager: Delta sync failed, falling back to a full load');
+            } catch (error) {
+                console.error('❌ CacheManager: Delta sync error, falling back to a full load:', error);
+            }
+        }
+        
+        const response = await fetch(config.getApiUrl('/user/dashboard-data'), { headers });
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        }
+        const result = await response.json();
+        if (result.success && result.dashboard_data) {
+            this.saveCache(result.dashboard_data);
+            if (result.change_version !== undefined) {
+                localStorage.setItem(this.CHANGE_VERSION_KEY, String(result.change_version));
+                localStorage.setItem(this.FULL_LOAD_KEY, Date.now().toString());
+            }
+        }
+        return result;
+    }
+
+    /**
+     * Apply an /api/changes response to the cache: deletes first (a CNR can be
+     * deleted and re-added in one window), then the changed cases with their history
+     */
+    applyChanges(delta) {
+        if (delta.deleted.length > 0) {
+            const cachedData = this.getCachedData();
+            const deleted = new Set(delta.deleted);
+            cachedData.cases = cachedData.cases.filter(c => c && !deleted.has(c.cnr_number));
+            cachedData.case_histories = cachedData.case_histories || {};
+            delta.deleted.forEach(cnrNumber => delete cachedData.case_histories[cnrNumber]);
+            if (cachedData.calendar_events) {
+                cachedData.calendar_events = cachedData.calendar_events.filter(event => !deleted.has(event.cnrNumber));
+            }
+            this.saveCache(cachedData);
+        }
+        
+        delta.changes.forEach(change => this.applyCaseWrite(change.case, change.history || []));
+        
+        const cachedData = this.getCachedData();
+        if (delta.clients) {
+            cachedData.clients = delta.clients;
+        }
+        cachedData.summary = {
+            total_cases: cachedData.cases.length,
+            total_clients: (cachedData.clients || []).length,
+            total_events: (cachedData.calendar_events || []).length,
+            active_cases: cachedData.cases.filter(c => c && c.status === 'Active').length
+        };
+        this.saveCache(cachedData);
+        localStorage.setItem(this.CHANGE_VERSION_KEY, String(delta.version));
     }
 
     /**
@@ -101,6 +185,69 @@ class CacheManager {
         return false;
     }
 
+    /**
+     * Apply a case returned by a write (save or PUT /api/cases/<cnr>) to the cache:
+     * the case, its history and its calendar events are replaced in place,
+     * so the dashboard does not have to be downloaded again
+     */
+    applyCaseWrite(savedCase, history = []) {
+        console.log('🩹 CacheManager: Applying case write to cache:', savedCase && savedCase.cnr_number);
+        
+        if (!savedCase || !savedCase.cnr_number) {
+            console.error('❌ CacheManager: Cannot apply write - missing case');
+            return false;
+        }
+        
+        const cachedData = this.getCachedData();
+        if (!cachedData || !cachedData.cases) {
+            console.log('⚠️ CacheManager: No existing cache found, will trigger full reload');
+            return false;
+        }
+        
+        const cnrNumber = savedCase.cnr_number;
+        const caseIndex = cachedData.cases.findIndex(c => c && c.cnr_number === cnrNumber);
+        if (caseIndex !== -1) {
+            cachedData.cases[caseIndex] = savedCase;
+        } else {
+            cachedData.cases.unshift(savedCase);  // Newest first, like the API
+        }
+        
+        cachedData.case_histories = cachedData.case_histories || {};
+        if (history.length > 0) {
+            cachedData.case_histories[cnrNumber] = {
+                case_title: savedCase.case_title || 'Unknown',
+                case_type: savedCase.case_type || 'Unknown',
+                history: history
+            };
+        } else {
+            delete cachedData.case_histories[cnrNumber];
+        }
+        
+        // Calendar events are derived from history, same shape as /api/user/dashboard-data
+        if (cachedData.calendar_events) {
+            const caseTitle = savedCase.case_title || 'Unknown Case';
+            cachedData.calendar_events = cachedData.calendar_events
+                .filter(event => event.cnrNumber !== cnrNumber)
+                .concat(history
+                    .filter(entry => entry.hearing_date && entry.hearing_date !== 'N/A')
+                    .map(entry => ({
+                        date: entry.hearing_date,
+                        title: `${caseTitle} - ${entry.purpose || 'Hearing'}`,
+                        description: entry.order_details || 'No details available',
+                        caseTitle: caseTitle,
+                        cnrNumber: cnrNumber,
+                        type: 'hearing',
+                        time: '09:00 AM'
+                    })));
+        }
+        
+        cachedData.lastUpdated = Date.now();
+        this.saveCache(cachedData);
+        
+        console.log('✅ CacheManager: Case write applied to cache');
+        return true;
+    }
+
     /**
      * Remove a specific case from the cache
      */
@@ -160,6 +307,8 @@ class CacheManager {
         localStorage.removeItem(this.CACHE_KEY);
         localStorage.removeItem(this.CACHE_VERSION_KEY);
         localStorage.removeItem(this.CACHE_UPDATED_KEY);
+        localStorage.removeItem(this.CHANGE_VERSION_KEY);
+        localStorage.removeItem(this.FULL_LOAD_KEY);
         
         if (window.userDashboardData) {
             delete window.userDashboardData;
@@ -213,14 +362,18 @@ class CacheManager {
         
         switch (operation) {
             case 'add':
-                if (details.case) {
+                if (details.case && details.history) {
+                    this.applyCaseWrite(details.case, details.history);
+                } else if (details.case) {
                     this.addCaseToCache(details.case);
                 } else {
                     this.clearCache();
                 }
                 break;
             case 'update':
-                if (details.cnrNumber && details.caseData) {
+                if (details.case && details.history) {
+                    this.applyCaseWrite(details.case, details.history);
+                } else if (details.cnrNumber && details.caseData) {
                     this.updateCaseInCache(details.cnrNumber, details.caseData);
                 } else {
                     this.clearCache();
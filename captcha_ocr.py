@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+CAPTCHA OCR for the eCourts scraper
+torch, transformers and PIL are imported on first use and the TrOCR model is
+loaded once per process, so importing this module (or the scraper) is cheap
+and repeated scrapes reuse the same model. When OCR_DAEMON_SOCKET is set,
+solve_captcha asks the shared OCR daemon (ocr_daemon.py) instead and only
+loads a local model if the daemon cannot be reached.
+
+OCR_BACKEND selects how the model runs on CPU:
+    torch  full-precision PyTorch (default)
+    int8   PyTorch with dynamically int8-quantized Linear layers
+    onnx   ONNX Runtime via optimum (export once with `python captcha_ocr.py export`)
+Compare them on a labeled corpus with `python ocr_benchmark.py compare`
+before switching.
+
+A model fetched with `python model_artifacts.py fetch` is loaded from its
+local, checksummed artifact (memory-mapped, no network); set
+OCR_MODEL_OFFLINE=true to refuse the hub fallback entirely.
+
+CAPTCHA_PREPROCESS enables image cleanup before OCR (captcha_preprocess.py),
+e.g. "threshold,denoise,lines,crop"; it is off by default.
+
+Usage:
+    python captcha_ocr.py export [--model NAME]
+"""
+
+import io
+import os
+import re
+import sys
+import time
+import threading
+from pathlib import Path
+
+# Configuration constants
+OCR_MODEL_NAME = os.getenv('OCR_MODEL_NAME', 'anuashok/ocr-captcha-v3')
+OCR_DAEMON_SOCKET = os.getenv('OCR_DAEMON_SOCKET', '')
+OCR_BACKEND = os.getenv('OCR_BACKEND', 'torch').lower()
+OCR_ONNX_DIR = Path(os.getenv('OCR_ONNX_DIR', '~/.cache/legal_ocr/onnx')).expanduser()
+OCR_BACKENDS = ('torch', 'int8', 'onnx')
+OCR_MODEL_OFFLINE = os.getenv('OCR_MODEL_OFFLINE', 'false').lower() == 'true'
+CAPTCHA_PREPROCESS = os.getenv('CAPTCHA_PREPROCESS', '')             # Comma-separated captcha_preprocess steps
+
+_model_lock = threading.Lock()
+_loaded = {}
+
+
+def onnx_export_dir(model_name=OCR_MODEL_NAME):
+    """Directory holding the ONNX export of ``model_name``"""
+    return OCR_ONNX_DIR / re.sub(r'[^A-Za-z0-9_.-]+', '--', model_name)
+
+
+def export_onnx(model_name=OCR_MODEL_NAME):
+    """Export ``model_name`` to ONNX (encoder + decoder) for the onnx backend"""
+    from optimum.onnxruntime import ORTModelForVision2Seq
+    from transformers import TrOCRProcessor
+
+    target = onnx_export_dir(model_name)
+    source = _model_source(model_name)
+    print(f"Exporting {model_name} to ONNX …")
+    export_start = time.perf_counter()
+    model = ORTModelForVision2Seq.from_pretrained(source, export=True)
+    model.save_pretrained(target)
+    TrOCRProcessor.from_pretrained(source).save_pretrained(target)
+    print(f"ONNX model written to {target} in {time.perf_counter() - export_start:.2f}s")
+    return target
+
+
+def _model_source(model_name):
+    """Local artifact directory for ``model_name`` if one was fetched, else the hub name"""
+    from model_artifacts import current_artifact
+
+    artifact_dir = current_artifact(model_name)
+    if artifact_dir:
+        return artifact_dir
+    if OCR_MODEL_OFFLINE:
+        raise FileNotFoundError(f"No local artifact for {model_name}; run: python model_artifacts.py fetch")
+    return model_name
+
+
+def _load_model(model_name, backend):
+    from transformers import VisionEncoderDecoderModel, TrOCRProcessor
+
+    if backend == 'onnx':
+        from optimum.onnxruntime import ORTModelForVision2Seq
+
+        source = onnx_export_dir(model_name)
+        if not (source / 'config.json').exists():
+            source = export_onnx(model_name)
+        return TrOCRProcessor.from_pretrained(source), ORTModelForVision2Seq.from_pretrained(source)
+
+    source = _model_source(model_name)
+    if isinstance(source, Path):
+        from model_artifacts import load_artifact
+        processor, model = load_artifact(source)
+    else:
+        processor = TrOCRProcessor.from_pretrained(model_name)
+        model = VisionEncoderDecoderModel.from_pretrained(model_name)
+        model.eval()
+    if backend == 'int8':
+        import torch
+        # Weights of Linear layers (most of TrOCR) become int8; activations are quantized on the fly.
+        # The quantized weights are private copies, so int8 does not share the memory-mapped pages
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return processor, model
+
+
+def load_ocr_model(model_name=OCR_MODEL_NAME, backend=None):
+    """Return (processor, model) for ``model_name`` on ``backend``, loading it on the first call"""
+    backend = (backend or OCR_BACKEND).lower()
+    if backend not in OCR_BACKENDS:
+        raise ValueError(f"Unknown OCR_BACKEND '{backend}', expected one of {', '.join(OCR_BACKENDS)}")
+
+    key = (model_name, backend)
+    if key in _loaded:
+        return _loaded[key]
+
+    with _model_lock:
+        if key not in _loaded:
+            print(f"Loading TrOCR model ({backend}) …")
+            model_start = time.perf_counter()
+            _loaded[key] = _load_model(model_name, backend)
+            print(f"Model loaded in {time.perf_counter() - model_start:.2f}s")
+    return _loaded[key]
+
+
+def load_captcha_image(source, preprocess=None):
+    """Open a CAPTCHA (file path or PNG bytes) flattened onto white as RGB.
+
+    ``preprocess`` lists captcha_preprocess steps to apply; None uses
+    CAPTCHA_PREPROCESS and '' disables preprocessing.
+    """
+    from PIL import Image
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    image = Image.open(source).convert("RGBA")
+    bg = Image.new("RGBA", image.size, (255, 255, 255))
+    image = Image.alpha_composite(bg, image).convert("RGB")
+
+    steps = CAPTCHA_PREPROCESS if preprocess is None else preprocess
+    if steps:
+        from captcha_preprocess import preprocess_captcha
+        image = preprocess_captcha(image, steps)
+    return image
+
+
+def recognize_batch(images, processor, model):
+    """Decode a list of CAPTCHA images in one generate call.
+
+    Returns [(text, score)] in input order, where score is the geometric
+    mean of the decoded tokens' probabilities (0-1).
+    """
+    import torch
+
+    with torch.no_grad():
+        pixel_vals = processor(images=images, return_tensors="pt").pixel_values
+        output = model.generate(pixel_vals, output_scores=True, return_dict_in_generate=True)
+        texts = processor.batch_decode(output.sequences, skip_special_tokens=True)
+
+        # Log-probability of each generated token (greedy decoding, so the chosen
+        # token at each step); padding after EOS is masked out. Computed here
+        # rather than with compute_transition_scores so every backend works.
+        step_scores = torch.stack(output.scores, dim=1).log_softmax(dim=-1)
+        tokens = output.sequences[:, 1:1 + step_scores.shape[1]]
+        token_scores = step_scores.gather(-1, tokens.unsqueeze(-1)).squeeze(-1)
+        pad_token_id = model.generation_config.pad_token_id
+        mask = tokens != pad_token_id if pad_token_id is not None else torch.ones_like(tokens, dtype=torch.bool)
+        lengths = mask.sum(dim=1).clamp(min=1)
+        scores = torch.exp((token_scores * mask).sum(dim=1) / lengths)
+
+    return [(text.strip(), round(float(score), 4)) for text, score in zip(texts, scores)]
+
+
+def solve_captcha(img_path, processor=None, model=None) -> str:
+    """Read the text of a CAPTCHA image (uses the daemon or the cached model unless one is passed)"""
+    if processor is None and model is None and OCR_DAEMON_SOCKET:
+        try:
+            from ocr_daemon import OCRDaemonClient
+            text, score = OCRDaemonClient(OCR_DAEMON_SOCKET).recognize(img_path)
+            print(f"OCR daemon decoded CAPTCHA (score {score:.2f})")
+            return text
+        except Exception as e:
+            print(f"Warning: OCR daemon unavailable ({e}), using a local model")
+
+    if processor is None or model is None:
+        processor, model = load_ocr_model()
+
+    return recognize_batch([load_captcha_image(img_path)], processor, model)[0][0]
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='CAPTCHA OCR model tools')
+    parser.add_argument('command', choices=['export'], help='export: write the ONNX model used by OCR_BACKEND=onnx')
+    parser.add_argument('--model', default=OCR_MODEL_NAME, help='model name or path')
+    args = parser.parse_args()
+
+    try:
+        export_onnx(args.model)
+    except ImportError as e:
+        print(f"❌ ONNX export needs optimum[onnxruntime]: {e}")
+        sys.exit(1)
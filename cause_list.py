@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Daily cause lists
+A cause list is the day's hearings of one user's cases, grouped by court and
+judge. The lists of every user for a date come from one query over
+case_history and cases (DatabaseManager.get_cause_lists) and are cached per
+date on the shared state backend. A cached date is reused until a case or
+history write lands after the change watermark it was built at, or its TTL
+runs out.
+"""
+
+import os
+import threading
+from datetime import datetime
+
+# Configuration constants
+CAUSE_LIST_TTL = int(os.getenv('CAUSE_LIST_TTL', '3600'))              # 1 hour
+CAUSE_LIST_MAX_DATES = int(os.getenv('CAUSE_LIST_MAX_DATES', '14'))
+UNASSIGNED_KEY = 'unassigned'                                            # Cases without an owner
+
+# Columns of the printable cause list, in order
+EXPORT_COLUMNS = ['Sr. No.', 'Case No.', 'CNR', 'Case Title', 'Parties', 'Purpose', 'Last Hearing']
+
+
+class CauseListStore:
+    """Per-date cause lists for every user, built in one query and cached on a state backend"""
+
+    def __init__(self, db, backend, namespace='cause_lists', ttl=CAUSE_LIST_TTL, max_dates=CAUSE_LIST_MAX_DATES):
+        self.db = db
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_dates = max_dates
+        self._lock = threading.Lock()
+        self._metrics = {'generated': 0, 'hits': 0, 'stale': 0}
+
+    def _count(self, metric):
+        with self._lock:
+            self._metrics[metric] += 1
+
+    def for_date(self, hearing_date):
+        """Every user's cause list for hearing_date (a date), from the cache when still current; None on error"""
+        key = hearing_date.isoformat()
+        cached = self.backend.get(self.namespace, key, touch=True)
+        if cached is not None and self.db.has_changes_since(cached['change_version']) is False:
+            self._count('hits')
+            return cached
+        if cached is not None:
+            self._count('stale')
+
+        # Watermark first: a write landing during the query leaves the entry stale, never wrongly current
+        version = self.db.get_change_version()
+        if version is None:
+            return None
+        lists = self.db.get_cause_lists(hearing_date)
+        if lists is None:
+            return None
+        entry = {
+            'date': key,
+            'generated_at': datetime.now().isoformat(),
+            'change_version': version,
+            'users': {(UNASSIGNED_KEY if user_id is None else str(user_id)): cause_list
+                      for user_id, cause_list in lists.items()}
+        }
+        self.backend.set(self.namespace, key, entry, ttl=self.ttl)
+        self.backend.evict(self.namespace, max_entries=self.max_dates)
+        self._count('generated')
+        print(f"📋 Cause lists for {key}: {sum(l['total'] for l in lists.values())} hearings across {len(lists)} users")
+        return entry
+
+    def for_user(self, hearing_date, user_id=None):
+        """One user's cause list for hearing_date; user_id None merges every user's list (admin view)"""
+        entry = self.for_date(hearing_date)
+        if entry is None:
+            return None
+        if user_id is None:
+            cause_list = merge_cause_lists(entry['users'].values())
+        else:
+            cause_list = entry['users'].get(str(user_id), {'courts': [], 'total': 0})
+        return {'date': entry['date'], 'generated_at': entry['generated_at'], **cause_list}
+
+    def invalidate(self, hearing_date=None):
+        """Drop the cached lists of one date, or of every date"""
+        if hearing_date is None:
+            self.backend.clear(self.namespace)
+        else:
+            self.backend.delete(self.namespace, hearing_date.isoformat())
+
+    def stats(self):
+        """Cached dates and lifetime counters (counters are per process)"""
+        entries, _ = self.backend.usage(self.namespace)
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics.update({'dates': entries, 'max_dates': self.max_dates, 'ttl_seconds': self.ttl})
+        return metrics
+
+
+def merge_cause_lists(cause_lists):
+    """Combine several users' cause lists into one, still grouped by court and judge"""
+    courts = {}
+    for cause_list in cause_lists:
+        for court in cause_list['courts']:
+            judges = courts.setdefault(court['court'], {})
+            for judge in court['judges']:
+                judges.setdefault(judge['judge'], []).extend(judge['cases'])
+
+    merged = []
+    for court_name in sorted(courts):
+        judges = [{'judge': judge_name,
+                   'cases': sorted(cases, key=lambda case: (case['case_title'] or '', case['cnr_number'])),
+                   'total': len(cases)}
+                  for judge_name, cases in sorted(courts[court_name].items())]
+        merged.append({'court': court_name, 'judges': judges, 'total': sum(judge['total'] for judge in judges)})
+    return {'courts': merged, 'total': sum(court['total'] for court in merged)}
+
+
+def export_cause_list(cause_list, title='Cause List'):
+    """A cause list as a print layout: one section per court, one table per judge, rows numbered across the list"""
+    hearing_date = datetime.strptime(cause_list['date'], '%Y-%m-%d')
+    serial = 0
+    sections = []
+    for court in cause_list['courts']:
+        tables = []
+        for judge in court['judges']:
+            rows = []
+            for case in judge['cases']:
+                serial += 1
+                parties = ' vs '.join(party for party in (case['petitioner'], case['respondent']) if party)
+                rows.append([serial, case['registration_number'] or '', case['cnr_number'], case['case_title'] or '',
+                             parties, case['purpose'], case['last_business_date'] or ''])
+            tables.append({'heading': judge['judge'], 'columns': EXPORT_COLUMNS, 'rows': rows,
+                           'footer': f"{judge['total']} case(s)"})
+        sections.append({'heading': court['court'], 'tables': tables, 'footer': f"{court['total']} case(s)"})
+
+    return {
+        'title': f"{title} - {hearing_date.strftime('%A, %d %B %Y')}",
+        'date': cause_list['date'],
+        'generated_at': cause_list['generated_at'],
+        'page': {'size': 'A4', 'orientation': 'landscape'},
+        'sections': sections,
+        'total': cause_list['total'],
+        'filename': f"cause-list-{cause_list['date']}.pdf"
+    }
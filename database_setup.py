@@ -5,9 +5,103 @@ Creates PostgreSQL tables for cases, case history, and scraping logs
 """
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values, Json
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+
+# Columns of a case as every case endpoint returns them
+CASE_COLUMNS = ("cnr_number, case_title, client_name, client_phone, client_email, petitioner, respondent, case_type, "
+                "court_name, judge_name, status, filing_date, case_description, registration_number, created_at, "
+                "updated_at, user_id, next_hearing_date, last_hearing_date, history_count")
+
+# Advisory lock that serialises schema upgrades of processes starting together
+SCHEMA_UPGRADE_LOCK = 740_215_001
+
+# Change version of a write: the writing transaction's id. Every row a
+# transaction touches gets the same version, and versions below the oldest
+# still-running transaction (CHANGE_WATERMARK) can no longer appear
+CHANGE_VERSION = "pg_current_xact_id()::text::bigint"
+
+# Highest version whose writes have all finished: a client that has read
+# everything up to it can never be handed an older version later
+CHANGE_WATERMARK = "pg_snapshot_xmin(pg_current_snapshot())::text::bigint - 1"
+
+# One case_history row as JSON, in the shape get_case_history returns
+CASE_HISTORY_JSON = """json_build_object(
+    'judge', COALESCE(judge, 'N/A'),
+    'business_date', COALESCE(to_char(business_date, 'YYYY-MM-DD'), 'N/A'),
+    'hearing_date', COALESCE(to_char(hearing_date, 'YYYY-MM-DD'), 'N/A'),
+    'purpose', COALESCE(purpose, 'N/A'),
+    'created_at', COALESCE(to_char(created_at, 'YYYY-MM-DD HH24:MI:SS'), 'N/A')
+)"""
+
+# One cases row as JSON, in the shape jsonify gives get_all_cases rows (dates as HTTP dates)
+CASE_JSON = """json_build_object(
+    'cnr_number', cnr_number, 'case_title', case_title, 'client_name', client_name,
+    'client_phone', client_phone, 'client_email', client_email, 'petitioner', petitioner,
+    'respondent', respondent, 'case_type', case_type, 'court_name', court_name,
+    'judge_name', judge_name, 'status', status,
+    'filing_date', to_char(filing_date, 'Dy, DD Mon YYYY "00:00:00 GMT"'),
+    'case_description', case_description, 'registration_number', registration_number,
+    'created_at', to_char(created_at, 'Dy, DD Mon YYYY HH24:MI:SS "GMT"'),
+    'updated_at', to_char(updated_at, 'Dy, DD Mon YYYY HH24:MI:SS "GMT"'),
+    'user_id', user_id,
+    'next_hearing_date', to_char(next_hearing_date, 'Dy, DD Mon YYYY "00:00:00 GMT"'),
+    'last_hearing_date', to_char(last_hearing_date, 'Dy, DD Mon YYYY "00:00:00 GMT"'),
+    'history_count', history_count
+)"""
+
+# Clients a user can see (%(is_admin)s, %(user_id)s), from the clients table
+CLIENTS_SQL = """
+    SELECT id, name, type, status, email, phone, location, active_cases, role,
+           latest_cnr AS cnr_number, latest_case_type AS case_type, latest_case_at
+    FROM clients
+    WHERE %(is_admin)s OR user_id = %(user_id)s
+"""
+
+# Client mentions of the cases in %(cnrs)s (NULL for every case): a client is a
+# case's client_name or petitioner, owned by the case's user
+CASE_CLIENT_MENTIONS = """
+    SELECT cnr_number, user_id, client_name AS name, 'client' AS role
+    FROM cases
+    WHERE (%(cnrs)s::varchar[] IS NULL OR cnr_number = ANY(%(cnrs)s::varchar[]))
+      AND btrim(client_name) <> '' AND client_name <> 'Unknown'
+    UNION
+    SELECT cnr_number, user_id, petitioner, 'petitioner'
+    FROM cases
+    WHERE (%(cnrs)s::varchar[] IS NULL OR cnr_number = ANY(%(cnrs)s::varchar[]))
+      AND btrim(petitioner) <> '' AND petitioner <> 'Unknown'
+"""
+
+# Sort orders of get_clients_page
+CLIENT_SORTS = {
+    'recent': 'latest_case_at DESC NULLS LAST, name',
+    'name': 'lower(name), name',
+    'cases': 'active_cases DESC, lower(name)'
+}
+
+# Widths of case_history's bounded text columns; longer scraped values are cut to fit
+HISTORY_TEXT_LIMITS = {'judge': 100, 'status': 50}
+
+def parse_history_date(value):
+    """Parse a YYYY-MM-DD or DD-MM-YYYY date string; anything else becomes None"""
+    if not isinstance(value, str) or value.count('-') != 2:
+        return None
+    try:
+        if len(value.split('-')[0]) == 4:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        return datetime.strptime(value, '%d-%m-%Y').date()
+    except ValueError:
+        return None
+
+def clean_history_text(value, field):
+    """A scraped history value as text its case_history column accepts (no NULs, within width); None stays None"""
+    if value is None:
+        return None
+    value = str(value).replace('\x00', '')
+    limit = HISTORY_TEXT_LIMITS.get(field)
+    return value[:limit] if limit else value
+
 
 class DatabaseManager:
     def __init__(self):
@@ -38,6 +132,33 @@ class DatabaseManager:
         try:
             cursor = conn.cursor()
             
+            # Create users table for multi-user authentication (first: cases and history reference it)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    id SERIAL PRIMARY KEY,
+                    username VARCHAR(50) UNIQUE NOT NULL,
+                    email VARCHAR(100) UNIQUE NOT NULL,
+                    password_hash VARCHAR(255) NOT NULL,
+                    full_name VARCHAR(100) NOT NULL,
+                    phone VARCHAR(15),
+                    role VARCHAR(10) DEFAULT 'user',
+                    is_active BOOLEAN DEFAULT true,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_login TIMESTAMP
+                )
+            """)
+            
+            # Create user_sessions table for session management
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS user_sessions (
+                    id SERIAL PRIMARY KEY,
+                    user_id INTEGER REFERENCES users(id),
+                    session_token VARCHAR(255) UNIQUE NOT NULL,
+                    expires_at TIMESTAMP NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
             # Create cases table with CNR as primary key
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS cases (
@@ -78,6 +199,8 @@ class DatabaseManager:
                     FOREIGN KEY (cnr_number) REFERENCES cases(cnr_number)
                 )
             """)
+            # Calendar date-range queries (get_calendar_events)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_case_history_hearing_date ON case_history (hearing_date, cnr_number)")
             
             # Create scraping_logs table
             cursor.execute("""
@@ -93,39 +216,16 @@ class DatabaseManager:
                 )
             """)
             
-            # Create users table for multi-user authentication
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id SERIAL PRIMARY KEY,
-                    username VARCHAR(50) UNIQUE NOT NULL,
-                    email VARCHAR(100) UNIQUE NOT NULL,
-                    password_hash VARCHAR(255) NOT NULL,
-                    full_name VARCHAR(100) NOT NULL,
-                    phone VARCHAR(15),
-                    role VARCHAR(10) DEFAULT 'user',
-                    is_active BOOLEAN DEFAULT true,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_login TIMESTAMP
-                )
-            """)
-            
-            # Create user_sessions table for session management
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS user_sessions (
-                    id SERIAL PRIMARY KEY,
-                    user_id INTEGER REFERENCES users(id),
-                    session_token VARCHAR(255) UNIQUE NOT NULL,
-                    expires_at TIMESTAMP NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
             conn.commit()
             print("✅ Database tables created successfully")
             
             # Create default admin user and migrate existing data
             self.create_default_admin()
             self.add_user_id_to_existing_tables()
+            self.create_system_logs_table()
+            self.create_scrape_jobs_table()
+            if self.upgrade_schema():
+                self.assign_unowned_cases_to_admin()
             
             return True
             
@@ -233,16 +333,6 @@ class DatabaseManager:
                 ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id)
             """)
             
-            # Get admin user ID
-            cursor.execute("SELECT id FROM users WHERE username = 'admin'")
-            admin_id = cursor.fetchone()
-            
-            if admin_id:
-                # Migrate existing data to admin user
-                cursor.execute("UPDATE cases SET user_id = %s WHERE user_id IS NULL", (admin_id[0],))
-                cursor.execute("UPDATE case_history SET user_id = %s WHERE user_id IS NULL", (admin_id[0],))
-                print("✅ Existing data migrated to admin user")
-            
             conn.commit()
             print("✅ User ID columns added to existing tables")
             
@@ -253,6 +343,45 @@ class DatabaseManager:
             if conn:
                 conn.close()
 
+    def assign_unowned_cases_to_admin(self):
+        """Migrate cases without an owner (from before user accounts) to the admin user.
+
+        Needs upgrade_schema() first: the cases get a new change version, so
+        delta syncs pick up the new owner, and their clients move with them.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM users WHERE username = 'admin'")
+            admin_id = cursor.fetchone()
+            if not admin_id:
+                return True
+            
+            cursor.execute(f"""
+                UPDATE cases SET user_id = %s, change_version = {CHANGE_VERSION}
+                WHERE user_id IS NULL
+                RETURNING cnr_number
+            """, (admin_id[0],))
+            cnr_numbers = [row[0] for row in cursor.fetchall()]
+            cursor.execute("UPDATE case_history SET user_id = %s WHERE user_id IS NULL", (admin_id[0],))
+            if cnr_numbers:
+                self.sync_case_clients(conn, cnr_numbers)
+            
+            conn.commit()
+            if cnr_numbers:
+                print(f"✅ {len(cnr_numbers)} existing case(s) migrated to admin user")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Error migrating existing cases to admin: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
     def insert_case(self, cnr_number, case_title, client_name=None, client_phone=None, client_email=None, petitioner=None, respondent=None, case_type=None, court_name=None, judge_name=None, status=None, filing_date=None, case_description=None, registration_number=None, user_id=None):
         """Insert or update case in database"""
         conn = self.get_connection()
@@ -264,7 +393,7 @@ class DatabaseManager:
             cursor = conn.cursor()
             
             # Use UPSERT (INSERT ... ON CONFLICT) to handle duplicate CNR
-            cursor.execute("""
+            cursor.execute(f"""
                 INSERT INTO cases (cnr_number, case_title, client_name, client_phone, client_email, petitioner, respondent, case_type, court_name, judge_name, status, filing_date, case_description, registration_number, user_id, updated_at)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
                 ON CONFLICT (cnr_number) 
@@ -283,8 +412,10 @@ class DatabaseManager:
                     case_description = EXCLUDED.case_description,
                     registration_number = EXCLUDED.registration_number,
                     user_id = EXCLUDED.user_id,
-                    updated_at = CURRENT_TIMESTAMP
+                    updated_at = CURRENT_TIMESTAMP,
+                    change_version = {CHANGE_VERSION}
             """, (cnr_number, case_title, client_name, client_phone, client_email, petitioner, respondent, case_type, court_name, judge_name, status, filing_date, case_description, registration_number, user_id))
+            self.sync_case_clients(conn, [cnr_number])
             
             conn.commit()
             print(f"✅ Database: Case inserted/updated successfully for CNR: {cnr_number}")
@@ -334,6 +465,7 @@ class DatabaseManager:
                 INSERT INTO case_history (cnr_number, hearing_date, purpose)
                 VALUES (%s, %s, %s)
             """, (cnr_number, hearing_date, purpose))
+            self.refresh_hearing_summary(conn, [cnr_number])
             
             conn.commit()
             print(f"✅ Database: New case history entry inserted for CNR: {cnr_number}")
@@ -375,16 +507,25 @@ class DatabaseManager:
             print(f"🧹 Database: Found {duplicate_sets} sets of duplicate case history entries")
             
             # Delete duplicates, keeping only the entry with the smallest ID for each unique combination
-            cursor.execute("""
-                DELETE FROM case_history 
-                WHERE id NOT IN (
-                    SELECT MIN(id) 
-                    FROM case_history 
-                    GROUP BY cnr_number, hearing_date, purpose
+            cursor.execute(f"""
+                WITH deleted AS (
+                    DELETE FROM case_history 
+                    WHERE id NOT IN (
+                        SELECT MIN(id) 
+                        FROM case_history 
+                        GROUP BY cnr_number, hearing_date, purpose
+                    )
+                    RETURNING cnr_number
+                ), bumped AS (
+                    -- Deleted rows leave no trace, so the changes feed resends these cases' history
+                    UPDATE cases SET change_version = {CHANGE_VERSION}
+                    WHERE cnr_number IN (SELECT cnr_number FROM deleted)
                 )
+                SELECT COUNT(*), COALESCE(array_agg(DISTINCT cnr_number), ARRAY[]::varchar[]) FROM deleted
             """)
             
-            deleted_count = cursor.rowcount
+            deleted_count, cleaned_cnrs = cursor.fetchone()
+            self.refresh_hearing_summary(conn, cleaned_cnrs)
             conn.commit()
             
             print(f"✅ Database: Successfully removed {deleted_count} duplicate case history entries")
@@ -413,48 +554,14 @@ class DatabaseManager:
             print(f"🔍 Database: Raw dates - Business: '{business_date}', Hearing: '{hearing_date}'")
             
             # Convert date strings to proper format if needed
-            if business_date and business_date != '' and business_date != 'None':
-                try:
-                    if '-' in business_date:
-                        if business_date.count('-') == 2:
-                            # Check if it's YYYY-MM-DD or DD-MM-YYYY
-                            parts = business_date.split('-')
-                            if len(parts[0]) == 4:  # YYYY-MM-DD format
-                                business_date = datetime.strptime(business_date, '%Y-%m-%d').date()
-                            else:  # DD-MM-YYYY format
-                                business_date = datetime.strptime(business_date, '%d-%m-%Y').date()
-                        else:
-                            business_date = None
-                    else:
-                        business_date = None
-                except:
-                    business_date = None
-            else:
-                business_date = None
-                
-            if hearing_date and hearing_date != '' and hearing_date != 'None':
-                try:
-                    if '-' in hearing_date:
-                        if hearing_date.count('-') == 2:
-                            # Check if it's YYYY-MM-DD or DD-MM-YYYY
-                            parts = hearing_date.split('-')
-                            if len(parts[0]) == 4:  # YYYY-MM-DD format
-                                hearing_date = datetime.strptime(hearing_date, '%Y-%m-%d').date()
-                            else:  # DD-MM-YYYY format
-                                hearing_date = datetime.strptime(hearing_date, '%d-%m-%Y').date()
-                        else:
-                            hearing_date = None
-                    else:
-                        hearing_date = None
-                except:
-                    hearing_date = None
-            else:
-                hearing_date = None
+            business_date = parse_history_date(business_date)
+            hearing_date = parse_history_date(hearing_date)
             
             cursor.execute("""
                 INSERT INTO case_history (cnr_number, judge, business_date, hearing_date, purpose, order_details, status, user_id)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             """, (cnr_number, judge, business_date, hearing_date, purpose, None, status, user_id))
+            self.refresh_hearing_summary(conn, [cnr_number])
             
             conn.commit()
             return True
@@ -526,7 +633,8 @@ class DatabaseManager:
         try:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT cnr_number, case_title, client_name, client_phone, client_email, petitioner, respondent, case_type, court_name, judge_name, status, filing_date, case_description, registration_number, created_at, updated_at, user_id
+                SELECT cnr_number, case_title, client_name, client_phone, client_email, petitioner, respondent, case_type, court_name, judge_name, status, filing_date, case_description, registration_number, created_at, updated_at, user_id,
+                       next_hearing_date, last_hearing_date, history_count
                 FROM cases 
                 ORDER BY created_at DESC
             """)
@@ -551,7 +659,10 @@ class DatabaseManager:
                     'registration_number': row[13],
                     'created_at': row[14],
                     'updated_at': row[15],
-                    'user_id': row[16]
+                    'user_id': row[16],
+                    'next_hearing_date': row[17],
+                    'last_hearing_date': row[18],
+                    'history_count': row[19]
                 }
                 cases.append(case_data)
             
@@ -572,7 +683,8 @@ class DatabaseManager:
         try:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT cnr_number, case_title, client_name, client_phone, client_email, petitioner, respondent, case_type, court_name, judge_name, status, filing_date, case_description, registration_number, created_at, updated_at, user_id
+                SELECT cnr_number, case_title, client_name, client_phone, client_email, petitioner, respondent, case_type, court_name, judge_name, status, filing_date, case_description, registration_number, created_at, updated_at, user_id,
+                       next_hearing_date, last_hearing_date, history_count
                 FROM cases 
                 WHERE user_id = %s
                 ORDER BY created_at DESC
@@ -598,7 +710,10 @@ class DatabaseManager:
                     'registration_number': row[13],
                     'created_at': row[14],
                     'updated_at': row[15],
-                    'user_id': row[16]
+                    'user_id': row[16],
+                    'next_hearing_date': row[17],
+                    'last_hearing_date': row[18],
+                    'history_count': row[19]
                 }
                 cases.append(case_data)
             
@@ -689,6 +804,7 @@ class DatabaseManager:
                     values.append(value)
             
             set_clauses.append("updated_at = CURRENT_TIMESTAMP")
+            set_clauses.append(f"change_version = {CHANGE_VERSION}")
             
             query = f"""
                 UPDATE cases 
@@ -702,6 +818,8 @@ class DatabaseManager:
             cursor.execute(query, values)
             rows_affected = cursor.rowcount
             print(f"🗄️ Database: UPDATE query executed, rows affected: {rows_affected}")
+            if rows_affected:
+                self.sync_case_clients(conn, [cnr_number])
             
             conn.commit()
             print(f"✅ Database: Case updated successfully for CNR: {cnr_number}")
@@ -765,6 +883,9 @@ class DatabaseManager:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM case_history WHERE cnr_number = %s", (cnr_number,))
             rows_deleted = cursor.rowcount
+            # Deleted rows leave no trace, so the changes feed resends this case's history
+            cursor.execute(f"UPDATE cases SET change_version = {CHANGE_VERSION} WHERE cnr_number = %s", (cnr_number,))
+            self.refresh_hearing_summary(conn, [cnr_number])
             conn.commit()
             print(f"✅ Database: Deleted {rows_deleted} case history entries for CNR: {cnr_number}")
             return rows_deleted
@@ -815,6 +936,169 @@ class DatabaseManager:
             conn.close()
             print(f"🗄️ Database: Connection closed for CNR: {cnr_number}")
     
+    def get_calendar_events(self, user_id, is_admin=False, date_from=None, date_to=None, court=None, case_type=None):
+        """Hearings between date_from and date_to (inclusive; None leaves that side open) as calendar events.
+
+        Range-scans case_history on hearing_date and joins each hearing to its
+        case for the ownership, court and case type filters. Returns None on error,
+        so a failed read is never mistaken for an empty calendar.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("""
+                SELECT to_char(h.hearing_date, 'YYYY-MM-DD') AS date,
+                       COALESCE(c.case_title, 'Unknown Case') AS case_title,
+                       COALESCE(h.purpose, 'Hearing') AS purpose,
+                       COALESCE(h.order_details, 'No details available') AS description,
+                       c.cnr_number, c.case_type, c.court_name
+                FROM case_history h
+                JOIN cases c ON c.cnr_number = h.cnr_number
+                WHERE h.hearing_date >= COALESCE(%(date_from)s::date, '-infinity'::date)
+                  AND h.hearing_date <= COALESCE(%(date_to)s::date, 'infinity'::date)
+                  AND (%(is_admin)s OR c.user_id = %(user_id)s)
+                  AND (%(court)s::text IS NULL OR c.court_name = %(court)s)
+                  AND (%(case_type)s::text IS NULL OR c.case_type = %(case_type)s)
+                ORDER BY h.hearing_date, c.case_title
+            """, {'user_id': user_id, 'is_admin': is_admin, 'date_from': date_from, 'date_to': date_to,
+                  'court': court, 'case_type': case_type})
+            
+            return [{
+                'date': row['date'],
+                'title': f"{row['case_title']} - {row['purpose']}",
+                'description': row['description'],
+                'caseTitle': row['case_title'],
+                'cnrNumber': row['cnr_number'],
+                'caseType': row['case_type'],
+                'court': row['court_name'],
+                'type': 'hearing',
+                'time': '09:00 AM'  # Default time
+            } for row in cursor.fetchall()]
+            
+        except Exception as e:
+            print(f"❌ Database: Error getting calendar events for user {user_id}: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def get_cause_lists(self, hearing_date):
+        """Every user's cause list for hearing_date in one query, grouped by court and judge.
+
+        Returns {user_id: {'courts': [{'court', 'judges': [{'judge', 'cases',
+        'total'}], 'total'}], 'total': n}} (user_id None for unassigned cases),
+        or None on error. A case listed more than once for the day appears once,
+        with its most recently recorded history row.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("""
+                WITH hearings AS (
+                    SELECT DISTINCT ON (h.cnr_number)
+                           c.user_id,
+                           COALESCE(NULLIF(btrim(c.court_name), ''), 'Unknown Court') AS court,
+                           COALESCE(NULLIF(btrim(h.judge), ''), NULLIF(btrim(c.judge_name), ''), 'Unknown Judge') AS judge,
+                           c.cnr_number, c.registration_number, c.case_title, c.case_type, c.status,
+                           c.client_name, c.petitioner, c.respondent,
+                           COALESCE(h.purpose, 'Hearing') AS purpose,
+                           to_char(h.business_date, 'YYYY-MM-DD') AS last_business_date
+                    FROM case_history h
+                    JOIN cases c ON c.cnr_number = h.cnr_number
+                    WHERE h.hearing_date = %s
+                    ORDER BY h.cnr_number, h.created_at DESC, h.id DESC
+                ), judges AS (
+                    SELECT user_id, court, judge, COUNT(*) AS total,
+                           json_agg(json_build_object(
+                               'cnr_number', cnr_number, 'registration_number', registration_number,
+                               'case_title', case_title, 'case_type', case_type, 'status', status,
+                               'client_name', client_name, 'petitioner', petitioner, 'respondent', respondent,
+                               'purpose', purpose, 'last_business_date', last_business_date
+                           ) ORDER BY case_title, cnr_number) AS cases
+                    FROM hearings
+                    GROUP BY user_id, court, judge
+                ), courts AS (
+                    SELECT user_id, court, SUM(total) AS total,
+                           json_agg(json_build_object('judge', judge, 'cases', cases, 'total', total) ORDER BY judge) AS judges
+                    FROM judges
+                    GROUP BY user_id, court
+                )
+                SELECT user_id, SUM(total)::int AS total,
+                       json_agg(json_build_object('court', court, 'judges', judges, 'total', total) ORDER BY court) AS courts
+                FROM courts
+                GROUP BY user_id
+            """, (hearing_date,))
+            
+            return {row['user_id']: {'courts': row['courts'], 'total': row['total']} for row in cursor.fetchall()}
+            
+        except Exception as e:
+            print(f"❌ Database: Error getting cause lists for {hearing_date}: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def get_case_with_history(self, cnr_number):
+        """Get a case, its history and derived hearing fields in one query.
+
+        Returns {'case': ..., 'history': [...], 'summary': {...}} or None if the
+        case does not exist. The summary's dates and history count are the ones
+        kept on cases (refresh_hearing_summary). History entries have the same
+        shape as get_case_history; the caller checks ownership against
+        case['user_id'].
+        """
+        conn = self.get_connection()
+        if not conn:
+            print(f"❌ Database: Failed to get connection for CNR: {cnr_number}")
+            return None
+        
+        try:
+            self.refresh_lapsed_hearing_summaries(conn)
+            conn.commit()
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(f"""
+                SELECT c.cnr_number, c.case_title, c.client_name, c.client_phone, c.client_email, c.petitioner, c.respondent,
+                       c.case_type, c.court_name, c.judge_name, c.status, c.filing_date, c.case_description,
+                       c.registration_number, c.created_at, c.updated_at, c.user_id,
+                       COALESCE(h.history, '[]'::json) AS history,
+                       c.history_count,
+                       COALESCE(h.hearing_count, 0) AS hearing_count,
+                       to_char(c.next_hearing_date, 'YYYY-MM-DD') AS next_hearing_date,
+                       to_char(c.last_hearing_date, 'YYYY-MM-DD') AS last_hearing_date,
+                       h.latest_purpose
+                FROM cases c
+                LEFT JOIN LATERAL (
+                    SELECT json_agg({CASE_HISTORY_JSON} ORDER BY created_at DESC) AS history,
+                           COUNT(hearing_date) AS hearing_count,
+                           (array_agg(purpose ORDER BY hearing_date DESC NULLS LAST, created_at DESC))[1] AS latest_purpose
+                    FROM case_history
+                    WHERE cnr_number = c.cnr_number
+                ) h ON true
+                WHERE c.cnr_number = %s
+            """, (cnr_number,))
+            
+            row = cursor.fetchone()
+            if not row:
+                print(f"❌ Database: No case found for CNR: {cnr_number}")
+                return None
+            
+            case_data = dict(row)
+            history = case_data.pop('history')
+            summary = {key: case_data.pop(key) for key in
+                       ('history_count', 'hearing_count', 'next_hearing_date', 'last_hearing_date', 'latest_purpose')}
+            print(f"✅ Database: Retrieved case and {len(history)} history records for CNR: {cnr_number}")
+            return {'case': case_data, 'history': history, 'summary': summary}
+            
+        except Exception as e:
+            print(f"❌ Database: Error getting case with history for CNR {cnr_number}: {e}")
+            return None
+        finally:
+            conn.close()
+    
     def delete_case(self, cnr_number):
         """Delete case and all related data"""
         print(f"🗑️ DATABASE: Starting delete process for CNR: {cnr_number}")
@@ -841,10 +1125,19 @@ class DatabaseManager:
             history_result = cursor.execute("DELETE FROM case_history WHERE cnr_number = %s", (cnr_number,))
             print(f"🗑️ DATABASE: Case history delete result: {history_result}")
             
-            # Delete the case
+            # Delete the case, leaving a tombstone for the changes feed; its
+            # case_clients links go with it, then its clients are recounted
+            client_ids = self._case_client_ids(conn, [cnr_number])
             print(f"🗑️ DATABASE: Deleting case for CNR: {cnr_number}")
-            case_result = cursor.execute("DELETE FROM cases WHERE cnr_number = %s", (cnr_number,))
+            case_result = cursor.execute("""
+                WITH deleted AS (
+                    DELETE FROM cases WHERE cnr_number = %s RETURNING cnr_number, user_id
+                )
+                INSERT INTO case_tombstones (cnr_number, user_id)
+                SELECT cnr_number, user_id FROM deleted
+            """, (cnr_number,))
             print(f"🗑️ DATABASE: Case delete result: {case_result}")
+            self._refresh_clients(conn, client_ids)
             
             conn.commit()
             print(f"✅ Database: Case and related data deleted for CNR: {cnr_number}")
@@ -864,6 +1157,246 @@ class DatabaseManager:
             conn.close()
             print(f"🗄️ Database: Connection closed for CNR: {cnr_number}")
 
+    def get_case_for_user(self, cnr_number, user_id, is_admin=False):
+        """Get a case if the user may see it (admin or owner).
+
+        Returns (status, case) with status 'ok', 'not_found', 'forbidden' or 'error'.
+        """
+        conn = self.get_connection()
+        if not conn:
+            print(f"❌ Database: Failed to get connection for CNR: {cnr_number}")
+            return 'error', None
+        
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("""
+                SELECT cnr_number, case_title, client_name, client_phone, client_email, petitioner, respondent, case_type, court_name, judge_name, status, filing_date, case_description, registration_number, created_at, updated_at, user_id,
+                       (%s OR user_id = %s) AS allowed
+                FROM cases 
+                WHERE cnr_number = %s
+            """, (is_admin, user_id, cnr_number))
+            
+            row = cursor.fetchone()
+            if not row:
+                return 'not_found', None
+            case_data = dict(row)
+            if not case_data.pop('allowed'):
+                return 'forbidden', None
+            return 'ok', case_data
+            
+        except Exception as e:
+            print(f"❌ Database: Error getting case for CNR {cnr_number}: {e}")
+            return 'error', None
+        finally:
+            conn.close()
+    
+    def update_case_for_user(self, cnr_number, case_data, user_id, is_admin=False):
+        """Update a case only if the user is an admin or its owner, in one statement.
+
+        Returns (status, detail) with status 'ok', 'not_found', 'forbidden' or
+        'error'; on 'ok' detail is {'case': ..., 'history': [...]} as stored.
+        """
+        conn = self.get_connection()
+        if not conn:
+            print(f"❌ Database: Failed to get connection for CNR: {cnr_number}")
+            return 'error', None
+        
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            set_clauses = []
+            values = []
+            for key, value in case_data.items():
+                if key not in ('cnr_number', 'created_at', 'updated_at'):
+                    set_clauses.append(f"{key} = %s")
+                    values.append(value)
+            set_clauses.append("updated_at = CURRENT_TIMESTAMP")
+            set_clauses.append(f"change_version = {CHANGE_VERSION}")
+            
+            # The ownership test is part of the UPDATE's WHERE clause; the
+            # target CTE (pre-update snapshot) tells "no such case" from "not yours"
+            cursor.execute(f"""
+                WITH target AS (
+                    SELECT cnr_number, user_id FROM cases WHERE cnr_number = %s
+                ), updated AS (
+                    UPDATE cases 
+                    SET {', '.join(set_clauses)}
+                    WHERE cnr_number = %s AND (%s OR user_id = %s)
+                    RETURNING {CASE_COLUMNS}
+                ), reassigned AS (
+                    -- A case moved to another user disappears from the previous owner's changes feed
+                    INSERT INTO case_tombstones (cnr_number, user_id)
+                    SELECT t.cnr_number, t.user_id FROM target t JOIN updated u USING (cnr_number)
+                    WHERE t.user_id IS DISTINCT FROM u.user_id
+                )
+                SELECT EXISTS (SELECT 1 FROM target) AS case_exists,
+                       (SELECT COUNT(*) FROM updated) AS updated_count,
+                       u.*,
+                       (SELECT COALESCE(json_agg({CASE_HISTORY_JSON} ORDER BY created_at DESC), '[]'::json)
+                        FROM case_history WHERE cnr_number = %s) AS history
+                FROM (SELECT 1) AS one
+                LEFT JOIN updated u ON true
+            """, [cnr_number] + values + [cnr_number, is_admin, user_id, cnr_number])
+            
+            row = dict(cursor.fetchone())
+            if row['updated_count']:
+                self.sync_case_clients(conn, [cnr_number])
+            conn.commit()
+            if not row.pop('case_exists'):
+                return 'not_found', None
+            if not row.pop('updated_count'):
+                return 'forbidden', None
+            history = row.pop('history')
+            print(f"✅ Database: Case updated successfully for CNR: {cnr_number}")
+            return 'ok', {'case': row, 'history': history}
+            
+        except Exception as e:
+            print(f"❌ Database: Error updating case for CNR {cnr_number}: {e}")
+            conn.rollback()
+            return 'error', None
+        finally:
+            conn.close()
+    
+    def save_case_with_history(self, case_data, history_rows=(), is_admin=False):
+        """Upsert a case and append its history rows in one transaction.
+
+        ``case_data`` holds the cases columns (cnr_number and user_id, the
+        saving user); ``history_rows`` are dicts with judge, business_date,
+        hearing_date, purpose and status; values that would not fit their
+        column are cleaned first (clean_history_text), so one long judge name
+        cannot fail the whole save. An existing case is only overwritten by
+        its owner (or anyone, if it has none) or an admin.
+
+        Returns (status, detail) with status 'ok', 'forbidden' or 'error'; on
+        'ok' detail is {'case': ..., 'history': [...], 'history_inserted': n}
+        as stored.
+        """
+        cnr_number = case_data['cnr_number']
+        conn = self.get_connection()
+        if not conn:
+            print(f"❌ Database: Failed to get connection for CNR: {cnr_number}")
+            return 'error', None
+        
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            columns = [key for key in case_data if key not in ('created_at', 'updated_at')]
+            updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in columns if column != 'cnr_number')
+            # The ownership test is the DO UPDATE's WHERE clause: saving someone
+            # else's CNR updates nothing and returns no row
+            cursor.execute(f"""
+                WITH target AS (
+                    SELECT cnr_number, user_id FROM cases WHERE cnr_number = %s
+                ), saved AS (
+                    INSERT INTO cases ({', '.join(columns)}, updated_at)
+                    VALUES ({', '.join(['%s'] * len(columns))}, CURRENT_TIMESTAMP)
+                    ON CONFLICT (cnr_number) 
+                    DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP, change_version = {CHANGE_VERSION}
+                    WHERE cases.user_id = EXCLUDED.user_id OR cases.user_id IS NULL OR %s
+                    RETURNING {CASE_COLUMNS}
+                ), reassigned AS (
+                    -- A case an admin saved over another user's disappears from that user's changes feed
+                    INSERT INTO case_tombstones (cnr_number, user_id)
+                    SELECT t.cnr_number, t.user_id FROM target t JOIN saved s USING (cnr_number)
+                    WHERE t.user_id IS DISTINCT FROM s.user_id
+                )
+                SELECT * FROM saved
+            """, [cnr_number] + [case_data[column] for column in columns] + [is_admin])
+            row = cursor.fetchone()
+            if row is None:
+                conn.rollback()
+                print(f"⚠️ Database: Case {cnr_number} belongs to another user, not saved")
+                return 'forbidden', None
+            case = dict(row)
+            self.sync_case_clients(conn, [cnr_number])
+            
+            # All history rows in one INSERT instead of a connection per row
+            inserted = 0
+            if history_rows:
+                execute_values(cursor, """
+                    INSERT INTO case_history (cnr_number, judge, business_date, hearing_date, purpose, status, user_id)
+                    VALUES %s
+                """, [(cnr_number, clean_history_text(row.get('judge'), 'judge'),
+                       parse_history_date(row.get('business_date')), parse_history_date(row.get('hearing_date')),
+                       clean_history_text(row.get('purpose'), 'purpose'), clean_history_text(row.get('status'), 'status'),
+                       case['user_id']) for row in history_rows])
+                inserted = len(history_rows)
+                self.refresh_hearing_summary(conn, [cnr_number])
+                cursor.execute("SELECT next_hearing_date, last_hearing_date, history_count FROM cases WHERE cnr_number = %s",
+                               (cnr_number,))
+                case.update(cursor.fetchone())
+            
+            cursor.execute(f"""
+                SELECT COALESCE(json_agg({CASE_HISTORY_JSON} ORDER BY created_at DESC), '[]'::json) AS history
+                FROM case_history
+                WHERE cnr_number = %s
+            """, (cnr_number,))
+            history = cursor.fetchone()['history']
+            
+            conn.commit()
+            print(f"✅ Database: Case saved with {inserted} new history entries for CNR: {cnr_number}")
+            return 'ok', {'case': case, 'history': history, 'history_inserted': inserted}
+            
+        except Exception as e:
+            print(f"❌ Database: Error saving case for CNR {cnr_number}: {e}")
+            conn.rollback()
+            return 'error', None
+        finally:
+            conn.close()
+    
+    def delete_case_for_user(self, cnr_number, user_id, is_admin=False):
+        """Delete a case and its history only if the user is an admin or its owner, in one statement.
+
+        Returns (status, deleted_history_rows) with status 'ok', 'not_found', 'forbidden' or 'error'.
+        """
+        conn = self.get_connection()
+        if not conn:
+            print(f"❌ Database: Failed to get connection for CNR: {cnr_number}")
+            return 'error', 0
+        
+        try:
+            cursor = conn.cursor()
+            client_ids = self._case_client_ids(conn, [cnr_number])
+            # case_history's foreign key is checked at the end of the statement,
+            # by which point both CTEs have removed their rows
+            cursor.execute("""
+                WITH target AS (
+                    SELECT cnr_number FROM cases WHERE cnr_number = %s
+                ), deleted_case AS (
+                    DELETE FROM cases
+                    WHERE cnr_number = %s AND (%s OR user_id = %s)
+                    RETURNING cnr_number, user_id
+                ), deleted_history AS (
+                    DELETE FROM case_history
+                    WHERE cnr_number IN (SELECT cnr_number FROM deleted_case)
+                    RETURNING id
+                ), tombstone AS (
+                    INSERT INTO case_tombstones (cnr_number, user_id)
+                    SELECT cnr_number, user_id FROM deleted_case
+                )
+                SELECT EXISTS (SELECT 1 FROM target),
+                       EXISTS (SELECT 1 FROM deleted_case),
+                       (SELECT COUNT(*) FROM deleted_history)
+            """, (cnr_number, cnr_number, is_admin, user_id))
+            
+            exists, deleted, history_rows = cursor.fetchone()
+            if deleted:
+                self._refresh_clients(conn, client_ids)
+            conn.commit()
+            if not exists:
+                return 'not_found', 0
+            if not deleted:
+                return 'forbidden', 0
+            print(f"✅ Database: Case and {history_rows} history entries deleted for CNR: {cnr_number}")
+            return 'ok', history_rows
+            
+        except Exception as e:
+            print(f"❌ Database: Error deleting case for CNR {cnr_number}: {e}")
+            conn.rollback()
+            return 'error', 0
+        finally:
+            conn.close()
+
     def fix_case_history_table(self):
         """Add missing columns to case_history table if they don't exist"""
         conn = self.get_connection()
@@ -1375,6 +1908,1115 @@ class DatabaseManager:
             if conn:
                 conn.close()
 
+    def create_system_logs_table(self):
+        """Create the partitioned system_logs table (one partition per day)"""
+        conn = self.get_connection()
+        if not conn:
+            print("❌ Database: Failed to get connection for system_logs table")
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            
+            # Partitioned by day so retention is a cheap DROP TABLE per partition
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS system_logs (
+                    id BIGSERIAL,
+                    logged_at TIMESTAMP NOT NULL,
+                    log_type VARCHAR(20) NOT NULL,
+                    source VARCHAR(50) NOT NULL,
+                    message TEXT,
+                    PRIMARY KEY (logged_at, id)
+                ) PARTITION BY RANGE (logged_at)
+            """)
+            
+            # Indexes on the parent are created on every partition
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_system_logs_logged_at ON system_logs (logged_at DESC, id DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_system_logs_source ON system_logs (source, logged_at DESC, id DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_system_logs_type ON system_logs (log_type, logged_at DESC, id DESC)")
+            
+            conn.commit()
+            print("✅ Database: system_logs table ready")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Database: Error creating system_logs table: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def ensure_system_log_partitions(self, days):
+        """Create the daily system_logs partitions covering the given dates"""
+        conn = self.get_connection()
+        if not conn:
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            for day in days:
+                partition = f"system_logs_p{day:%Y%m%d}"
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {partition} PARTITION OF system_logs
+                    FOR VALUES FROM (%s) TO (%s)
+                """, (day, day + timedelta(days=1)))
+            conn.commit()
+            return True
+            
+        except Exception as e:
+            print(f"❌ Database: Error creating system_logs partitions: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def insert_system_logs(self, entries):
+        """Insert a batch of log entries with a single multi-row INSERT"""
+        if not entries:
+            return True
+        
+        conn = self.get_connection()
+        if not conn:
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            execute_values(cursor, """
+                INSERT INTO system_logs (logged_at, log_type, source, message)
+                VALUES %s
+            """, [(entry['timestamp'], entry['type'], entry['source'], entry['message']) for entry in entries],
+                page_size=len(entries))
+            conn.commit()
+            return True
+            
+        except Exception as e:
+            print(f"❌ Database: Error inserting {len(entries)} system logs: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def drop_old_system_log_partitions(self, retention_days):
+        """Drop daily system_logs partitions older than the retention window"""
+        conn = self.get_connection()
+        if not conn:
+            return 0
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+                JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+                WHERE parent.relname = 'system_logs'
+            """)
+            
+            cutoff = f"system_logs_p{datetime.now().date() - timedelta(days=retention_days):%Y%m%d}"
+            dropped = 0
+            for (partition,) in cursor.fetchall():
+                # Partition names sort chronologically (system_logs_pYYYYMMDD)
+                if partition.startswith('system_logs_p') and partition < cutoff:
+                    cursor.execute(f"DROP TABLE IF EXISTS {partition}")
+                    dropped += 1
+            
+            conn.commit()
+            if dropped:
+                print(f"🧹 Database: Dropped {dropped} system_logs partitions older than {retention_days} days")
+            return dropped
+            
+        except Exception as e:
+            print(f"❌ Database: Error dropping old system_logs partitions: {e}")
+            conn.rollback()
+            return 0
+        finally:
+            conn.close()
+
+    def get_system_logs_page(self, limit=100, before=None, source=None, log_type=None):
+        """Get one page of persisted logs, newest first, using keyset pagination.
+        
+        ``before`` is the (logged_at, id) of the last entry of the previous
+        page; returns (logs, next_before) where next_before is None on the
+        last page.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return [], None
+        
+        try:
+            cursor = conn.cursor()
+            conditions = []
+            values = []
+            
+            if before:
+                conditions.append("(logged_at, id) < (%s, %s)")
+                values.extend(before)
+            if source:
+                conditions.append("source = %s")
+                values.append(source)
+            if log_type:
+                conditions.append("log_type = %s")
+                values.append(log_type)
+            
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            values.append(limit)
+            
+            cursor.execute(f"""
+                SELECT id, logged_at, log_type, source, message
+                FROM system_logs
+                {where}
+                ORDER BY logged_at DESC, id DESC
+                LIMIT %s
+            """, values)
+            
+            logs = []
+            for row in cursor.fetchall():
+                logs.append({
+                    'id': row[0],
+                    'timestamp': row[1].strftime('%Y-%m-%d %H:%M:%S'),
+                    'type': row[2],
+                    'source': row[3],
+                    'message': row[4]
+                })
+            
+            next_before = None
+            if len(logs) == limit:
+                last = logs[-1]
+                next_before = (last['timestamp'], last['id'])
+            return logs, next_before
+            
+        except Exception as e:
+            print(f"❌ Database: Error getting system logs: {e}")
+            return [], None
+        finally:
+            conn.close()
+
+    def create_scrape_jobs_table(self):
+        """Create the scrape_jobs queue table used by the scraper service"""
+        conn = self.get_connection()
+        if not conn:
+            print("❌ Database: Failed to get connection for scrape_jobs table")
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_jobs (
+                    id BIGSERIAL PRIMARY KEY,
+                    cnr_number VARCHAR(16) NOT NULL,
+                    user_id INTEGER,
+                    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 3,
+                    worker VARCHAR(100),
+                    result JSONB,
+                    error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    collected_at TIMESTAMP
+                )
+            """)
+            cursor.execute("ALTER TABLE scrape_jobs ADD COLUMN IF NOT EXISTS collected_at TIMESTAMP")
+            
+            # Workers only ever look for the oldest queued job
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_scrape_jobs_queued
+                ON scrape_jobs (id) WHERE status = 'queued'
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_scrape_jobs_running
+                ON scrape_jobs (started_at) WHERE status = 'running'
+            """)
+            
+            conn.commit()
+            print("✅ Database: scrape_jobs table ready")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Database: Error creating scrape_jobs table: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def enqueue_scrape_job(self, cnr_number, user_id=None, max_attempts=3):
+        """Queue a scrape for the scraper service; returns the job id or None"""
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO scrape_jobs (cnr_number, user_id, max_attempts)
+                VALUES (%s, %s, %s)
+                RETURNING id
+            """, (cnr_number, user_id, max_attempts))
+            job_id = cursor.fetchone()[0]
+            conn.commit()
+            return job_id
+            
+        except Exception as e:
+            print(f"❌ Database: Error queueing scrape job for {cnr_number}: {e}")
+            conn.rollback()
+            return None
+        finally:
+            conn.close()
+
+    def claim_scrape_job(self, worker):
+        """Claim the oldest queued job for ``worker``; returns the job dict or None.
+        
+        SKIP LOCKED lets any number of workers poll the queue concurrently
+        without blocking on, or double-claiming, each other's rows.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("""
+                UPDATE scrape_jobs
+                SET status = 'running', worker = %s, attempts = attempts + 1, started_at = CURRENT_TIMESTAMP
+                WHERE id = (
+                    SELECT id FROM scrape_jobs
+                    WHERE status = 'queued'
+                    ORDER BY id
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING id, cnr_number, user_id, attempts, max_attempts
+            """, (worker,))
+            job = cursor.fetchone()
+            conn.commit()
+            return dict(job) if job else None
+            
+        except Exception as e:
+            print(f"❌ Database: Error claiming scrape job: {e}")
+            conn.rollback()
+            return None
+        finally:
+            conn.close()
+
+    def complete_scrape_job(self, job_id, result):
+        """Store a finished job's scrape result"""
+        conn = self.get_connection()
+        if not conn:
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE scrape_jobs
+                SET status = 'completed', result = %s, error = NULL, finished_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            """, (Json(result), job_id))
+            conn.commit()
+            return cursor.rowcount == 1
+            
+        except Exception as e:
+            print(f"❌ Database: Error completing scrape job {job_id}: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def fail_scrape_job(self, job_id, error):
+        """Record a failed attempt; the job is queued again until it runs out of attempts"""
+        conn = self.get_connection()
+        if not conn:
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE scrape_jobs
+                SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                    error = %s,
+                    worker = NULL,
+                    finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE CURRENT_TIMESTAMP END
+                WHERE id = %s
+            """, (error, job_id))
+            conn.commit()
+            return cursor.rowcount == 1
+            
+        except Exception as e:
+            print(f"❌ Database: Error failing scrape job {job_id}: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def requeue_stale_scrape_jobs(self, stale_seconds):
+        """Release jobs whose worker died mid-scrape; returns how many were released"""
+        conn = self.get_connection()
+        if not conn:
+            return 0
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE scrape_jobs
+                SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                    error = 'Worker stopped responding',
+                    worker = NULL,
+                    finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE CURRENT_TIMESTAMP END
+                WHERE status = 'running' AND started_at < CURRENT_TIMESTAMP - make_interval(secs => %s)
+            """, (stale_seconds,))
+            conn.commit()
+            return cursor.rowcount
+            
+        except Exception as e:
+            print(f"❌ Database: Error requeueing stale scrape jobs: {e}")
+            conn.rollback()
+            return 0
+        finally:
+            conn.close()
+
+    def collect_scrape_job_result(self, job_id):
+        """Mark a completed job's result as handed to the API; True only for the first caller"""
+        conn = self.get_connection()
+        if not conn:
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE scrape_jobs
+                SET collected_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND status = 'completed' AND collected_at IS NULL
+            """, (job_id,))
+            conn.commit()
+            return cursor.rowcount == 1
+            
+        except Exception as e:
+            print(f"❌ Database: Error collecting scrape job {job_id}: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def get_scrape_job(self, job_id, user_id=None, is_admin=False):
+        """Get a scrape job's status (and result once completed) if user_id may see it.
+
+        A job is visible to its owner, to admins and, when it has no owner, to
+        anyone; otherwise it reads as not found.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("""
+                SELECT id, cnr_number, user_id, status, attempts, max_attempts, worker,
+                       result, error, created_at, started_at, finished_at, collected_at
+                FROM scrape_jobs
+                WHERE id = %s AND (user_id IS NULL OR user_id = %s OR %s)
+            """, (job_id, user_id, is_admin))
+            job = cursor.fetchone()
+            if not job:
+                return None
+            
+            job = dict(job)
+            for field in ('created_at', 'started_at', 'finished_at', 'collected_at'):
+                if job[field]:
+                    job[field] = job[field].strftime('%Y-%m-%d %H:%M:%S')
+            return job
+            
+        except Exception as e:
+            print(f"❌ Database: Error getting scrape job {job_id}: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def upgrade_schema(self):
+        """Apply the schema changes every case write depends on (change versions, clients, hearing summary).
+
+        Each step is idempotent, so this runs on every API and scraper service
+        start; an advisory lock keeps processes starting together from racing.
+        Returns False if a step failed or the database is unreachable.
+        """
+        conn = self.get_connection()
+        if not conn:
+            print("❌ Database: Failed to get connection for the schema upgrade")
+            return False
+        
+        try:
+            conn.autocommit = True
+            cursor = conn.cursor()
+            cursor.execute("SELECT pg_advisory_lock(%s)", (SCHEMA_UPGRADE_LOCK,))
+            try:
+                for step in (self.create_change_tracking, self.create_clients_tables, self.create_hearing_summary_columns):
+                    if not step():
+                        print(f"❌ Schema upgrade stopped at {step.__name__}")
+                        return False
+            finally:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (SCHEMA_UPGRADE_LOCK,))
+            print("✅ Database schema is up to date")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Error upgrading the database schema: {e}")
+            return False
+        finally:
+            conn.close()
+
+    def create_change_tracking(self):
+        """Add change versions to cases and case_history, plus the tombstone table, for the changes feed.
+
+        Every insert or update of a case or history row is stamped with the
+        writing transaction's id (CHANGE_VERSION; inserts through the column
+        default, updates in their SET clause), so "changed since version N" is
+        an index range scan. Readers hand out CHANGE_WATERMARK, not the highest
+        stamped version, so a write that commits late is never skipped.
+        Needs PostgreSQL 13 or newer.
+        """
+        conn = self.get_connection()
+        if not conn:
+            print("❌ Database: Failed to get connection for change tracking")
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            
+            # Versions used to come from change_version_seq, a numbering unrelated to
+            # transaction ids: those rows go back to 0 (older than any watermark)
+            cursor.execute("""
+                SELECT table_name FROM information_schema.columns
+                WHERE table_name IN ('cases', 'case_history', 'case_tombstones')
+                  AND column_name = 'change_version' AND column_default LIKE 'nextval%'
+            """)
+            sequence_tables = [row[0] for row in cursor.fetchall()]
+            for table in sequence_tables:
+                cursor.execute(f"ALTER TABLE {table} ALTER COLUMN change_version SET DEFAULT {CHANGE_VERSION}")
+                cursor.execute(f"UPDATE {table} SET change_version = 0")
+            if sequence_tables:
+                print(f"🔧 Change versions of {', '.join(sequence_tables)} moved to transaction ids")
+            cursor.execute("DROP SEQUENCE IF EXISTS change_version_seq")
+            
+            for table in ('cases', 'case_history'):
+                cursor.execute(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN IF NOT EXISTS change_version BIGINT NOT NULL DEFAULT {CHANGE_VERSION}
+                """)
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_change_version ON {table} (change_version)")
+            
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS case_tombstones (
+                    id SERIAL PRIMARY KEY,
+                    cnr_number VARCHAR(16) NOT NULL,
+                    user_id INTEGER,
+                    change_version BIGINT NOT NULL DEFAULT {CHANGE_VERSION},
+                    deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_case_tombstones_change_version ON case_tombstones (change_version)")
+            
+            conn.commit()
+            print("✅ Change tracking ready")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Error creating change tracking: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def get_change_version(self):
+        """Change watermark: every case or history write with a version at or below it has finished"""
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {CHANGE_WATERMARK}")
+            return cursor.fetchone()[0]
+            
+        except Exception as e:
+            print(f"❌ Database: Error getting change version: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def has_changes_since(self, version):
+        """Whether any case, history row or deletion has a version above ``version`` (None on error)"""
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT EXISTS (SELECT 1 FROM cases WHERE change_version > %(version)s)
+                    OR EXISTS (SELECT 1 FROM case_history WHERE change_version > %(version)s)
+                    OR EXISTS (SELECT 1 FROM case_tombstones WHERE change_version > %(version)s)
+            """, {'version': version})
+            return cursor.fetchone()[0]
+            
+        except Exception as e:
+            print(f"❌ Database: Error checking changes since {version}: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def get_changes_since(self, since, user_id, is_admin=False):
+        """Cases changed after version ``since`` that the user can see, and deleted CNRs.
+
+        A case is included (with its full history) when the case row or any of
+        its history rows changed. Returns {'version', 'changes', 'deleted',
+        'reset'} or None on error; clients apply 'deleted' before 'changes' and
+        pass 'version' as the next ``since``. A case can be sent twice, never
+        skipped. 'reset' means ``since`` is ahead of the database (a restore or
+        an old numbering) and the client has to reload everything.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            # The watermark comes from its own statement's snapshot: every write at or
+            # below it had finished by then, so the (later) reads below all see it
+            cursor.execute(f"SELECT {CHANGE_WATERMARK} AS version")
+            version = cursor.fetchone()['version']
+            if since > version:
+                return {'version': version, 'changes': [], 'deleted': [], 'reset': True}
+            
+            case_columns = ', '.join(f"c.{column.strip()}" for column in CASE_COLUMNS.split(','))
+            cursor.execute(f"""
+                WITH changed AS (
+                    SELECT cnr_number FROM cases
+                    WHERE change_version > %(since)s
+                    UNION
+                    SELECT cnr_number FROM case_history
+                    WHERE change_version > %(since)s
+                )
+                SELECT {case_columns},
+                       (SELECT COALESCE(json_agg({CASE_HISTORY_JSON} ORDER BY created_at DESC), '[]'::json)
+                        FROM case_history WHERE cnr_number = c.cnr_number) AS history
+                FROM cases c
+                JOIN changed USING (cnr_number)
+                WHERE %(is_admin)s OR c.user_id = %(user_id)s
+                ORDER BY c.created_at DESC
+            """, {'since': since, 'is_admin': is_admin, 'user_id': user_id})
+            changes = []
+            for row in cursor.fetchall():
+                case_data = dict(row)
+                history = case_data.pop('history')
+                changes.append({'case': case_data, 'history': history})
+            
+            cursor.execute("""
+                SELECT DISTINCT cnr_number FROM case_tombstones
+                WHERE change_version > %(since)s AND (%(is_admin)s OR user_id = %(user_id)s)
+            """, {'since': since, 'is_admin': is_admin, 'user_id': user_id})
+            deleted = [row['cnr_number'] for row in cursor.fetchall()]
+            
+            return {'version': version, 'changes': changes, 'deleted': deleted, 'reset': False}
+            
+        except Exception as e:
+            print(f"❌ Database: Error getting changes since {since}: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def create_clients_tables(self):
+        """Create the clients and case_clients tables, backfilling them from cases when first created.
+
+        clients holds one row per client name and owning user with its contact
+        details, latest court and a stored case count; case_clients links it to
+        the cases naming it. Case writes keep both current (sync_case_clients).
+        """
+        conn = self.get_connection()
+        if not conn:
+            print("❌ Database: Failed to get connection for clients tables")
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT to_regclass('clients') IS NULL")
+            backfill = cursor.fetchone()[0]
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS clients (
+                    id SERIAL PRIMARY KEY,
+                    user_id INTEGER REFERENCES users(id),
+                    name VARCHAR(255) NOT NULL,
+                    type VARCHAR(50) NOT NULL DEFAULT 'Individual',
+                    status VARCHAR(50) NOT NULL DEFAULT 'Active',
+                    email VARCHAR(255) NOT NULL DEFAULT '',
+                    phone VARCHAR(10) NOT NULL DEFAULT '',
+                    location VARCHAR(255),
+                    role VARCHAR(20) NOT NULL DEFAULT 'Primary Client',
+                    active_cases INTEGER NOT NULL DEFAULT 0,
+                    latest_cnr VARCHAR(16),
+                    latest_case_type VARCHAR(50),
+                    latest_case_at TIMESTAMP,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # Cases without an owner share user_id 0 in the uniqueness check
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_clients_owner_name ON clients ((COALESCE(user_id, 0)), name)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_clients_user_recent ON clients (user_id, latest_case_at DESC)")
+            # A btree cannot serve the substring search of get_clients_page; trigrams can
+            cursor.execute("DROP INDEX IF EXISTS idx_clients_name")
+            cursor.execute("SAVEPOINT client_search_index")
+            try:
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_clients_search ON clients
+                    USING gin (lower(name) gin_trgm_ops, lower(email) gin_trgm_ops, lower(location) gin_trgm_ops)
+                """)
+                cursor.execute("RELEASE SAVEPOINT client_search_index")
+            except Exception as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT client_search_index")
+                print(f"Warning: pg_trgm unavailable, client search will scan the user's clients: {e}")
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS case_clients (
+                    cnr_number VARCHAR(16) NOT NULL REFERENCES cases(cnr_number) ON DELETE CASCADE,
+                    client_id INTEGER NOT NULL REFERENCES clients(id) ON DELETE CASCADE,
+                    role VARCHAR(20) NOT NULL,
+                    PRIMARY KEY (cnr_number, client_id, role)
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_case_clients_client ON case_clients (client_id)")
+            
+            if backfill:
+                self.sync_case_clients(conn, None)
+                cursor.execute("SELECT COUNT(*) FROM clients")
+                print(f"✅ Clients backfilled from cases: {cursor.fetchone()[0]} clients")
+            
+            conn.commit()
+            print("✅ Clients tables ready")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Error creating clients tables: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def sync_case_clients(self, conn, cnr_numbers):
+        """Re-link the given cases (None: every case) to their clients and recount those clients.
+
+        Runs on the caller's connection, inside its transaction, so a case
+        write and its client bookkeeping commit or roll back together.
+        """
+        cursor = conn.cursor()
+        params = {'cnrs': None if cnr_numbers is None else list(cnr_numbers)}
+        
+        cursor.execute("""
+            DELETE FROM case_clients
+            WHERE %(cnrs)s::varchar[] IS NULL OR cnr_number = ANY(%(cnrs)s::varchar[])
+            RETURNING client_id
+        """, params)
+        client_ids = {row[0] for row in cursor.fetchall()}
+        
+        cursor.execute(f"""
+            INSERT INTO clients (user_id, name)
+            SELECT DISTINCT user_id, name FROM ({CASE_CLIENT_MENTIONS}) mentions
+            ON CONFLICT ((COALESCE(user_id, 0)), name) DO NOTHING
+        """, params)
+        cursor.execute(f"""
+            INSERT INTO case_clients (cnr_number, client_id, role)
+            SELECT m.cnr_number, cl.id, m.role
+            FROM ({CASE_CLIENT_MENTIONS}) m
+            JOIN clients cl ON COALESCE(cl.user_id, 0) = COALESCE(m.user_id, 0) AND cl.name = m.name
+            RETURNING client_id
+        """, params)
+        client_ids.update(row[0] for row in cursor.fetchall())
+        
+        self._refresh_clients(conn, None if cnr_numbers is None else client_ids)
+
+    def _case_client_ids(self, conn, cnr_numbers):
+        """Ids of the clients linked to the given cases"""
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT client_id FROM case_clients WHERE cnr_number = ANY(%s::varchar[])",
+                       (list(cnr_numbers),))
+        return {row[0] for row in cursor.fetchall()}
+
+    def _refresh_clients(self, conn, client_ids):
+        """Recompute the stored fields of the given clients (None: all) and drop clients left without cases"""
+        if client_ids is not None and not client_ids:
+            return
+        cursor = conn.cursor()
+        params = {'ids': None if client_ids is None else sorted(client_ids)}
+        
+        # Lock first, so the recount below (a new snapshot) sees links committed by concurrent writers
+        cursor.execute("""
+            SELECT id FROM clients
+            WHERE %(ids)s::int[] IS NULL OR id = ANY(%(ids)s::int[])
+            ORDER BY id
+            FOR UPDATE
+        """, params)
+        cursor.execute("""
+            UPDATE clients cl
+            SET active_cases = s.active_cases, email = s.email, phone = s.phone, location = s.location,
+                role = s.role, latest_cnr = s.latest_cnr, latest_case_type = s.latest_case_type,
+                latest_case_at = s.latest_case_at, updated_at = CURRENT_TIMESTAMP
+            FROM (
+                SELECT cc.client_id,
+                       COUNT(DISTINCT c.cnr_number) AS active_cases,
+                       -- Contact details come from cases naming the client as client_name
+                       COALESCE((array_agg(c.client_email ORDER BY c.created_at DESC NULLS LAST)
+                                 FILTER (WHERE cc.role = 'client' AND c.client_email <> ''))[1], '') AS email,
+                       COALESCE((array_agg(c.client_phone ORDER BY c.created_at DESC NULLS LAST)
+                                 FILTER (WHERE cc.role = 'client' AND c.client_phone <> ''))[1], '') AS phone,
+                       (array_agg(c.court_name ORDER BY c.created_at DESC NULLS LAST))[1] AS location,
+                       CASE WHEN bool_or(cc.role = 'client') THEN 'Primary Client' ELSE 'Petitioner' END AS role,
+                       (array_agg(c.cnr_number ORDER BY c.created_at DESC NULLS LAST))[1] AS latest_cnr,
+                       (array_agg(c.case_type ORDER BY c.created_at DESC NULLS LAST))[1] AS latest_case_type,
+                       MAX(c.created_at) AS latest_case_at
+                FROM case_clients cc
+                JOIN cases c USING (cnr_number)
+                WHERE %(ids)s::int[] IS NULL OR cc.client_id = ANY(%(ids)s::int[])
+                GROUP BY cc.client_id
+            ) s
+            WHERE cl.id = s.client_id
+        """, params)
+        cursor.execute("""
+            DELETE FROM clients cl
+            WHERE (%(ids)s::int[] IS NULL OR cl.id = ANY(%(ids)s::int[]))
+              AND NOT EXISTS (SELECT 1 FROM case_clients cc WHERE cc.client_id = cl.id)
+        """, params)
+
+    def create_hearing_summary_columns(self):
+        """Add next_hearing_date, last_hearing_date and history_count to cases, backfilling them when first added.
+
+        They summarise a case's history so upcoming-hearing views read cases
+        alone; history writes keep them current (refresh_hearing_summary).
+        """
+        conn = self.get_connection()
+        if not conn:
+            print("❌ Database: Failed to get connection for hearing summary columns")
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(*) FROM information_schema.columns
+                WHERE table_name = 'cases' AND column_name = 'history_count'
+            """)
+            backfill = cursor.fetchone()[0] == 0
+            
+            cursor.execute("""
+                ALTER TABLE cases
+                ADD COLUMN IF NOT EXISTS next_hearing_date DATE,
+                ADD COLUMN IF NOT EXISTS last_hearing_date DATE,
+                ADD COLUMN IF NOT EXISTS history_count INTEGER NOT NULL DEFAULT 0
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_cases_next_hearing ON cases (next_hearing_date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_cases_user_next_hearing ON cases (user_id, next_hearing_date)")
+            
+            if backfill:
+                self.refresh_hearing_summary(conn, None)
+                cursor.execute("SELECT COUNT(*) FROM cases WHERE next_hearing_date IS NOT NULL")
+                print(f"✅ Hearing summary backfilled: {cursor.fetchone()[0]} cases with a hearing date")
+            
+            conn.commit()
+            print("✅ Hearing summary columns ready")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Error creating hearing summary columns: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def refresh_hearing_summary(self, conn, cnr_numbers):
+        """Recompute the hearing summary of the given cases (None: every case) from case_history.
+
+        next_hearing_date is the earliest hearing date from today on,
+        last_hearing_date the latest hearing date before today and
+        history_count the number of history rows. Runs on the caller's
+        connection, inside its transaction; cases whose summary changes get a
+        new change version so the changes feed resends them.
+        """
+        cursor = conn.cursor()
+        params = {'cnrs': None if cnr_numbers is None else list(cnr_numbers)}
+        cursor.execute(f"""
+            UPDATE cases c
+            SET next_hearing_date = s.next_hearing_date, last_hearing_date = s.last_hearing_date,
+                history_count = s.history_count, change_version = {CHANGE_VERSION}
+            FROM (
+                SELECT c.cnr_number,
+                       MIN(h.hearing_date) FILTER (WHERE h.hearing_date >= CURRENT_DATE) AS next_hearing_date,
+                       MAX(h.hearing_date) FILTER (WHERE h.hearing_date < CURRENT_DATE) AS last_hearing_date,
+                       COUNT(h.id) AS history_count
+                FROM cases c
+                LEFT JOIN case_history h ON h.cnr_number = c.cnr_number
+                WHERE %(cnrs)s::varchar[] IS NULL OR c.cnr_number = ANY(%(cnrs)s::varchar[])
+                GROUP BY c.cnr_number
+            ) s
+            WHERE c.cnr_number = s.cnr_number
+              AND (c.next_hearing_date, c.last_hearing_date, c.history_count)
+                  IS DISTINCT FROM (s.next_hearing_date, s.last_hearing_date, s.history_count)
+        """, params)
+
+    def refresh_lapsed_hearing_summaries(self, conn):
+        """Roll forward the summary of cases whose next hearing date has passed.
+
+        The summary depends on today's date, so a next_hearing_date in the past
+        is stale: it has become the last hearing and the following one (if any)
+        is now next. Readers of the summary call this first, on their own
+        connection, and commit.
+        """
+        cursor = conn.cursor()
+        cursor.execute("SELECT cnr_number FROM cases WHERE next_hearing_date < CURRENT_DATE")
+        lapsed = [row[0] for row in cursor.fetchall()]
+        if lapsed:
+            self.refresh_hearing_summary(conn, lapsed)
+
+    def get_upcoming_hearings(self, user_id, is_admin=False, days=7):
+        """Cases listed for a hearing between today and ``days`` from now, soonest first"""
+        conn = self.get_connection()
+        if not conn:
+            return []
+        
+        try:
+            self.refresh_lapsed_hearing_summaries(conn)
+            conn.commit()
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(f"""
+                SELECT {CASE_COLUMNS}
+                FROM cases
+                WHERE next_hearing_date BETWEEN CURRENT_DATE AND CURRENT_DATE + %(days)s
+                  AND (%(is_admin)s OR user_id = %(user_id)s)
+                ORDER BY next_hearing_date, cnr_number
+            """, {'days': days, 'is_admin': is_admin, 'user_id': user_id})
+            return [dict(row) for row in cursor.fetchall()]
+            
+        except Exception as e:
+            print(f"❌ Database: Error getting upcoming hearings: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def _client_dict(self, row):
+        """A clients row in the shape /api/clients and the dashboard return"""
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'type': row['type'],
+            'email': row['email'],
+            'phone': row['phone'],
+            'location': row['location'],
+            'status': row['status'],
+            'activeCases': row['active_cases'],
+            'totalBilled': 'N/A',
+            'role': row['role'],
+            'cnr': row['cnr_number'],
+            'caseType': row['case_type']
+        }
+
+    def get_clients(self, user_id, is_admin=False):
+        """Clients of the user's cases (all clients for admins), most recently active first; [] on error"""
+        conn = self.get_connection()
+        if not conn:
+            return []
+        
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(f"""
+                {CLIENTS_SQL}
+                ORDER BY {CLIENT_SORTS['recent']}
+            """, {'is_admin': is_admin, 'user_id': user_id})
+            
+            return [self._client_dict(row) for row in cursor.fetchall()]
+            
+        except Exception as e:
+            print(f"❌ Database: Error getting clients for user {user_id}: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def get_clients_page(self, user_id, is_admin=False, search='', sort='recent', limit=20, offset=0,
+                         client_type='', status=''):
+        """One page of the user's clients, searched (name, email, location, phone) and sorted in the database.
+
+        Each client also carries its cases (cnr_number, case_title, case_type,
+        court_name). Returns {'clients': [...], 'total': n} or None on error.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            pattern = search.strip().lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            order = CLIENT_SORTS.get(sort, CLIENT_SORTS['recent'])
+            cursor.execute(f"""
+                WITH matches AS (
+                    SELECT * FROM ({CLIENTS_SQL}) visible
+                    WHERE (%(search)s = ''
+                           OR lower(name) LIKE '%%' || %(search)s || '%%'
+                           OR lower(email) LIKE '%%' || %(search)s || '%%'
+                           OR lower(location) LIKE '%%' || %(search)s || '%%'
+                           OR phone LIKE %(search)s || '%%')
+                      AND (%(type)s = '' OR type = %(type)s)
+                      AND (%(status)s = '' OR status = %(status)s)
+                ), page AS (
+                    SELECT * FROM matches
+                    ORDER BY {order}
+                    LIMIT %(limit)s OFFSET %(offset)s
+                )
+                SELECT (SELECT COUNT(*) FROM matches) AS total,
+                       page.*,
+                       (SELECT COALESCE(json_agg(json_build_object(
+                                   'cnr_number', c.cnr_number, 'case_title', c.case_title,
+                                   'case_type', c.case_type, 'court_name', c.court_name
+                               ) ORDER BY c.created_at DESC), '[]'::json)
+                        FROM cases c
+                        WHERE c.cnr_number IN (SELECT cnr_number FROM case_clients WHERE client_id = page.id)) AS cases
+                FROM (SELECT 1) AS one
+                LEFT JOIN page ON true
+                ORDER BY {order}
+            """, {'is_admin': is_admin, 'user_id': user_id, 'search': pattern, 'type': client_type,
+                  'status': status, 'limit': limit, 'offset': offset})
+            
+            # Always one row, so the total survives an empty page
+            rows = cursor.fetchall()
+            total = rows[0]['total']
+            clients = []
+            for row in rows:
+                if row['id'] is None:
+                    continue
+                client = self._client_dict(row)
+                client['cases'] = row['cases']
+                clients.append(client)
+            
+            return {'clients': clients, 'total': total}
+            
+        except Exception as e:
+            print(f"❌ Database: Error getting clients page for user {user_id}: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def get_client(self, client_id, user_id, is_admin=False):
+        """One client with its cases if the user may see it, else None"""
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(f"""
+                SELECT visible.*, cl.created_at AS added_at,
+                       (SELECT COALESCE(json_agg(json_build_object(
+                                   'cnr_number', c.cnr_number, 'case_title', c.case_title,
+                                   'case_type', c.case_type, 'court_name', c.court_name,
+                                   'status', c.status, 'filing_date', to_char(c.filing_date, 'YYYY-MM-DD')
+                               ) ORDER BY c.created_at DESC), '[]'::json)
+                        FROM cases c
+                        WHERE c.cnr_number IN (SELECT cnr_number FROM case_clients WHERE client_id = visible.id)) AS cases
+                FROM ({CLIENTS_SQL}) visible
+                JOIN clients cl USING (id)
+                WHERE visible.id = %(client_id)s
+            """, {'is_admin': is_admin, 'user_id': user_id, 'client_id': client_id})
+            
+            row = cursor.fetchone()
+            if not row:
+                return None
+            client = self._client_dict(row)
+            client['cases'] = row['cases']
+            client['addedAt'] = row['added_at'].strftime('%Y-%m-%d') if row['added_at'] else None
+            return client
+            
+        except Exception as e:
+            print(f"❌ Database: Error getting client {client_id}: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def get_dashboard_json(self, user_id, is_admin=False):
+        """The dashboard_data object of /api/user/dashboard-data, built by Postgres in one statement.
+
+        Same content as the Python path (cases, case_histories, clients,
+        calendar_events, summary), returned as UTF-8 JSON bytes so the API can
+        send it on without decoding it into Python objects. None on error.
+        """
+        conn = self.get_connection()
+        if not conn:
+            return None
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                WITH user_cases AS (
+                    SELECT *, row_number() OVER (ORDER BY created_at DESC) AS position
+                    FROM cases
+                    WHERE %(is_admin)s OR user_id = %(user_id)s
+                ),
+                histories AS (
+                    SELECT uc.position, uc.cnr_number,
+                           json_build_object(
+                               'case_title', uc.case_title,
+                               'case_type', uc.case_type,
+                               'history', h.history
+                           ) AS entry
+                    FROM user_cases uc
+                    -- Aggregated on case_history alone: its columns share names with cases
+                    JOIN (
+                        SELECT cnr_number, json_agg({CASE_HISTORY_JSON} ORDER BY created_at DESC) AS history
+                        FROM case_history
+                        WHERE cnr_number IN (SELECT cnr_number FROM user_cases)
+                        GROUP BY cnr_number
+                    ) h USING (cnr_number)
+                ),
+                events AS (
+                    SELECT uc.position, h.created_at,
+                           json_build_object(
+                               'date', COALESCE(to_char(h.hearing_date, 'YYYY-MM-DD'), 'N/A'),
+                               'title', COALESCE(uc.case_title, 'Unknown Case') || ' - ' || COALESCE(h.purpose, 'N/A'),
+                               'description', 'No details available',
+                               'caseTitle', COALESCE(uc.case_title, 'Unknown Case'),
+                               'cnrNumber', uc.cnr_number,
+                               'type', 'hearing',
+                               'time', '09:00 AM'
+                           ) AS event
+                    FROM user_cases uc
+                    JOIN case_history h USING (cnr_number)
+                ),
+                clients AS ({CLIENTS_SQL})
+                SELECT convert_to(json_build_object(
+                    'cases', COALESCE((SELECT json_agg({CASE_JSON} ORDER BY position) FROM user_cases), '[]'::json),
+                    'case_histories', COALESCE((SELECT json_object_agg(cnr_number, entry ORDER BY position) FROM histories), '{{}}'::json),
+                    'clients', COALESCE((
+                        SELECT json_agg(json_build_object(
+                            'id', id, 'name', name, 'type', type, 'email', email, 'phone', phone,
+                            'location', location, 'status', status, 'activeCases', active_cases,
+                            'totalBilled', 'N/A', 'role', role, 'cnr', cnr_number, 'caseType', case_type
+                        ) ORDER BY latest_case_at DESC NULLS LAST, name)
+                        FROM clients
+                    ), '[]'::json),
+                    'calendar_events', COALESCE((SELECT json_agg(event ORDER BY position, created_at DESC) FROM events), '[]'::json),
+                    'summary', json_build_object(
+                        'total_cases', (SELECT COUNT(*) FROM user_cases),
+                        'total_clients', (SELECT COUNT(*) FROM clients),
+                        'total_events', (SELECT COUNT(*) FROM events),
+                        'active_cases', (SELECT COUNT(*) FROM user_cases WHERE status = 'Active')
+                    )
+                )::text, 'UTF8')
+            """, {'is_admin': is_admin, 'user_id': user_id})
+            
+            return bytes(cursor.fetchone()[0])
+            
+        except Exception as e:
+            print(f"❌ Database: Error building dashboard JSON for user {user_id}: {e}")
+            return None
+        finally:
+            conn.close()
+
 # Initialize database
 if __name__ == "__main__":
     db_manager = DatabaseManager()
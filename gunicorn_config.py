@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Gunicorn configuration for the Legal API (production entry point)
+Run with: gunicorn -c gunicorn_config.py wsgi:app
+
+The app is imported once in the master (preload_app) and workers are forked
+from it, so Flask, psycopg2 and the rest are shared copy-on-write. Every
+setting can be overridden from the environment.
+"""
+
+import os
+import multiprocessing
+
+# Server socket
+bind = f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', '5002')}"
+backlog = int(os.getenv('API_BACKLOG', '2048'))
+
+# Worker processes: preforked, each serving requests on a thread pool
+workers = int(os.getenv('API_WORKERS', str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = 'gthread'
+threads = int(os.getenv('API_THREADS', '8'))  # Each SSE subscriber holds one thread
+preload_app = os.getenv('API_PRELOAD_APP', 'true').lower() == 'true'
+
+# Workers must share scrape results, logs and the auth cache (see state_backend.py)
+if workers > 1:
+    os.environ.setdefault('STATE_BACKEND', 'sqlite')
+
+# A scrape can take several minutes across retries; don't let the master kill it
+timeout = int(os.getenv('API_WORKER_TIMEOUT', '300'))
+graceful_timeout = int(os.getenv('API_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('API_KEEPALIVE', '5'))
+
+# Recycle workers periodically to bound memory growth (0 disables)
+max_requests = int(os.getenv('API_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.getenv('API_MAX_REQUESTS_JITTER', '50'))
+
+# Process management
+pidfile = os.getenv('API_PIDFILE', '/tmp/legal-api.pid')
+proc_name = 'legal-api'
+
+# Logging
+accesslog = os.getenv('API_ACCESS_LOG', '-')
+errorlog = os.getenv('API_ERROR_LOG', '-')
+loglevel = os.getenv('API_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    # Once per master, before any worker is forked: the case write paths need the current schema
+    from database_setup import DatabaseManager
+    if not DatabaseManager().upgrade_schema():
+        server.log.warning("⚠️ Database schema upgrade failed; case writes may fail until it succeeds")
+    server.log.info(f"🚀 Legal API ready on {bind} with {workers} workers x {threads} threads")
+
+
+def post_worker_init(worker):
+    # Runs in the worker after fork, so background threads start per worker
+    from legal_api import legal_api
+    from public_address import public_address
+    legal_api.add_log(f"API worker {worker.pid} started", 'info', 'system')
+    public_address.get()  # Starts this worker's background lookup if the address is unknown or stale
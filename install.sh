@@ -250,6 +250,17 @@ install_python_deps() {
     log_success "Python dependencies installed"
 }
 
+# Snapshot the CAPTCHA model locally so workers load it offline
+fetch_ocr_model() {
+    log_header "Fetching CAPTCHA OCR model..."
+    
+    if python3 model_artifacts.py fetch; then
+        log_success "CAPTCHA model stored and verified"
+    else
+        log_warning "Could not fetch the CAPTCHA model; scrapers will download it on first use"
+    fi
+}
+
 # Setup database
 setup_database() {
     log_header "Setting up database..."
@@ -398,7 +409,10 @@ Type=simple
 User=$CURRENT_USER
 WorkingDirectory=$PROJECT_DIR
 Environment=PATH=$CURRENT_HOME/.local/bin:/usr/local/bin:/usr/bin:/bin
-ExecStart=/usr/bin/python3 $PROJECT_DIR/legal_api.py
+Environment=SCRAPER_MODE=service
+ExecStart=$CURRENT_HOME/.local/bin/gunicorn -c $PROJECT_DIR/gunicorn_config.py wsgi:app
+KillSignal=SIGTERM
+TimeoutStopSec=60
 Restart=always
 RestartSec=10
 
@@ -406,9 +420,35 @@ RestartSec=10
 WantedBy=multi-user.target
 EOF
     
-    # Reload systemd and enable service
+    log_step "Creating legal-scraper service..."
+    
+    # Scrapes run here, not in the API workers; KillMode=mixed lets the
+    # supervisor wait for in-flight scrapes before the workers are stopped
+    sudo tee /etc/systemd/system/legal-scraper.service > /dev/null <<EOF
+[Unit]
+Description=Legal Case Management Scraper Service
+After=network.target postgresql-15.service
+
+[Service]
+Type=simple
+User=$CURRENT_USER
+WorkingDirectory=$PROJECT_DIR
+Environment=PATH=$CURRENT_HOME/.local/bin:/usr/local/bin:/usr/bin:/bin
+ExecStart=/usr/bin/python3 $PROJECT_DIR/scraper_service.py
+KillSignal=SIGTERM
+KillMode=mixed
+TimeoutStopSec=150
+Restart=always
+RestartSec=10
+
+[Install]
+WantedBy=multi-user.target
+EOF
+    
+    # Reload systemd and enable services
     sudo systemctl daemon-reload
     sudo systemctl enable legal-api.service
+    sudo systemctl enable legal-scraper.service
     
     log_success "Systemd service created and enabled"
 }
@@ -423,6 +463,9 @@ start_services() {
     log_step "Starting Legal API service..."
     sudo systemctl start legal-api.service
     
+    log_step "Starting scraper service..."
+    sudo systemctl start legal-scraper.service
+    
     # Wait for services to start
     sleep 5
     
@@ -438,6 +481,12 @@ start_services() {
     else
         log_warning "Legal API service may need manual start"
     fi
+    
+    if sudo systemctl is-active --quiet legal-scraper.service; then
+        log_success "Scraper service is running"
+    else
+        log_warning "Scraper service may need manual start"
+    fi
 }
 
 # Display final information
@@ -492,6 +541,7 @@ main() {
     install_postgresql
     install_chrome
     install_python_deps
+    fetch_ocr_model
     setup_database
     configure_firewall
     create_service
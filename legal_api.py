@@ -4,7 +4,7 @@ API for Legal Management Software
 Handles CNR input from users and database operations
 """
 
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, request, jsonify, make_response, Response, stream_with_context
 from flask_cors import CORS
 import json
 import os
@@ -23,12 +23,27 @@ import base64
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from database_setup import DatabaseManager
-from scrapper import scrape_case_details
+from log_shipping import log_shipper
+from log_store import LogStore
+from state_backend import create_state_backend
+from scrape_store import ScrapeResultStore
+from cause_list import CauseListStore, export_cause_list
+from log_persistence import create_log_writer
+from public_address import public_address
 
 app = Flask(__name__)
 #CORS(app)
 # Configuration constants
 API_REQUEST_TIMEOUT = int(os.getenv('API_REQUEST_TIMEOUT', '5'))
+API_THREADS = int(os.getenv('API_THREADS', '8'))                 # Request threads per gunicorn worker (gunicorn_config.py)
+# Each subscriber holds a request thread: half of them by default, never all of them
+SSE_MAX_SUBSCRIBERS = min(int(os.getenv('SSE_MAX_SUBSCRIBERS', str(max(API_THREADS // 2, 1)))), max(API_THREADS - 1, 1))
+SSE_STREAM_TOKEN_TTL = int(os.getenv('SSE_STREAM_TOKEN_TTL', '60'))
+SSE_HEARTBEAT_SECONDS = int(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+SSE_RETRY_MS = int(os.getenv('SSE_RETRY_MS', '3000'))
+SCRAPER_MODE = os.getenv('SCRAPER_MODE', 'inprocess').lower()    # 'service' hands scrapes to scraper_service.py
+SCRAPE_JOB_MAX_ATTEMPTS = int(os.getenv('SCRAPE_JOB_MAX_ATTEMPTS', '3'))
+DASHBOARD_ENGINE = os.getenv('DASHBOARD_ENGINE', 'python').lower()  # 'sql' has Postgres build the dashboard JSON
 
 # Dynamic CORS configuration
 def get_cors_origins():
@@ -55,16 +70,10 @@ def get_cors_origins():
         "http://18.234.219.146:5002"
     ])
     
-    # Try to get public IP
-    try:
-        import requests
-        response = requests.get('https://api.ipify.org', timeout=API_REQUEST_TIMEOUT)
-        if response.status_code == 200:
-            public_ip = response.text.strip()
-            origins.append(f"http://{public_ip}:8000")
-            origins.append(f"http://{public_ip}:5002")
-    except Exception as e:
-        print(f"Warning: Could not detect public IP for CORS: {e}")
+    # The public IP's origins are checked per request (add_public_ip_cors_headers), since
+    # the address may only be discovered after startup
+    if not public_address.override and not public_address.discovery:
+        print("Warning: PUBLIC_IP is not set and discovery is off; the public IP is not a CORS origin")
     
     # Add any additional origins from environment
     additional_origins = os.getenv('ADDITIONAL_CORS_ORIGINS', '')
@@ -74,48 +83,82 @@ def get_cors_origins():
     print(f"CORS Origins configured: {origins}")
     return origins
 
+CORS_ALLOW_HEADERS = ["Content-Type", "Authorization"]
+CORS_METHODS = ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
+PUBLIC_IP_CORS_PORTS = ('8000', '5002')
+
 CORS(app,
      origins=get_cors_origins(),
-     allow_headers=["Content-Type", "Authorization"],
-     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+     allow_headers=CORS_ALLOW_HEADERS,
+     methods=CORS_METHODS,
      supports_credentials=True)  # This is crucial!
 
-# Global temporary storage for scraped data
-temp_scraped_data = {}
+@app.after_request
+def add_public_ip_cors_headers(response):
+    """CORS headers for the public IP's origins, looked up per request (flask-cors fixes its list at import)"""
+    origin = request.headers.get('Origin')
+    if not origin or os.getenv('CORS_ORIGINS') or 'Access-Control-Allow-Origin' in response.headers:
+        return response
+    public_ip = public_address.get()
+    if not public_ip or origin not in [f"http://{public_ip}:{port}" for port in PUBLIC_IP_CORS_PORTS]:
+        return response
+    
+    # Runs before flask-cors' own hook, which leaves a response with these headers alone
+    response.headers['Access-Control-Allow-Origin'] = origin
+    response.headers['Access-Control-Allow-Credentials'] = 'true'
+    response.headers.add('Vary', 'Origin')
+    if request.method == 'OPTIONS':
+        response.headers['Access-Control-Allow-Methods'] = ', '.join(CORS_METHODS)
+        response.headers['Access-Control-Allow-Headers'] = ', '.join(CORS_ALLOW_HEADERS)
+    return response
 
-# Global log storage (in-memory for real-time access)
-system_logs = []
-log_lock = threading.Lock()
+# Shared state (process-local by default; STATE_BACKEND=sqlite shares it between workers)
+state = create_state_backend()
+
+# Scraped data awaiting save (temporary storage, bounded by TTL and size)
+scrape_results = ScrapeResultStore(state)
+
+# Global log storage (ring buffer for real-time access)
+system_logs = LogStore(state)
+
+# Bound on concurrent /api/events/stream subscribers (each holds a thread)
+sse_slots = threading.BoundedSemaphore(SSE_MAX_SUBSCRIBERS)
 
 class LegalAPI:
     def __init__(self):
         self.db = DatabaseManager()
+        self.log_writer = create_log_writer(self.db)
+        self.scrape_jobs_ready = False
     
-    def add_log(self, message, log_type='info', source='system'):
-        """Add a log entry to the system"""
-        with log_lock:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            log_entry = {
-                'timestamp': timestamp,
-                'message': message,
-                'type': log_type,
-                'source': source
-            }
-            system_logs.append(log_entry)
-            
-            # Keep only last 1000 logs to prevent memory issues
-            if len(system_logs) > 1000:
-                system_logs.pop(0)
+    def add_log(self, message, log_type='info', source='system', timestamp=None, data=None):
+        """Add a log entry to the system (timestamp: when it was logged at its source, if not now)"""
+        entry = system_logs.append(message, log_type, source, data=data, timestamp=timestamp)
+        if self.log_writer:
+            # Persisted in background batches; never waits on the database
+            self.log_writer.enqueue(entry)
+        return entry
     
-    def get_logs(self, limit=100):
+    def get_logs(self, limit=100, source=None, log_type=None):
         """Get recent logs"""
-        with log_lock:
-            return system_logs[-limit:] if system_logs else []
+        return system_logs.get(limit, source=source, log_type=log_type)
+    
+    def get_logs_since(self, since, limit=100, source=None, log_type=None):
+        """Get logs newer than the given sequence id, plus the cursor for the next poll"""
+        return system_logs.get_since(since, limit, source=source, log_type=log_type)
+    
+    def get_persisted_logs(self, limit=100, before=None, source=None, log_type=None):
+        """Page through persisted log history, newest first"""
+        return self.db.get_system_logs_page(limit, before=before, source=source, log_type=log_type)
     
     def clear_logs(self):
         """Clear all logs"""
-        with log_lock:
-            system_logs.clear()
+        system_logs.clear()
+    
+    def publish_job_event(self, cnr_number, stage, message, **details):
+        """Publish a scrape job progress event to the log stream"""
+        data = {'cnr_number': cnr_number, 'stage': stage}
+        data.update(details)
+        return system_logs.append(message, 'progress', 'job', data=data)
     
     def convert_date_format(self, date_string):
         """Convert date from DD-MM-YYYY to YYYY-MM-DD format"""
@@ -134,8 +177,8 @@ class LegalAPI:
         
         return date_string
 
-    def add_case_with_cnr(self, cnr_number, case_data):
-        """Add a case to the database with CNR number"""
+    def add_case_with_cnr(self, cnr_number, case_data, is_admin=False):
+        """Add a case to the database with CNR number (another user's case only for admins)"""
         try:
             self.add_log(f"Adding case to database: {cnr_number}", 'info', 'database')
             
@@ -155,72 +198,75 @@ class LegalAPI:
             registration_number = case_data.get('registration_number')
             user_id = case_data.get('user_id')  # Get user_id from case_data
             
-            # Insert case into database
-            success = self.db.insert_case(
-                cnr_number,
-                case_title=case_title,
-                client_name=client_name,
-                client_phone=client_phone,
-                client_email=client_email,
-                petitioner=petitioner,
-                respondent=respondent,
-                case_type=case_type,
-                court_name=court_name,
-                judge_name=judge_name,
-                status=status,
-                filing_date=filing_date,
-                case_description=case_description,
-                registration_number=registration_number,
-                user_id=user_id  # Pass user_id to database
-            )
+            history_rows = [{
+                'judge': row.get("Judge", ""),
+                'business_date': self.convert_date_format(row.get("Business_on_Date", "")),
+                'hearing_date': self.convert_date_format(row.get("Hearing_Date", "")),
+                'purpose': row.get("Purpose_of_Hearing", ""),
+                'status': row.get("Status", "")
+            } for row in case_data.get('case_history', [])]
             
-            if not success:
+            # Case upsert and all history rows in one transaction; returns what was stored
+            status, saved = self.db.save_case_with_history({
+                'cnr_number': cnr_number,
+                'case_title': case_title,
+                'client_name': client_name,
+                'client_phone': client_phone,
+                'client_email': client_email,
+                'petitioner': petitioner,
+                'respondent': respondent,
+                'case_type': case_type,
+                'court_name': court_name,
+                'judge_name': judge_name,
+                'status': status,
+                'filing_date': filing_date,
+                'case_description': case_description,
+                'registration_number': registration_number,
+                'user_id': user_id
+            }, history_rows, is_admin)
+            
+            if status == 'forbidden':
+                self.add_log(f"Refused to save case {cnr_number}: it belongs to another user", 'warning', 'database')
+                return {'success': False, 'forbidden': True, 'error': 'Access denied'}
+            if status != 'ok':
                 self.add_log(f"Failed to insert case: {cnr_number}", 'error', 'database')
                 return {'success': False, 'error': 'Failed to insert case into database'}
             
-            # Insert case history if available
-            case_history = case_data.get('case_history', [])
-            history_success_count = 0
-            
-            for row in case_history:
-                success = self.db.insert_case_history(
-                    cnr_number,
-                    row.get("Judge", ""),
-                    self.convert_date_format(row.get("Business_on_Date", "")),
-                    self.convert_date_format(row.get("Hearing_Date", "")),
-                    row.get("Purpose_of_Hearing", ""),
-                    row.get("Status", ""),  # Add status parameter (optional)
-                    user_id=user_id  # Pass user_id for case history
-                )
-                if success:
-                    history_success_count += 1
-            
-            self.add_log(f"Case added successfully: {cnr_number} with {history_success_count} history records", 'success', 'database')
+            history_count = saved['history_inserted']
+            self.add_log(f"Case added successfully: {cnr_number} with {history_count} history records", 'success', 'database')
                 
             return {
                 'success': True,
-                'message': f'Case added successfully with {history_success_count} history records',
-                'case_history_count': history_success_count
+                'message': f'Case added successfully with {history_count} history records',
+                'case_history_count': history_count,
+                'case': saved['case'],
+                'history': saved['history']
             }
         except Exception as e:
             self.add_log(f"Database error: {str(e)}", 'error', 'database')
             return {'success': False, 'error': str(e)}
     
-    def trigger_scraping(self, cnr_number):
+    def trigger_scraping(self, cnr_number, user_id=None):
         """Step 1: Trigger scraping and store in temporary storage with retry logic"""
+        if SCRAPER_MODE == 'service':
+            return self.queue_scraping(cnr_number, user_id)
+        
         MAX_RETRIES = 3
         
         for attempt in range(1, MAX_RETRIES + 1):
             try:
                 self.add_log(f"Starting scraping attempt {attempt} of {MAX_RETRIES} for CNR: {cnr_number}", 'info', 'scraper')
+                self.publish_job_event(cnr_number, 'started', f"Scrape attempt {attempt} started", attempt=attempt, max_attempts=MAX_RETRIES)
                 
-                # Scrape the data
+                # Scrape the data (Selenium and the OCR stack load on the first scrape)
+                from scrapper import scrape_case_details
                 result = scrape_case_details(cnr_number)
                 
                 if result and result.get('success'):
                     # Step 2: Store in temporary storage
-                    temp_scraped_data[cnr_number] = result
+                    scrape_results.put(cnr_number, result, user_id)
                     self.add_log(f"Scraping completed successfully on attempt {attempt} for CNR: {cnr_number}", 'success', 'scraper')
+                    self.publish_job_event(cnr_number, 'completed', f"Scrape completed on attempt {attempt}", attempt=attempt, max_attempts=MAX_RETRIES)
                     
                     return {
                         'success': True,
@@ -231,6 +277,7 @@ class LegalAPI:
                 else:
                     error_msg = result.get('error', 'Unknown scraping error') if result else 'No result from scraper'
                     self.add_log(f"Scraping failed on attempt {attempt} for CNR {cnr_number}: {error_msg}", 'error', 'scraper')
+                    self.publish_job_event(cnr_number, 'retrying' if attempt < MAX_RETRIES else 'failed', error_msg, attempt=attempt, max_attempts=MAX_RETRIES)
                     
                     if attempt < MAX_RETRIES:
                         self.add_log(f"Retrying in 5 seconds... (attempt {attempt + 1} of {MAX_RETRIES})", 'info', 'scraper')
@@ -243,6 +290,7 @@ class LegalAPI:
                         
             except Exception as e:
                 self.add_log(f"Error on attempt {attempt}: {str(e)}", 'error', 'scraper')
+                self.publish_job_event(cnr_number, 'retrying' if attempt < MAX_RETRIES else 'failed', str(e), attempt=attempt, max_attempts=MAX_RETRIES)
                 
                 if attempt < MAX_RETRIES:
                     self.add_log(f"Retrying in 5 seconds... (attempt {attempt + 1} of {MAX_RETRIES})", 'info', 'scraper')
@@ -252,13 +300,63 @@ class LegalAPI:
         
         return {'success': False, 'error': 'All retry attempts failed'}
     
-    def save_to_database(self, cnr_number, user_data):
+    def queue_scraping(self, cnr_number, user_id=None):
+        """Queue a scrape for the scraper service; the client polls the job for the result"""
+        if not self.scrape_jobs_ready:
+            self.scrape_jobs_ready = self.db.create_scrape_jobs_table()
+        
+        job_id = self.db.enqueue_scrape_job(cnr_number, user_id, SCRAPE_JOB_MAX_ATTEMPTS)
+        if not job_id:
+            self.add_log(f"Failed to queue scraping job for CNR: {cnr_number}", 'error', 'scraper')
+            return {'success': False, 'error': 'Could not queue scraping job'}
+        
+        self.add_log(f"Queued scraping job {job_id} for CNR: {cnr_number}", 'info', 'scraper')
+        self.publish_job_event(cnr_number, 'queued', f"Scrape job {job_id} queued", job_id=job_id)
+        return {
+            'success': True,
+            'queued': True,
+            'job_id': job_id,
+            'status': 'queued',
+            'message': f'Scraping job {job_id} queued'
+        }
+    
+    def get_scrape_job_status(self, job_id, user_id=None, is_admin=False):
+        """Get a queued scrape's status, or None if the caller may not see it; a completed result is put in temporary storage once"""
+        job = self.db.get_scrape_job(job_id, user_id, is_admin)
+        if not job:
+            return None
+        
+        response = {
+            'success': job['status'] != 'failed',
+            'job_id': job['id'],
+            'cnr_number': job['cnr_number'],
+            'status': job['status'],
+            'attempts': job['attempts'],
+            'max_attempts': job['max_attempts']
+        }
+        if job['status'] == 'completed':
+            result = job['result'] or {}
+            # Same shape as an in-process trigger, so save_to_database finds it. Only the
+            # first poll after completion stores it; a later poll must not bring back a
+            # result that was already saved and discarded
+            if job['collected_at'] is None and self.db.collect_scrape_job_result(job['id']):
+                scrape_results.put(job['cnr_number'], result, job['user_id'])
+            response.update({
+                'message': f"Scraping completed successfully on attempt {job['attempts']}",
+                'data': result,
+                'extracted_real_data': result.get('extracted_real_data', False)
+            })
+        elif job['status'] == 'failed':
+            response['error'] = f"All {job['attempts']} attempts failed. Last error: {job['error']}"
+        return response
+    
+    def save_to_database(self, cnr_number, user_data, is_admin=False):
         """Save case data directly from form to database"""
         try:
             self.add_log(f"Saving case to database: {cnr_number}", 'info', 'database')
             
             # Get scraped data from temporary storage (optional)
-            scraped_data = temp_scraped_data.get(cnr_number, {})
+            scraped_data = scrape_results.get(cnr_number, user_data.get('user_id')) or {}
             
             # Create case data directly from form (user data takes priority)
             combined_data = {
@@ -280,12 +378,11 @@ class LegalAPI:
             }
             
             # Save to database
-            result = self.add_case_with_cnr(cnr_number, combined_data)
+            result = self.add_case_with_cnr(cnr_number, combined_data, is_admin)
             
             if result.get('success'):
                 # Clear temporary data after successful save
-                if cnr_number in temp_scraped_data:
-                    del temp_scraped_data[cnr_number]
+                scrape_results.discard(cnr_number, user_data.get('user_id'))
                 self.add_log(f"Data saved to database and temporary storage cleared for CNR: {cnr_number}", 'success', 'database')
             
             return result
@@ -294,46 +391,60 @@ class LegalAPI:
             self.add_log(f"Error saving to database: {str(e)}", 'error', 'database')
             return {'success': False, 'error': str(e)}
     
-    def get_scraped_data(self, cnr_number):
+    def get_scraped_data(self, cnr_number, user_id=None):
         """Get scraped data from temporary storage"""
-        return temp_scraped_data.get(cnr_number, None)
+        return scrape_results.get(cnr_number, user_id)
 
 # Initialize API
 legal_api = LegalAPI()
 
-# User cache to avoid repeated database queries
-user_cache = {}
+# Every user's hearings per date, one query per date, cached until the next case write
+cause_lists = CauseListStore(legal_api.db, state)
+
+# The scraper runs in this process, so its logs go straight into the log store
+# instead of being posted back to our own /api/logs/add endpoint
+log_shipper.set_local_sink(legal_api.add_log)
+
+# User cache to avoid repeated database queries (shared through the state backend)
+USER_CACHE_NAMESPACE = 'user_cache'
 
 def get_cached_user(token):
     """Get user from cache if available and not expired"""
-    if token in user_cache:
-        user_data, expiry_time = user_cache[token]
-        if time.time() < expiry_time:
-            print(f"✅ CACHE: User found in cache for token: {token[:10]}...")
-            return user_data
-        else:
-            # Token expired, remove from cache
-            print(f"⏰ CACHE: Token expired, removing from cache: {token[:10]}...")
-            del user_cache[token]
-    else:
-        print(f"❌ CACHE: No user found in cache for token: {token[:10]}...")
+    user_data = state.get(USER_CACHE_NAMESPACE, token)
+    if user_data:
+        print(f"✅ CACHE: User found in cache for token: {token[:10]}...")
+        return user_data
+    print(f"❌ CACHE: No user found in cache for token: {token[:10]}...")
     return None
 
 def cache_user(token, user_data, expiry_hours=24):
     """Cache user data with expiry time"""
-    expiry_time = time.time() + (expiry_hours * 3600)
-    user_cache[token] = (user_data, expiry_time)
+    state.set(USER_CACHE_NAMESPACE, token, user_data, ttl=expiry_hours * 3600)
     print(f"💾 CACHE: User cached for token: {token[:10]}... (expires in {expiry_hours}h)")
 
 def clear_user_cache(token=None):
     """Clear user cache - either specific token or all"""
     if token:
-        user_cache.pop(token, None)
+        state.delete(USER_CACHE_NAMESPACE, token)
         print(f"🗑️ CACHE: Cleared cache for specific token: {token[:10]}...")
     else:
-        user_cache.clear()
+        state.clear(USER_CACHE_NAMESPACE)
         print("🗑️ CACHE: Cleared all user cache")
 
+def get_request_user():
+    """Get the user for the request's Bearer token if one was sent, else None"""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    
+    token = auth_header.split(' ')[1]
+    user = get_cached_user(token)
+    if not user:
+        user = legal_api.db.get_user_by_session(token)
+        if user:
+            cache_user(token, user)
+    return user
+
 # Authentication decorator
 def require_auth(f):
     @wraps(f)
@@ -393,11 +504,98 @@ def get_logs():
     """Get system logs"""
     try:
         limit = request.args.get('limit', 100, type=int)
-        logs = legal_api.get_logs(limit)
-        return jsonify({'success': True, 'logs': logs})
+        since = request.args.get('since', type=int)
+        source = request.args.get('source')
+        log_type = request.args.get('type')
+        
+        if request.args.get('history') or request.args.get('before'):
+            # Persisted history, paged with a (timestamp, id) keyset cursor
+            before = None
+            if request.args.get('before'):
+                before_ts, _, before_id = request.args['before'].rpartition(',')
+                try:
+                    datetime.strptime(before_ts, '%Y-%m-%d %H:%M:%S')
+                    before = (before_ts, int(before_id))
+                except ValueError:
+                    return jsonify({'success': False, 'error': "before must be a next_before cursor ('YYYY-MM-DD HH:MM:SS,id')"}), 400
+            logs, next_before = legal_api.get_persisted_logs(min(limit, 1000), before=before, source=source, log_type=log_type)
+            return jsonify({
+                'success': True,
+                'logs': logs,
+                'next_before': f"{next_before[0]},{next_before[1]}" if next_before else None
+            })
+        
+        if since is not None:
+            # Incremental poll: only entries the caller has not seen yet
+            logs, cursor = legal_api.get_logs_since(since, limit, source=source, log_type=log_type)
+        else:
+            cursor = system_logs.last_id
+            logs = legal_api.get_logs(limit, source=source, log_type=log_type)
+        
+        return jsonify({'success': True, 'logs': logs, 'last_id': cursor})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+# Single-use tokens that open one event stream (EventSource cannot send an Authorization header)
+STREAM_TOKEN_NAMESPACE = 'stream_tokens'
+
+@app.route('/api/events/stream-token', methods=['POST'])
+@require_admin
+def create_stream_token():
+    """Issue a short-lived, single-use token for /api/events/stream?stream_token= (admin only)"""
+    stream_token = secrets.token_urlsafe(32)
+    state.set(STREAM_TOKEN_NAMESPACE, stream_token, request.current_user, ttl=SSE_STREAM_TOKEN_TTL)
+    return jsonify({'success': True, 'stream_token': stream_token, 'expires_in': SSE_STREAM_TOKEN_TTL})
+
+@app.route('/api/events/stream', methods=['GET'])
+def stream_events():
+    """Server-Sent Events stream of new log entries and scrape job progress (admin only)"""
+    # Browsers pass a stream token, so the session token never appears in a URL (or an access log)
+    stream_token = request.args.get('stream_token')
+    if stream_token:
+        user = state.get(STREAM_TOKEN_NAMESPACE, stream_token)
+        if not user or not state.delete(STREAM_TOKEN_NAMESPACE, stream_token):
+            return jsonify({'success': False, 'error': 'Invalid or expired stream token'}), 401
+    else:
+        user = get_request_user()
+        if not user:
+            return jsonify({'success': False, 'error': 'Authentication required'}), 401
+    
+    if user['role'] != 'admin':
+        return jsonify({'success': False, 'error': 'Admin access required'}), 403
+    
+    # Resume after the last event the browser saw, otherwise start with new events only.
+    # Ids restart with a process-local log store, so a cursor from before a restart is clamped
+    resume_from = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        cursor = int(resume_from) if resume_from else system_logs.last_id
+    except ValueError:
+        cursor = system_logs.last_id
+    cursor = min(cursor, system_logs.last_id)
+    
+    if not sse_slots.acquire(blocking=False):
+        return jsonify({'success': False, 'error': 'Too many event stream subscribers'}), 503
+    
+    def generate():
+        nonlocal cursor
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            if not system_logs.wait_for(cursor, SSE_HEARTBEAT_SECONDS):
+                yield ": heartbeat\n\n"
+                continue
+            
+            entries, cursor = system_logs.get_since(cursor, limit=0)
+            for entry in entries:
+                event = 'job' if entry['source'] == 'job' else 'log'
+                yield f"id: {entry['id']}\nevent: {event}\ndata: {json.dumps(entry)}\n\n"
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    # The server closes the response even when the client leaves before the first event
+    response.call_on_close(sse_slots.release)
+    return response
+
 @app.route('/api/logs/clear', methods=['POST'])
 def clear_logs():
     """Clear all logs"""
@@ -409,22 +607,49 @@ def clear_logs():
 
 @app.route('/api/logs/add', methods=['POST'])
 def add_log():
-    """Add a log entry"""
+    """Add a log entry, or a batch of entries sent as {'logs': [...]}"""
     try:
         data = request.get_json()
-        message = data.get('message', '')
-        log_type = data.get('type', 'info')
-        source = data.get('source', 'system')
-        
-        legal_api.add_log(message, log_type, source)
-        return jsonify({'success': True})
+        entries = data.get('logs') if isinstance(data.get('logs'), list) else [data]
+        
+        for entry in entries:
+            message = entry.get('message', '')
+            log_type = entry.get('type', 'info')
+            source = entry.get('source', 'system')
+            details = entry.get('data')
+            if log_type == 'progress' and source == 'job' and isinstance(details, dict):
+                # Scrape job events from the scraper service, same shape as the in-process ones
+                details = dict(details)
+                legal_api.publish_job_event(details.pop('cnr_number', None), details.pop('stage', None), message, **details)
+            else:
+                # Shipped entries keep the time they were logged at, when it is well formed
+                timestamp = entry.get('timestamp')
+                try:
+                    datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
+                except (TypeError, ValueError):
+                    timestamp = None
+                legal_api.add_log(message, log_type, source, timestamp)
+        
+        return jsonify({'success': True, 'count': len(entries)})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/scraping/trigger/<cnr_number>', methods=['POST'])
 def trigger_scraping(cnr_number):
     """Step 1: Trigger scraping"""
-    return jsonify(legal_api.trigger_scraping(cnr_number))
+    # The result is kept for the requesting user until they save the case
+    user = get_request_user()
+    return jsonify(legal_api.trigger_scraping(cnr_number, user['id'] if user else None))
+
+@app.route('/api/scraping/jobs/<int:job_id>', methods=['GET'])
+def get_scrape_job(job_id):
+    """Poll a queued scrape (SCRAPER_MODE=service)"""
+    user = get_request_user()
+    status = legal_api.get_scrape_job_status(job_id, user['id'] if user else None,
+                                             bool(user) and user['role'] == 'admin')
+    if not status:
+        return jsonify({'success': False, 'error': 'Scraping job not found'}), 404
+    return jsonify(status)
 
 @app.route('/api/cases/save', methods=['POST', 'OPTIONS'])
 def save_case():
@@ -463,10 +688,12 @@ def save_case():
         print(f"🔍 SAVE CASE DEBUG: CNR: {cnr_number}")
         print(f"🔍 SAVE CASE DEBUG: User data: {user_data}")
         
-        result = legal_api.save_to_database(cnr_number, user_data)
+        result = legal_api.save_to_database(cnr_number, user_data, user['role'] == 'admin')
         
         print(f"🔍 SAVE CASE DEBUG: Save result: {result}")
         
+        if result.get('forbidden'):
+            return case_access_error('forbidden', result['error'])
         return jsonify(result)
 
     except Exception as e:
@@ -475,7 +702,8 @@ def save_case():
 @app.route('/api/scraping/data/<cnr_number>', methods=['GET'])
 def get_scraped_data(cnr_number):
     """Get scraped data from temporary storage"""
-    data = legal_api.get_scraped_data(cnr_number)
+    user = get_request_user()
+    data = legal_api.get_scraped_data(cnr_number, user['id'] if user else None)
     if data:
         return jsonify({'success': True, 'data': data})
     else:
@@ -547,6 +775,14 @@ def get_cases():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+def case_access_error(status, error_message):
+    """Response for a non-'ok' status from the DatabaseManager *_for_user case methods"""
+    if status == 'not_found':
+        return jsonify({'success': False, 'error': 'Case not found'}), 404
+    if status == 'forbidden':
+        return jsonify({'success': False, 'error': 'Access denied'}), 403
+    return jsonify({'success': False, 'error': error_message}), 500
+
 @app.route('/api/cases/<cnr_number>', methods=['GET', 'PUT', 'DELETE', 'OPTIONS'])
 def handle_case(cnr_number):
     """Handle GET, PUT, and DELETE operations for a specific case"""
@@ -576,32 +812,21 @@ def handle_case(cnr_number):
         else:
             return jsonify({'success': False, 'error': 'Invalid session'}), 401
         
+    is_admin = user['role'] == 'admin'
+    
     if request.method == 'GET':
         """Get specific case by CNR"""
         try:
-            case = legal_api.db.get_case(cnr_number)
-            if case:
-                # Check if user can access this case (admin or owner)
-                if user['role'] != 'admin' and case.get('user_id') != user['id']:
-                    return jsonify({'success': False, 'error': 'Access denied'}), 403
-                
-                return jsonify({'success': True, 'case': case})
-            else:
-                return jsonify({'success': False, 'error': 'Case not found'})
+            status, case = legal_api.db.get_case_for_user(cnr_number, user['id'], is_admin)
+            if status != 'ok':
+                return case_access_error(status, 'Failed to load case')
+            return jsonify({'success': True, 'case': case})
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)})
     
     elif request.method == 'PUT':
         """Update specific case by CNR"""
         try:
-            # Check if user can modify this case (admin or owner)
-            case = legal_api.db.get_case(cnr_number)
-            if not case:
-                return jsonify({'success': False, 'error': 'Case not found'}), 404
-
-            if user['role'] != 'admin' and case.get('user_id') != user['id']:
-                return jsonify({'success': False, 'error': 'Access denied'}), 403
-
             data = request.get_json()
             if not data:
                 return jsonify({'success': False, 'error': 'No data provided for update'}), 400
@@ -623,13 +848,13 @@ def handle_case(cnr_number):
                 if frontend_key in data and data[frontend_key]:
                     mapped_data[db_key] = data[frontend_key]
 
-            # Update the case with mapped data
-            success = legal_api.db.update_case(cnr_number, mapped_data)
-            if success:
-                legal_api.add_log(f"Case updated successfully: {cnr_number}", 'info', 'database')
-                return jsonify({'success': True, 'message': f'Case {cnr_number} updated successfully'})
-            else:
-                return jsonify({'success': False, 'error': 'Failed to update case'}), 500
+            # Ownership is enforced by the UPDATE itself (admin or owner)
+            status, detail = legal_api.db.update_case_for_user(cnr_number, mapped_data, user['id'], is_admin)
+            if status != 'ok':
+                return case_access_error(status, 'Failed to update case')
+            legal_api.add_log(f"Case updated successfully: {cnr_number}", 'info', 'database')
+            # The stored case and history, so clients can patch their cache instead of reloading
+            return jsonify({'success': True, 'message': f'Case {cnr_number} updated successfully', **detail})
         except Exception as e:
             legal_api.add_log(f"Error updating case {cnr_number}: {str(e)}", 'error', 'database')
             return jsonify({'success': False, 'error': str(e)}), 500
@@ -637,37 +862,49 @@ def handle_case(cnr_number):
     elif request.method == 'DELETE':
         """Delete specific case by CNR"""
         try:
-            print(f"🗑️ DELETE REQUEST: Attempting to delete case {cnr_number}")
-            print(f"🗑️ DELETE REQUEST: User: {user['username']} (ID: {user['id']}, Role: {user['role']})")
+            print(f"🗑️ DELETE REQUEST: User {user['username']} (ID: {user['id']}, Role: {user['role']}) deleting case {cnr_number}")
             
-            # Check if user can delete this case (admin or owner)
-            case = legal_api.db.get_case(cnr_number)
-            print(f"🗑️ DELETE REQUEST: Case found: {case}")
+            # Ownership is enforced by the DELETE itself (admin or owner)
+            status, history_rows = legal_api.db.delete_case_for_user(cnr_number, user['id'], is_admin)
+            if status != 'ok':
+                print(f"🗑️ DELETE REQUEST: Case {cnr_number} not deleted: {status}")
+                return case_access_error(status, 'Failed to delete case')
             
-            if not case:
-                print(f"🗑️ DELETE REQUEST: Case not found for CNR: {cnr_number}")
-                return jsonify({'success': False, 'error': 'Case not found'}), 404
-            
-            if user['role'] != 'admin' and case.get('user_id') != user['id']:
-                print(f"🗑️ DELETE REQUEST: Access denied - user {user['id']} cannot delete case owned by {case.get('user_id')}")
-                return jsonify({'success': False, 'error': 'Access denied'}), 403
-            
-            print(f"🗑️ DELETE REQUEST: Calling database delete for CNR: {cnr_number}")
-            success = legal_api.db.delete_case(cnr_number)
-            print(f"🗑️ DELETE REQUEST: Database delete result: {success}")
-            
-            if success:
-                legal_api.add_log(f"Case deleted successfully: {cnr_number}", 'info', 'database')
-                print(f"🗑️ DELETE REQUEST: Case {cnr_number} deleted successfully")
-                return jsonify({'success': True, 'message': f'Case {cnr_number} deleted successfully'})
-            else:
-                print(f"🗑️ DELETE REQUEST: Failed to delete case {cnr_number}")
-                return jsonify({'success': False, 'error': 'Failed to delete case'})
+            legal_api.add_log(f"Case deleted successfully: {cnr_number} ({history_rows} history entries)", 'info', 'database')
+            return jsonify({'success': True, 'message': f'Case {cnr_number} deleted successfully'})
         except Exception as e:
             print(f"🗑️ DELETE REQUEST: Exception during delete: {str(e)}")
             legal_api.add_log(f"Error deleting case {cnr_number}: {str(e)}", 'error', 'database')
             return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/cases/<cnr_number>/full', methods=['GET'])
+@require_auth
+def get_case_full(cnr_number):
+    """Case, history and hearing summary in one request (one auth check, one query)"""
+    user = request.user
+    try:
+        detail = legal_api.db.get_case_with_history(cnr_number)
+        if not detail:
+            return jsonify({'success': False, 'error': 'Case not found'}), 404
+        
+        if user['role'] != 'admin' and detail['case'].get('user_id') != user['id']:
+            return jsonify({'success': False, 'error': 'Access denied'}), 403
+        
+        response_data = {'success': True, **detail}
+        
+        # The ETag covers only the case data, so it changes exactly when the case or its history does
+        etag = generate_etag(response_data)
+        if request.headers.get('If-None-Match') == etag:
+            response = make_response('', 304)
+        else:
+            response = jsonify(response_data)
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    except Exception as e:
+        legal_api.add_log(f"Error getting case details for CNR {cnr_number}: {str(e)}", 'error', 'database')
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/cases/histories/batch', methods=['GET'])
 @require_auth
 def get_batch_case_history():
@@ -739,6 +976,36 @@ def compress_data(data):
         print(f"Error compressing data: {e}")
         return json.dumps(data)
 
+def dashboard_json_response(user, change_version):
+    """Dashboard payload assembled by Postgres, sent on as bytes inside the usual envelope"""
+    dashboard_json = legal_api.db.get_dashboard_json(user['id'], user['role'] == 'admin')
+    if dashboard_json is None:
+        return jsonify({'success': False, 'error': 'Failed to build dashboard data'}), 500
+    
+    envelope = json.dumps({
+        'success': True,
+        'user': {
+            'id': user['id'],
+            'username': user['username'],
+            'email': user['email'],
+            'full_name': user['full_name'],
+            'role': user['role']
+        },
+        'cache_version': int(time.time() * 1000),
+        'change_version': change_version,
+        'compressed': False
+    })
+    # Splice the database's JSON in as the last key of the envelope object
+    prefix = (envelope[:-1] + ', "dashboard_data": ').encode('utf-8')
+    
+    print(f"📦 Sending SQL-built dashboard data for user {user['username']} ({len(dashboard_json)} bytes)")
+    response = Response([prefix, dashboard_json, b'}'], mimetype='application/json')
+    response.headers['Content-Length'] = str(len(prefix) + len(dashboard_json) + 1)
+    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+    response.headers['Pragma'] = 'no-cache'
+    response.headers['Expires'] = '0'
+    return response
+
 @app.route('/api/user/dashboard-data', methods=['GET', 'OPTIONS'])
 def get_user_dashboard_data():
     """Get ALL user data in ONE API call - SUPER FAST! 🚀"""
@@ -764,6 +1031,13 @@ def get_user_dashboard_data():
     try:
         print(f"🔍 DASHBOARD API: User authenticated: {user['username']} (ID: {user['id']}, Role: {user['role']})")
         
+        # Read before the data, so changes made while it is assembled are resent by /api/changes
+        change_version = legal_api.db.get_change_version()
+        
+        # ?engine= overrides DASHBOARD_ENGINE, e.g. to compare the two (benchmark_dashboard.py)
+        if request.args.get('engine', DASHBOARD_ENGINE).lower() == 'sql':
+            return dashboard_json_response(user, change_version)
+        
         # Get all cases for the user
         if user['role'] == 'admin':
             cases = legal_api.db.get_all_cases()
@@ -801,9 +1075,11 @@ def get_user_dashboard_data():
                 # Create calendar events from history
                 for entry in history:
                     if entry.get('hearing_date'):
-                        event_title = f"{case.get('case_title', 'Unknown Case')} - {entry.get('purpose', 'Hearing')}"
+                        # A NULL title is 'Unknown Case', as in the SQL engine and /api/calendar-events
+                        case_title = case.get('case_title') or 'Unknown Case'
+                        event_title = f"{case_title} - {entry.get('purpose', 'Hearing')}"
                         print(f"🔍 DEBUG: Creating calendar event for {cnr_number}:")
-                        print(f"   case_title: '{case.get('case_title', 'Unknown Case')}'")
+                        print(f"   case_title: '{case_title}'")
                         print(f"   case_type: '{case.get('case_type', 'Unknown')}'")
                         print(f"   purpose: '{entry.get('purpose', 'Hearing')}'")
                         print(f"   final_title: '{event_title}'")
@@ -812,56 +1088,14 @@ def get_user_dashboard_data():
                             'date': entry['hearing_date'].isoformat() if hasattr(entry['hearing_date'], 'isoformat') else str(entry['hearing_date']),
                             'title': event_title,
                             'description': entry.get('order_details', 'No details available'),
-                            'caseTitle': case.get('case_title', 'Unknown Case'),
+                            'caseTitle': case_title,
                             'cnrNumber': cnr_number,
                             'type': 'hearing',
                             'time': '09:00 AM'  # Default time
                         })
         
-        # Extract unique clients from cases
-        clients = []
-        clients_map = {}
-        
-        for case in cases:
-            # Add client_name as primary client
-            if case.get('client_name') and case['client_name'].strip() and case['client_name'] != 'Unknown':
-                client_name = case['client_name']
-                if client_name not in clients_map:
-                    clients_map[client_name] = {
-                        'name': client_name,
-                        'type': 'Individual',
-                        'email': '',
-                        'phone': '',
-                        'location': case.get('court_name', 'Unknown Court'),
-                        'status': 'Active',
-                        'activeCases': 0,
-                        'totalBilled': 'N/A',
-                        'role': 'Primary Client',
-                        'cnr': case['cnr_number'],
-                        'caseType': case['case_type']
-                    }
-                clients_map[client_name]['activeCases'] += 1
-            
-            # Add petitioner as client
-            if case.get('petitioner') and case['petitioner'].strip() and case['petitioner'] != 'Unknown':
-                client_name = case['petitioner']
-                if client_name not in clients_map:
-                    clients_map[client_name] = {
-                        'name': client_name,
-                        'type': 'Individual',
-                        'email': '',
-                        'phone': '',
-                        'location': case.get('court_name', 'Unknown Court'),
-                        'status': 'Active',
-                        'activeCases': 0,
-                        'totalBilled': 'N/A',
-                        'role': 'Petitioner',
-                        'cnr': case['cnr_number'],
-                        'caseType': case['case_type']
-                    }
-                clients_map[client_name]['activeCases'] += 1
-        
-        clients = list(clients_map.values())
+        # Clients are aggregated by the database
+        clients = legal_api.db.get_clients(user['id'], user['role'] == 'admin')
         
         legal_api.add_log(f"Retrieved complete dashboard data for user {user['username']}: {len(cases)} cases, {len(clients)} clients, {len(calendar_events)} events", 'success', 'database')
         
@@ -888,6 +1122,7 @@ def get_user_dashboard_data():
                 }
             },
             'cache_version': int(time.time() * 1000),
+            'change_version': change_version,
             'compressed': False
         }
         
@@ -910,6 +1145,34 @@ def get_user_dashboard_data():
         legal_api.add_log(f"Error getting user dashboard data: {str(e)}", 'error', 'database')
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/changes', methods=['GET'])
+@require_auth
+def get_changes():
+    """Cases and history changed since a change version, plus deleted CNRs (delta sync for cached dashboard data)"""
+    user = request.user
+    try:
+        since = int(request.args.get('since', ''))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'since must be a change version (integer)'}), 400
+    
+    try:
+        is_admin = user['role'] == 'admin'
+        delta = legal_api.db.get_changes_since(since, user['id'], is_admin)
+        if delta is None:
+            return jsonify({'success': False, 'error': 'Failed to load changes'}), 500
+        
+        response_data = {'success': True, **delta}
+        if delta['changes'] or delta['deleted']:
+            # Client rows aggregate over all cases, so they are resent whole when any case changed
+            response_data['clients'] = legal_api.db.get_clients(user['id'], is_admin)
+        
+        response = jsonify(response_data)
+        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+        return response
+    except Exception as e:
+        legal_api.add_log(f"Error getting changes since {since}: {str(e)}", 'error', 'database')
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # Granular API endpoints for better caching
 @app.route('/api/clients', methods=['GET'])
 def get_clients():
@@ -925,43 +1188,40 @@ def get_clients():
         if not user:
             return jsonify({'success': False, 'error': 'Invalid session'}), 401
         
-        # Get cases and extract clients
-        if user['role'] == 'admin':
-            cases = legal_api.db.get_all_cases()
+        is_admin = user['role'] == 'admin'
+        if 'limit' in request.args:
+            # Paged, searched and sorted in the database (clients.html)
+            try:
+                limit = min(max(int(request.args['limit']), 1), 100)
+                offset = max(int(request.args.get('offset', 0)), 0)
+            except ValueError:
+                return jsonify({'success': False, 'error': 'limit and offset must be integers'}), 400
+            page = legal_api.db.get_clients_page(
+                user['id'], is_admin,
+                search=request.args.get('search', ''),
+                sort=request.args.get('sort', 'recent'),
+                limit=limit,
+                offset=offset,
+                client_type=request.args.get('type', ''),
+                status=request.args.get('status', '')
+            )
+            if page is None:
+                return jsonify({'success': False, 'error': 'Failed to load clients'}), 500
+            response_data = {
+                'success': True,
+                'clients': page['clients'],
+                'total': page['total'],
+                'limit': limit,
+                'offset': offset,
+                'cache_version': int(time.time() * 1000)
+            }
         else:
-            cases = legal_api.db.get_cases_for_user(user['id'])
-        
-        # Extract unique clients from cases
-        clients = []
-        clients_map = {}
-        
-        for case in cases:
-            # Add client_name as primary client
-            if case.get('client_name') and case['client_name'].strip() and case['client_name'] != 'Unknown':
-                client_name = case['client_name']
-                if client_name not in clients_map:
-                    clients_map[client_name] = {
-                        'name': client_name,
-                        'type': 'Individual',
-                        'email': case.get('client_email', ''),
-                        'phone': case.get('client_phone', ''),
-                        'location': case.get('court_name', 'Unknown Court'),
-                        'status': 'Active',
-                        'activeCases': 0,
-                        'totalBilled': 'N/A',
-                        'role': 'Primary Client',
-                        'cnr': case['cnr_number'],
-                        'caseType': case['case_type']
-                    }
-                clients_map[client_name]['activeCases'] += 1
-        
-        clients = list(clients_map.values())
-        
-        response_data = {
-            'success': True,
-            'clients': clients,
-            'cache_version': int(time.time() * 1000)
-        }
+            # Read from the clients table, shared with the dashboard
+            response_data = {
+                'success': True,
+                'clients': legal_api.db.get_clients(user['id'], is_admin),
+                'cache_version': int(time.time() * 1000)
+            }
         
         # Generate ETag for conditional requests
         etag = generate_etag(response_data)
@@ -980,6 +1240,16 @@ def get_clients():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/clients/<int:client_id>', methods=['GET'])
+@require_auth
+def get_client(client_id):
+    """One client with its cases (client_details.html)"""
+    user = request.user
+    client = legal_api.db.get_client(client_id, user['id'], user['role'] == 'admin')
+    if not client:
+        return jsonify({'success': False, 'error': 'Client not found'}), 404
+    return jsonify({'success': True, 'client': client})
+
 @app.route('/api/calendar-events', methods=['GET'])
 def get_calendar_events():
     """Get calendar events data only"""
@@ -994,41 +1264,29 @@ def get_calendar_events():
         if not user:
             return jsonify({'success': False, 'error': 'Invalid session'}), 401
         
-        # Get cases and generate calendar events
-        if user['role'] == 'admin':
-            cases = legal_api.db.get_all_cases()
-        else:
-            cases = legal_api.db.get_cases_for_user(user['id'])
-        
-        calendar_events = []
-        
-        for case in cases:
-            cnr_number = case['cnr_number']
-            history = legal_api.db.get_case_history(cnr_number)
-            if history:
-                # Create calendar events from history
-                for entry in history:
-                    if entry.get('hearing_date'):
-                        event_title = f"{case.get('case_title', 'Unknown Case')} - {entry.get('purpose', 'Hearing')}"
-                        print(f"🔍 DEBUG: Creating calendar event for {cnr_number}:")
-                        print(f"   case_title: '{case.get('case_title', 'Unknown Case')}'")
-                        print(f"   case_type: '{case.get('case_type', 'Unknown')}'")
-                        print(f"   purpose: '{entry.get('purpose', 'Hearing')}'")
-                        print(f"   final_title: '{event_title}'")
-                        
-                        calendar_events.append({
-                            'date': entry['hearing_date'].isoformat() if hasattr(entry['hearing_date'], 'isoformat') else str(entry['hearing_date']),
-                            'title': event_title,
-                            'description': entry.get('order_details', 'No details available'),
-                            'caseTitle': case.get('case_title', 'Unknown Case'),
-                            'cnrNumber': cnr_number,
-                            'type': 'hearing',
-                            'time': '09:00 AM'  # Default time
-                        })
+        # ?from=YYYY-MM-DD&to=YYYY-MM-DD (plus optional court and type) limit the
+        # events to what the calendar shows; the database only reads that range
+        try:
+            date_from = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else None
+            date_to = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else None
+        except ValueError:
+            return jsonify({'success': False, 'error': 'from and to must be YYYY-MM-DD dates'}), 400
+        
+        calendar_events = legal_api.db.get_calendar_events(
+            user['id'], user['role'] == 'admin',
+            date_from=date_from,
+            date_to=date_to,
+            court=request.args.get('court') or None,
+            case_type=request.args.get('type') or None
+        )
+        if calendar_events is None:
+            return jsonify({'success': False, 'error': 'Failed to load calendar events'}), 500
         
         response_data = {
             'success': True,
             'calendar_events': calendar_events,
+            'from': date_from.isoformat() if date_from else None,
+            'to': date_to.isoformat() if date_to else None,
             'cache_version': int(time.time() * 1000)
         }
         
@@ -1047,33 +1305,73 @@ def get_calendar_events():
         
         return response
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        legal_api.add_log(f"Error getting calendar events: {str(e)}", 'error', 'database')
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/hearings/upcoming', methods=['GET'])
+@require_auth
+def get_upcoming_hearings():
+    """Cases with a hearing in the next ?days= days (default 7), soonest first, read from the cases table alone"""
+    user = request.user
+    try:
+        days = int(request.args.get('days', 7))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'days must be an integer'}), 400
+    if not 0 <= days <= 365:
+        return jsonify({'success': False, 'error': 'days must be between 0 and 365'}), 400
+    
+    try:
+        hearings = legal_api.db.get_upcoming_hearings(user['id'], user['role'] == 'admin', days)
+        return jsonify({'success': True, 'days': days, 'hearings': hearings, 'total': len(hearings)})
+    except Exception as e:
+        legal_api.add_log(f"Error getting upcoming hearings: {str(e)}", 'error', 'database')
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/cause-list', methods=['GET'])
+@require_auth
+def get_cause_list():
+    """The user's hearings on ?date=YYYY-MM-DD (default tomorrow) grouped by court and judge; ?format=pdf gives the print layout"""
+    user = request.user
+    try:
+        hearing_date = (datetime.strptime(request.args['date'], '%Y-%m-%d').date() if request.args.get('date')
+                        else (datetime.now() + timedelta(days=1)).date())
+    except ValueError:
+        return jsonify({'success': False, 'error': 'date must be a YYYY-MM-DD date'}), 400
+    
+    # Admins see every user's list merged, or one user's with ?user_id=
+    if user['role'] == 'admin':
+        list_user = request.args.get('user_id') or None
+    else:
+        list_user = user['id']
+    
+    try:
+        cause_list = cause_lists.for_user(hearing_date, list_user)
+        if cause_list is None:
+            return jsonify({'success': False, 'error': 'Failed to generate cause list'}), 500
+        
+        if request.args.get('format') == 'pdf':
+            return jsonify({'success': True, 'document': export_cause_list(cause_list)})
+        return jsonify({'success': True, 'cause_list': cause_list})
+    except Exception as e:
+        legal_api.add_log(f"Error generating cause list for {hearing_date}: {str(e)}", 'error', 'database')
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/case_history/<cnr_number>', methods=['GET'])
 @require_auth
 def get_case_history(cnr_number):
     """Get case history for a specific case"""
     try:
-        # Get user from token for authorization check
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return jsonify({'success': False, 'error': 'Authorization header required'}), 401
-        
-        token = auth_header.split(' ')[1]
-        user = legal_api.db.get_user_by_session(token)
+        user = request.user
         
-        if not user:
-            return jsonify({'success': False, 'error': 'Invalid session'}), 401
-        
-        # Check if user can access this case (admin or owner)
-        case = legal_api.db.get_case(cnr_number)
-        if not case:
+        # Case (for the ownership check) and history come back from one query
+        detail = legal_api.db.get_case_with_history(cnr_number)
+        if not detail:
             return jsonify({'success': False, 'error': 'Case not found'}), 404
         
-        if user['role'] != 'admin' and case.get('user_id') != user['id']:
+        if user['role'] != 'admin' and detail['case'].get('user_id') != user['id']:
             return jsonify({'success': False, 'error': 'Access denied'}), 403
         
-        history = legal_api.db.get_case_history(cnr_number)
+        history = detail['history']
         if history is not None:
             legal_api.add_log(f"Retrieved {len(history)} history records for CNR: {cnr_number}", 'success', 'database')
             return jsonify({'success': True, 'history': history})
@@ -1188,6 +1486,18 @@ def get_profile():
         legal_api.add_log(f"Profile error: {str(e)}", 'error', 'auth')
         return jsonify({'success': False, 'error': 'Failed to get profile'}), 500
 
+@app.route('/api/admin/scrape-store', methods=['GET'])
+@require_admin
+def get_scrape_store_stats():
+    """Get size and eviction metrics of the scraped data store (admin only)"""
+    return jsonify({'success': True, 'stats': scrape_results.stats()})
+
+@app.route('/api/admin/cause-lists', methods=['GET'])
+@require_admin
+def get_cause_list_stats():
+    """Get cache metrics of the per-date cause lists (admin only)"""
+    return jsonify({'success': True, 'stats': cause_lists.stats()})
+
 @app.route('/api/admin/users', methods=['GET'])
 @require_admin
 def get_users():
@@ -1458,24 +1768,8 @@ def delete_user(user_id):
 def get_server_info():
     """Get server information including public IP"""
     try:
-        import requests
-        
-        # Get public IP from multiple sources
-        public_ip = None
-        ip_services = [
-            'https://api.ipify.org',
-            'https://checkip.amazonaws.com',
-            'https://ipinfo.io/ip'
-        ]
-        
-        for service in ip_services:
-            try:
-                response = requests.get(service, timeout=API_REQUEST_TIMEOUT)
-                if response.status_code == 200:
-                    public_ip = response.text.strip()
-                    break
-            except:
-                continue
+        # Cached public IP; a stale value is refreshed in the background
+        address = public_address.info()
         
         # Get local IP as fallback
         import socket
@@ -1484,7 +1778,9 @@ def get_server_info():
         
         return jsonify({
             'success': True,
-            'public_ip': public_ip,
+            'public_ip': address['public_ip'],
+            'public_ip_source': address['source'],
+            'public_ip_age_seconds': address['age_seconds'],
             'local_ip': local_ip,
             'hostname': hostname,
             'api_port': int(os.getenv('API_PORT', '5002')),
@@ -1503,6 +1799,8 @@ def get_server_info():
 if __name__ == '__main__':
     import os
     legal_api.add_log("API server starting up", 'info', 'system')
+    legal_api.db.upgrade_schema()
     api_port = int(os.getenv('API_PORT', '5002'))
     print(f"🚀 Starting Legal API Server on port {api_port}...")
+    print("⚠️  Development server - for production run: gunicorn -c gunicorn_config.py wsgi:app")
     app.run(host='0.0.0.0', port=api_port, debug=False) 
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Durable storage for system logs
+A background writer drains log entries from an in-memory queue and flushes
+them to the partitioned system_logs table in multi-row batches, creating
+daily partitions on demand and dropping the ones past the retention window
+"""
+
+import os
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+
+# Configuration constants
+LOG_PERSIST_ENABLED = os.getenv('LOG_PERSIST_ENABLED', 'true').lower() == 'true'
+LOG_PERSIST_BATCH_SIZE = int(os.getenv('LOG_PERSIST_BATCH_SIZE', '200'))
+LOG_PERSIST_FLUSH_INTERVAL = float(os.getenv('LOG_PERSIST_FLUSH_INTERVAL', '2.0'))
+LOG_PERSIST_QUEUE_SIZE = int(os.getenv('LOG_PERSIST_QUEUE_SIZE', '10000'))
+LOG_RETENTION_DAYS = int(os.getenv('LOG_RETENTION_DAYS', '30'))
+LOG_RETENTION_CHECK_INTERVAL = int(os.getenv('LOG_RETENTION_CHECK_INTERVAL', '3600'))
+
+
+class LogWriter:
+    """Batches log entries into the database off the request path.
+
+    ``enqueue()`` never blocks and never touches the database; when the
+    queue is full the entry is dropped and counted, so a slow database can
+    only cost history, never request latency.
+    """
+
+    MAX_FLUSH_ATTEMPTS = 3
+
+    def __init__(self, db, batch_size=LOG_PERSIST_BATCH_SIZE, flush_interval=LOG_PERSIST_FLUSH_INTERVAL,
+                 queue_size=LOG_PERSIST_QUEUE_SIZE, retention_days=LOG_RETENTION_DAYS):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._table_ready = False
+        self._partitions = set()
+        self._last_retention_check = 0
+
+    def enqueue(self, entry):
+        """Queue a log entry (as produced by LogStore.append) for persistence"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=5):
+        """Block until everything queued so far has been written (or timeout)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def _ensure_started(self):
+        # Threads do not survive fork(), so a forked worker starts its own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                try:
+                    self._write(batch)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+
+            if time.monotonic() - self._last_retention_check > LOG_RETENTION_CHECK_INTERVAL:
+                self._last_retention_check = time.monotonic()
+                try:
+                    self.db.drop_old_system_log_partitions(self.retention_days)
+                except Exception as e:
+                    print(f"Error applying log retention: {e}")
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        for attempt in range(1, self.MAX_FLUSH_ATTEMPTS + 1):
+            try:
+                if not self._table_ready:
+                    self._table_ready = self.db.create_system_logs_table()
+
+                days = {datetime.strptime(entry['timestamp'][:10], '%Y-%m-%d').date() for entry in batch}
+                missing = days - self._partitions
+                if missing and self.db.ensure_system_log_partitions(sorted(missing)):
+                    self._partitions |= missing
+
+                if self.db.insert_system_logs(batch):
+                    self.written += len(batch)
+                    return
+            except Exception as e:
+                print(f"Error persisting {len(batch)} logs: {e}")
+
+            time.sleep(attempt)
+
+        print(f"Dropping {len(batch)} log entries after {self.MAX_FLUSH_ATTEMPTS} failed flushes")
+        self.dropped += len(batch)
+
+
+_writers = []
+
+
+def create_log_writer(db):
+    """Create a LogWriter, or None when persistence is disabled"""
+    if not LOG_PERSIST_ENABLED:
+        return None
+    writer = LogWriter(db)
+    _writers.append(writer)
+    return writer
+
+
+@atexit.register
+def _flush_on_exit():
+    for writer in _writers:
+        if writer._thread is not None and writer._pid == os.getpid():
+            writer.flush(timeout=2)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Background log shipping for the scraper
+Buffers log entries in memory and delivers them in batches, either directly
+to the in-process log store (when running inside the API) or to the bulk
+/api/logs/add endpoint (when running as a separate process)
+"""
+
+import os
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+
+# Configuration constants
+LOG_SHIP_BATCH_SIZE = int(os.getenv('LOG_SHIP_BATCH_SIZE', '50'))
+LOG_SHIP_FLUSH_INTERVAL = float(os.getenv('LOG_SHIP_FLUSH_INTERVAL', '1.0'))
+LOG_SHIP_QUEUE_SIZE = int(os.getenv('LOG_SHIP_QUEUE_SIZE', '5000'))
+LOG_SHIP_TIMEOUT = int(os.getenv('API_REQUEST_TIMEOUT', '5'))
+
+
+class LogShipper:
+    """Non-blocking, batching log shipper.
+
+    ``ship()`` only enqueues; a daemon thread drains the queue and delivers
+    batches. A slow or unreachable sink therefore never adds latency to the
+    caller, and entries are dropped (and counted) when the buffer is full.
+    """
+
+    def __init__(self, batch_size=LOG_SHIP_BATCH_SIZE, flush_interval=LOG_SHIP_FLUSH_INTERVAL,
+                 queue_size=LOG_SHIP_QUEUE_SIZE, timeout=LOG_SHIP_TIMEOUT):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.urls = []
+        self.local_sink = None
+        self.dropped = 0
+        self.shipped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._count_lock = threading.Lock()   # ship() runs on every scraper thread
+        self._thread = None
+        self._pid = None
+        self._session = None
+        self._good_url = None
+
+    def configure(self, urls=None, timeout=None):
+        """Set the remote bulk endpoints to try, in order"""
+        if urls is not None:
+            self.urls = list(urls)
+            self._good_url = None
+        if timeout is not None:
+            self.timeout = timeout
+
+    def set_local_sink(self, sink):
+        """Deliver entries by calling ``sink(message, log_type, source, timestamp, data)`` in-process"""
+        self.local_sink = sink
+
+    def ship(self, message, log_type='info', source='scraper', data=None):
+        """Enqueue a log entry (with an optional structured ``data`` payload); never blocks"""
+        entry = {
+            'message': message,
+            'type': log_type,
+            'source': source,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        if data is not None:
+            entry['data'] = data
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._count('dropped', 1)
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been delivered (or timeout)"""
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout)
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def _count(self, counter, amount):
+        with self._count_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _ensure_started(self):
+        # Threads do not survive fork(), so a forked worker starts its own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._session = None
+            self._thread = threading.Thread(target=self._run, name='log-shipper', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._deliver(batch)
+            except Exception as e:
+                print(f"Error in log shipper: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _deliver(self, batch):
+        if self.local_sink is not None:
+            for entry in batch:
+                self.local_sink(entry['message'], entry['type'], entry['source'], entry['timestamp'], entry.get('data'))
+            self._count('shipped', len(batch))
+            return
+
+        if not self.urls:
+            return
+
+        import requests
+        if self._session is None:
+            self._session = requests.Session()
+
+        # Start with the last URL that worked, then the rest in configured order
+        candidates = [self._good_url] if self._good_url else []
+        candidates.extend(url for url in self.urls if url != self._good_url)
+
+        for url in candidates:
+            try:
+                response = self._session.post(url, json={'logs': batch}, timeout=self.timeout)
+                if response.status_code == 200:
+                    self._good_url = url
+                    self._count('shipped', len(batch))
+                    return
+            except Exception as e:
+                print(f"Failed to ship {len(batch)} logs to {url}: {e}")
+
+        print(f"All log endpoints failed, dropped {len(batch)} log entries")
+        self._count('dropped', len(batch))
+
+
+# Shared shipper instance used by the scraper
+log_shipper = LogShipper()
+
+
+@atexit.register
+def _flush_on_exit():
+    if log_shipper._thread is not None and log_shipper._pid == os.getpid():
+        log_shipper.flush(timeout=2)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Ring buffer for system logs
+Appends are O(1) and every entry carries a monotonically increasing sequence
+id, so pollers can ask for "everything after id N" instead of re-reading the
+whole buffer. Entries live in a state backend stream, so all API workers
+share one buffer when a shared backend is configured.
+"""
+
+import os
+from datetime import datetime
+
+from state_backend import MemoryStateBackend
+
+# Configuration constants
+LOG_BUFFER_SIZE = int(os.getenv('LOG_BUFFER_SIZE', '1000'))
+
+
+class LogStore:
+    """Bounded log buffer with cursor-based retrieval"""
+
+    def __init__(self, backend=None, stream='system_logs', maxlen=LOG_BUFFER_SIZE):
+        self.backend = backend or MemoryStateBackend()
+        self.stream = stream
+        self.maxlen = maxlen
+
+    @property
+    def last_id(self):
+        """Sequence id of the newest entry (0 if nothing was ever logged)"""
+        return self.backend.last_id(self.stream)
+
+    def append(self, message, log_type='info', source='system', data=None, timestamp=None):
+        """Add an entry (logged now unless ``timestamp`` is given); the oldest entry falls off once the buffer is full"""
+        entry = {
+            'timestamp': timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'message': message,
+            'type': log_type,
+            'source': source
+        }
+        if data is not None:
+            entry['data'] = data
+        return self.backend.append(self.stream, entry, self.maxlen)
+
+    def wait_for(self, since, timeout):
+        """Block until an entry newer than ``since`` exists; False on timeout"""
+        return self.backend.wait(self.stream, since, timeout)
+
+    def get(self, limit=100, source=None, log_type=None):
+        """Return the newest ``limit`` matching entries, oldest first"""
+        return self.backend.read(self.stream, limit=limit, match={'source': source, 'type': log_type})
+
+    def get_since(self, since, limit=100, source=None, log_type=None):
+        """Return matching entries newer than ``since`` and the cursor to poll with next.
+
+        The read walks only the entries after the cursor. When more than
+        ``limit`` entries match, the oldest ones are returned first so the
+        caller can page forward without gaps.
+        """
+        cursor = self.last_id
+        entries = self.backend.read(self.stream, since=since, limit=limit, match={'source': source, 'type': log_type})
+        if entries and ((limit and len(entries) == limit) or entries[-1]['id'] > cursor):
+            cursor = entries[-1]['id']
+        return entries, cursor
+
+    def clear(self):
+        """Drop all entries (sequence ids keep increasing)"""
+        self.backend.truncate(self.stream)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+CAPTCHA model artifacts
+Snapshots OCR_MODEL_NAME into a versioned local directory with a sha256
+manifest, so workers load it offline instead of resolving against the
+Hugging Face hub on every start. Weights are stored as safetensors and
+memory-mapped at load time, so worker processes on one host share the same
+physical pages.
+
+Layout:
+    OCR_MODEL_DIR/<model>/<revision>/   model, processor and manifest.json
+    OCR_MODEL_DIR/<model>/current       revision the workers load
+
+Usage:
+    python model_artifacts.py fetch [--model NAME] [--revision REV]   # at deploy time
+    python model_artifacts.py verify [--model NAME]
+    python model_artifacts.py list [--model NAME]
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+# Configuration constants
+OCR_MODEL_NAME = os.getenv('OCR_MODEL_NAME', 'anuashok/ocr-captcha-v3')
+OCR_MODEL_DIR = Path(os.getenv('OCR_MODEL_DIR', '~/.cache/legal_ocr/models')).expanduser()
+MANIFEST_FILE = 'manifest.json'
+
+# safetensors dtype names -> torch dtype attribute names
+SAFETENSORS_DTYPES = {
+    'F64': 'float64', 'F32': 'float32', 'F16': 'float16', 'BF16': 'bfloat16',
+    'I64': 'int64', 'I32': 'int32', 'I16': 'int16', 'I8': 'int8', 'U8': 'uint8', 'BOOL': 'bool'
+}
+
+
+def model_root(model_name=OCR_MODEL_NAME):
+    return OCR_MODEL_DIR / re.sub(r'[^A-Za-z0-9_.-]+', '--', model_name)
+
+
+def current_artifact(model_name=OCR_MODEL_NAME):
+    """Directory of the revision workers should load, or None if nothing was fetched"""
+    pointer = model_root(model_name) / 'current'
+    if not pointer.exists():
+        return None
+    artifact_dir = model_root(model_name) / pointer.read_text().strip()
+    return artifact_dir if (artifact_dir / MANIFEST_FILE).exists() else None
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_manifest(artifact_dir, model_name, revision):
+    files = {}
+    for path in sorted(artifact_dir.rglob('*')):
+        if path.is_file() and path.name != MANIFEST_FILE:
+            files[str(path.relative_to(artifact_dir))] = {'sha256': _sha256(path), 'size': path.stat().st_size}
+    manifest = {
+        'model_name': model_name,
+        'revision': revision,
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'files': files
+    }
+    (artifact_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def fetch(model_name=OCR_MODEL_NAME, revision=None):
+    """Download a model revision and store it as a verified, versioned artifact; returns its directory"""
+    from huggingface_hub import snapshot_download
+    from transformers import VisionEncoderDecoderModel, TrOCRProcessor
+
+    snapshot = Path(snapshot_download(model_name, revision=revision))
+    resolved_revision = snapshot.name[:12]  # Snapshot directories are named after the commit hash
+    root = model_root(model_name)
+    artifact_dir = root / resolved_revision
+
+    if artifact_dir.exists() and not verify(artifact_dir):
+        print(f"✅ {model_name}@{resolved_revision} already present")
+    else:
+        # Re-save through transformers so the weights are always safetensors
+        staging = root / f".{resolved_revision}.{os.getpid()}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        VisionEncoderDecoderModel.from_pretrained(snapshot).save_pretrained(staging, safe_serialization=True)
+        TrOCRProcessor.from_pretrained(snapshot).save_pretrained(staging)
+        _write_manifest(staging, model_name, resolved_revision)
+
+        shutil.rmtree(artifact_dir, ignore_errors=True)
+        staging.rename(artifact_dir)
+        print(f"✅ Stored {model_name}@{resolved_revision} in {artifact_dir}")
+
+    pointer_tmp = root / f".current.{os.getpid()}.tmp"
+    pointer_tmp.write_text(resolved_revision)
+    os.replace(pointer_tmp, root / 'current')
+    return artifact_dir
+
+
+def verify(artifact_dir, full=True):
+    """Check an artifact against its manifest; returns a list of problems (empty when valid).
+
+    ``full=False`` only compares file sizes, which is cheap enough for every
+    worker start; the deploy-time check hashes every file.
+    """
+    artifact_dir = Path(artifact_dir)
+    manifest_path = artifact_dir / MANIFEST_FILE
+    if not manifest_path.exists():
+        return [f"{manifest_path} is missing"]
+
+    problems = []
+    manifest = json.loads(manifest_path.read_text())
+    for name, expected in manifest['files'].items():
+        path = artifact_dir / name
+        if not path.exists():
+            problems.append(f"{name} is missing")
+        elif path.stat().st_size != expected['size']:
+            problems.append(f"{name} has size {path.stat().st_size}, expected {expected['size']}")
+        elif full and _sha256(path) != expected['sha256']:
+            problems.append(f"{name} checksum mismatch")
+    return problems
+
+
+def mmap_safetensors(path):
+    """Load a safetensors file as tensors backed by a private memory map of the file.
+
+    Pages come from the OS page cache, so every process mapping the same file
+    shares them until one writes to a tensor (inference never does).
+    """
+    import torch
+
+    with open(path, 'rb') as f:
+        header_size = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(header_size))
+    data_start = 8 + header_size
+
+    storage = torch.UntypedStorage.from_file(str(path), shared=False, nbytes=os.path.getsize(path))
+    raw = torch.empty(0, dtype=torch.uint8).set_(storage)
+
+    tensors = {}
+    for name, info in header.items():
+        if name == '__metadata__':
+            continue
+        dtype = getattr(torch, SAFETENSORS_DTYPES[info['dtype']])
+        begin, end = info['data_offsets']
+        chunk = raw[data_start + begin:data_start + end]
+        if (data_start + begin) % torch.empty(0, dtype=dtype).element_size():
+            chunk = chunk.clone()  # Misaligned for this dtype; this one tensor gets its own copy
+        tensors[name] = chunk.view(dtype).reshape(info['shape'])
+    return tensors
+
+
+def load_artifact(artifact_dir):
+    """Load (processor, model) from a local artifact without touching the network"""
+    from transformers import VisionEncoderDecoderModel, TrOCRProcessor
+
+    problems = verify(artifact_dir, full=False)
+    if problems:
+        raise RuntimeError(f"Model artifact {artifact_dir} is damaged: {'; '.join(problems)}")
+
+    processor = TrOCRProcessor.from_pretrained(artifact_dir, local_files_only=True)
+    model = VisionEncoderDecoderModel.from_pretrained(artifact_dir, local_files_only=True)
+
+    # Swap the freshly read parameters for memory-mapped ones; the private
+    # copies are freed and workers share the file's pages instead
+    for weights_file in sorted(Path(artifact_dir).glob('*.safetensors')):
+        model.load_state_dict(mmap_safetensors(weights_file), strict=False, assign=True)
+    model.tie_weights()
+    model.eval()
+    return processor, model
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage local CAPTCHA model artifacts')
+    parser.add_argument('command', choices=['fetch', 'verify', 'list'])
+    parser.add_argument('--model', default=OCR_MODEL_NAME, help='Hugging Face model name')
+    parser.add_argument('--revision', default=None, help='branch, tag or commit to fetch (default: main)')
+    args = parser.parse_args()
+
+    if args.command == 'fetch':
+        artifact_dir = fetch(args.model, args.revision)
+        problems = verify(artifact_dir)
+        if problems:
+            print(f"❌ Verification failed: {'; '.join(problems)}")
+            sys.exit(1)
+        print(f"✅ Verified {artifact_dir}")
+
+    elif args.command == 'verify':
+        artifact_dir = current_artifact(args.model)
+        if not artifact_dir:
+            print(f"❌ No artifact for {args.model}; run: python model_artifacts.py fetch")
+            sys.exit(1)
+        problems = verify(artifact_dir)
+        if problems:
+            print(f"❌ {artifact_dir} failed verification:")
+            for problem in problems:
+                print(f"   • {problem}")
+            sys.exit(1)
+        print(f"✅ {artifact_dir} matches its manifest")
+
+    else:
+        root = model_root(args.model)
+        current = current_artifact(args.model)
+        revisions = sorted(p for p in root.glob('*') if (p / MANIFEST_FILE).exists()) if root.exists() else []
+        if not revisions:
+            print(f"No artifacts for {args.model} in {root}")
+        for artifact_dir in revisions:
+            manifest = json.loads((artifact_dir / MANIFEST_FILE).read_text())
+            size_mb = sum(f['size'] for f in manifest['files'].values()) / (1024 * 1024)
+            marker = '*' if artifact_dir == current else ' '
+            print(f"{marker} {artifact_dir.name}  {manifest['created_at']}  {size_mb:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
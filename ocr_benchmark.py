@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+CAPTCHA OCR benchmark and regression harness
+Runs the CAPTCHA solver over a labeled corpus and reports exact-match and
+per-character accuracy, latency percentiles, throughput and peak memory.
+Every configuration runs in a fresh interpreter so memory and thread
+settings don't leak between runs. Changes to OCR preprocessing or the model
+should come with these numbers; `preprocess` measures each CAPTCHA_PREPROCESS
+variant against no preprocessing.
+
+Corpus layout: a directory of CAPTCHA images plus labels.csv with the columns
+    filename,text
+
+Usage:
+    python ocr_benchmark.py init-corpus [--source DIR] [--limit 200] [--prefill]
+    python ocr_benchmark.py run [--backend torch] [--batch-size 1] [--threads 0]
+    python ocr_benchmark.py compare [--backends torch,int8,onnx]
+    python ocr_benchmark.py grid [--backends torch,int8] [--batch-sizes 1,4,8] [--threads 1,2,4]
+    python ocr_benchmark.py preprocess [--variants "none;threshold,denoise;threshold,denoise,lines,crop"]
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import shutil
+import argparse
+import itertools
+import subprocess
+from pathlib import Path
+
+from captcha_ocr import (OCR_MODEL_NAME, OCR_BACKENDS, CAPTCHA_PREPROCESS, load_ocr_model, load_captcha_image,
+                         recognize_batch)
+
+# Configuration constants
+OCR_CORPUS_DIR = Path(os.getenv('OCR_CORPUS_DIR', '~/Desktop/captcha_corpus')).expanduser()
+CAPTCHA_FOLDER = Path(os.getenv('SCRAPER_CAPTCHA_FOLDER', '~/Desktop/captcha_images')).expanduser()
+BASELINE_BACKEND = 'torch'
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg')
+PREPROCESS_VARIANTS = 'none;grayscale;threshold;threshold,denoise;threshold,denoise,lines;threshold,denoise,lines,crop,deskew'
+
+
+def load_corpus(corpus_dir):
+    """Return [(image_path, expected_text)] from corpus_dir/labels.csv (unlabeled rows are skipped)"""
+    corpus_dir = Path(corpus_dir)
+    labels_file = corpus_dir / 'labels.csv'
+    if not labels_file.exists():
+        raise FileNotFoundError(f"No labels.csv in {corpus_dir}; create one with: python ocr_benchmark.py init-corpus")
+
+    samples = []
+    with labels_file.open(newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            text = (row.get('text') or '').strip()
+            image_path = corpus_dir / row['filename']
+            if text and image_path.exists():
+                samples.append((image_path, text))
+    return samples
+
+
+def char_accuracy(predicted, expected):
+    """1 - edit distance / length of the longer string"""
+    if not predicted and not expected:
+        return 1.0
+    previous = list(range(len(expected) + 1))
+    for i, p in enumerate(predicted, 1):
+        current = [i]
+        for j, e in enumerate(expected, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (p != e)))
+        previous = current
+    return 1 - previous[-1] / max(len(predicted), len(expected))
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def peak_rss_mb():
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _variant(preprocess):
+    """Normalize a preprocessing spec: 'none' and '' both mean no preprocessing"""
+    steps = [step.strip() for step in (preprocess or '').split(',') if step.strip() and step.strip() != 'none']
+    return ','.join(steps) or 'none'
+
+
+def run_config(samples, backend='torch', batch_size=1, threads=0, model_name=OCR_MODEL_NAME, show_errors=False,
+               preprocess=CAPTCHA_PREPROCESS):
+    """Benchmark one configuration in this process; returns the metrics dict"""
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+
+    load_start = time.perf_counter()
+    processor, model = load_ocr_model(model_name, backend)
+    load_seconds = time.perf_counter() - load_start
+
+    # Preprocessing is timed on its own, after decoding, so its cost is not hidden in OCR latency
+    images = [load_captcha_image(path, preprocess='') for path, _ in samples]
+    variant = _variant(preprocess)
+    preprocess_ms = 0.0
+    if variant != 'none':
+        from captcha_preprocess import preprocess_captcha
+        preprocess_start = time.perf_counter()
+        images = [preprocess_captcha(image, variant) for image in images]
+        preprocess_ms = (time.perf_counter() - preprocess_start) * 1000 / len(images)
+    recognize_batch(images[:batch_size], processor, model)  # Warm-up, not timed
+
+    latencies = []
+    predictions = []
+    run_start = time.perf_counter()
+    for start in range(0, len(images), batch_size):
+        batch = images[start:start + batch_size]
+        started = time.perf_counter()
+        results = recognize_batch(batch, processor, model)
+        # Every image in a batch waits for the whole call
+        latencies.extend([(time.perf_counter() - started) * 1000] * len(batch))
+        predictions.extend(text for text, _ in results)
+    total_seconds = time.perf_counter() - run_start
+
+    exact = 0
+    chars = 0.0
+    for predicted, (path, expected) in zip(predictions, samples):
+        exact += predicted == expected
+        chars += char_accuracy(predicted, expected)
+        if show_errors and predicted != expected:
+            print(f"   ✗ {path.name}: read '{predicted}', expected '{expected}'")
+
+    return {
+        'backend': backend,
+        'batch_size': batch_size,
+        'threads': threads,
+        'preprocess': variant,
+        'preprocess_ms': round(preprocess_ms, 3),
+        'samples': len(samples),
+        'exact_accuracy': round(exact / len(samples), 4),
+        'char_accuracy': round(chars / len(samples), 4),
+        'p50_ms': round(percentile(latencies, 50), 1),
+        'p90_ms': round(percentile(latencies, 90), 1),
+        'p99_ms': round(percentile(latencies, 99), 1),
+        'throughput_per_s': round(len(samples) / total_seconds, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'load_seconds': round(load_seconds, 2)
+    }
+
+
+def run_isolated(corpus_dir, backend, batch_size=1, threads=0, preprocess=CAPTCHA_PREPROCESS):
+    """Run one configuration in a fresh interpreter; returns its metrics or {'error': ...}"""
+    env = dict(os.environ)
+    if threads:
+        # Also caps ONNX Runtime and any OpenMP pools created before torch sees set_num_threads
+        env['OMP_NUM_THREADS'] = str(threads)
+    command = [sys.executable, os.path.abspath(__file__), 'run', '--json', '--corpus', str(corpus_dir),
+               '--backend', backend, '--batch-size', str(batch_size), '--threads', str(threads),
+               '--preprocess', _variant(preprocess)]
+    proc = subprocess.run(command, capture_output=True, text=True, env=env)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    error = (proc.stderr.strip().splitlines() or proc.stdout.strip().splitlines() or ['no output'])[-1].lstrip('❌ ')
+    return {'backend': backend, 'batch_size': batch_size, 'threads': threads, 'preprocess': _variant(preprocess),
+            'error': error}
+
+
+def print_results(results):
+    print(f"{'Backend':<8}{'Batch':>6}{'Thr':>5}{'Exact':>8}{'Char':>8}{'p50 ms':>9}{'p90 ms':>9}"
+          f"{'p99 ms':>9}{'img/s':>8}{'RSS MB':>9}{'Prep ms':>9}  Preprocess")
+    for r in results:
+        label = f"{r['backend']:<8}{r['batch_size']:>6}{r['threads'] or '-':>5}"
+        if 'error' in r:
+            print(f"{label}  ❌ {r['error']}")
+            continue
+        print(f"{label}{r['exact_accuracy']:>8.1%}{r['char_accuracy']:>8.1%}{r['p50_ms']:>9.1f}{r['p90_ms']:>9.1f}"
+              f"{r['p99_ms']:>9.1f}{r['throughput_per_s']:>8.1f}{r['peak_rss_mb']:>9.0f}{r['preprocess_ms']:>9.3f}"
+              f"  {r['preprocess']}")
+
+
+def save_results(results, output):
+    if output:
+        Path(output).write_text(json.dumps(results, indent=2))
+        print(f"💾 Results written to {output}")
+
+
+def cmd_init_corpus(args):
+    """Copy unlabeled CAPTCHA screenshots into the corpus and add them to labels.csv"""
+    corpus_dir = Path(args.corpus)
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    labels_file = corpus_dir / 'labels.csv'
+
+    rows = {}
+    if labels_file.exists():
+        with labels_file.open(newline='', encoding='utf-8') as f:
+            rows = {row['filename']: row.get('text') or '' for row in csv.DictReader(f)}
+
+    source = Path(args.source).expanduser()
+    candidates = sorted(p for p in source.glob('*') if p.suffix.lower() in IMAGE_SUFFIXES and p.name not in rows)
+    added = candidates[:args.limit]
+    for path in added:
+        shutil.copy2(path, corpus_dir / path.name)
+        rows[path.name] = ''
+
+    if args.prefill and added:
+        # Model guesses make labeling a matter of correcting, not typing; they still need review
+        processor, model = load_ocr_model()
+        for path in added:
+            rows[path.name] = recognize_batch([load_captcha_image(path)], processor, model)[0][0]
+
+    with labels_file.open('w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['filename', 'text'])
+        for filename, text in sorted(rows.items()):
+            writer.writerow([filename, text])
+
+    labeled = sum(1 for text in rows.values() if text)
+    print(f"✅ Added {len(added)} images to {corpus_dir} ({labeled}/{len(rows)} labeled)")
+    if added:
+        print(f"✏️  Fill in or correct the text column of {labels_file} before benchmarking")
+    return 0
+
+
+def cmd_run(args):
+    samples = load_corpus(args.corpus)
+    if not samples:
+        print(f"❌ No labeled images found in {args.corpus}")
+        return 1
+    result = run_config(samples, args.backend, args.batch_size, args.threads, show_errors=args.show_errors,
+                        preprocess=args.preprocess)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"📊 {len(samples)} labeled CAPTCHAs from {args.corpus}")
+        print_results([result])
+    return 0
+
+
+def cmd_compare(args):
+    backends = [b.strip() for b in args.backends.split(',') if b.strip()]
+    if BASELINE_BACKEND not in backends:
+        backends = [BASELINE_BACKEND] + backends
+
+    print(f"📊 Comparing OCR backends on {args.corpus}")
+    results = [run_isolated(args.corpus, backend, preprocess=args.preprocess) for backend in backends]
+    print_results(results)
+    save_results(results, args.output)
+
+    baseline = next((r for r in results if r['backend'] == BASELINE_BACKEND and 'error' not in r), None)
+    if not baseline:
+        print(f"❌ The {BASELINE_BACKEND} baseline failed, nothing to compare against")
+        return 1
+    for result in results:
+        if result['backend'] == BASELINE_BACKEND or 'error' in result:
+            continue
+        drop = baseline['exact_accuracy'] - result['exact_accuracy']
+        speedup = baseline['p50_ms'] / result['p50_ms'] if result['p50_ms'] else 0
+        if drop > args.tolerance:
+            print(f"❌ {result['backend']}: accuracy drops {drop:.1%} vs {BASELINE_BACKEND}, keep OCR_BACKEND={BASELINE_BACKEND}")
+        else:
+            print(f"✅ {result['backend']}: accuracy holds (within {args.tolerance:.1%}), {speedup:.2f}x p50 latency")
+    return 0
+
+
+def cmd_grid(args):
+    backends = [b.strip() for b in args.backends.split(',') if b.strip()]
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',')]
+    threads = [int(t) for t in args.threads.split(',')]
+    variants = [v.strip() for v in args.preprocess.split(';') if v.strip()] or ['none']
+
+    configs = list(itertools.product(backends, batch_sizes, threads, variants))
+    print(f"📊 Running {len(configs)} configurations on {args.corpus}")
+    results = []
+    for backend, batch_size, thread_count, variant in configs:
+        print(f"   … {backend}, batch {batch_size}, threads {thread_count or 'default'}, preprocess {_variant(variant)}")
+        results.append(run_isolated(args.corpus, backend, batch_size, thread_count, variant))
+    print_results(results)
+    save_results(results, args.output)
+    return 0
+
+
+def cmd_preprocess(args):
+    """Accuracy and cost of each preprocessing variant against no preprocessing"""
+    variants = [_variant(v) for v in args.variants.split(';') if v.strip()]
+    if 'none' not in variants:
+        variants = ['none'] + variants
+
+    print(f"📊 Comparing CAPTCHA preprocessing on {args.corpus} ({args.backend})")
+    results = [run_isolated(args.corpus, args.backend, preprocess=variant) for variant in variants]
+    print_results(results)
+    save_results(results, args.output)
+
+    baseline = next((r for r in results if r['preprocess'] == 'none' and 'error' not in r), None)
+    if not baseline:
+        print("❌ The unpreprocessed baseline failed, nothing to compare against")
+        return 1
+    for result in results:
+        if result['preprocess'] == 'none' or 'error' in result:
+            continue
+        gain = result['exact_accuracy'] - baseline['exact_accuracy']
+        marker = '✅' if gain > 0 else '❌'
+        print(f"{marker} {result['preprocess']}: {gain:+.1%} exact, "
+              f"{result['char_accuracy'] - baseline['char_accuracy']:+.1%} char accuracy, "
+              f"{result['preprocess_ms']:.3f} ms per image")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CAPTCHA OCR on a labeled corpus')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--corpus', default=str(OCR_CORPUS_DIR), help='directory with images and labels.csv')
+    preprocess_help = 'captcha_preprocess steps, e.g. threshold,denoise (default: CAPTCHA_PREPROCESS)'
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    init = subparsers.add_parser('init-corpus', parents=[common], help='copy CAPTCHA screenshots into the corpus for labeling')
+    init.add_argument('--source', default=str(CAPTCHA_FOLDER), help='folder the scraper saves CAPTCHAs to')
+    init.add_argument('--limit', type=int, default=200, help='images to add')
+    init.add_argument('--prefill', action='store_true', help='pre-fill labels with model guesses to correct by hand')
+
+    run = subparsers.add_parser('run', parents=[common], help='benchmark one configuration')
+    run.add_argument('--backend', default=BASELINE_BACKEND, choices=OCR_BACKENDS)
+    run.add_argument('--batch-size', type=int, default=1)
+    run.add_argument('--threads', type=int, default=0, help='torch CPU threads (0 = default)')
+    run.add_argument('--show-errors', action='store_true', help='list every misread')
+    run.add_argument('--json', action='store_true', help='print the metrics as one JSON line')
+    run.add_argument('--preprocess', default=CAPTCHA_PREPROCESS, help=preprocess_help)
+
+    compare = subparsers.add_parser('compare', parents=[common], help='accuracy and latency of each backend against torch')
+    compare.add_argument('--backends', default=','.join(OCR_BACKENDS))
+    compare.add_argument('--tolerance', type=float, default=0.01, help='largest acceptable exact-match accuracy drop')
+    compare.add_argument('--preprocess', default=CAPTCHA_PREPROCESS, help=preprocess_help)
+    compare.add_argument('--output', help='write the results as JSON')
+
+    grid = subparsers.add_parser('grid', parents=[common], help='every combination of backend, batch size and thread count')
+    grid.add_argument('--backends', default=BASELINE_BACKEND)
+    grid.add_argument('--batch-sizes', default='1,4,8')
+    grid.add_argument('--threads', default='0')
+    grid.add_argument('--preprocess', default=_variant(CAPTCHA_PREPROCESS), help='preprocessing variants separated by ;')
+    grid.add_argument('--output', help='write the results as JSON')
+
+    prep = subparsers.add_parser('preprocess', parents=[common], help='accuracy of preprocessing variants against none')
+    prep.add_argument('--backend', default=BASELINE_BACKEND, choices=OCR_BACKENDS)
+    prep.add_argument('--variants', default=PREPROCESS_VARIANTS, help='preprocessing variants separated by ;')
+    prep.add_argument('--output', help='write the results as JSON')
+
+    args = parser.parse_args()
+    commands = {'init-corpus': cmd_init_corpus, 'run': cmd_run, 'compare': cmd_compare, 'grid': cmd_grid,
+                'preprocess': cmd_preprocess}
+    sys.exit(commands[args.command](args))
+
+
+if __name__ == '__main__':
+    main()
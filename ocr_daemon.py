@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Shared OCR inference daemon
+Holds one copy of the TrOCR model for every scraper process on the host.
+Requests arriving within a short window are decoded together as one batched
+tensor, so parallel scrapes share a single generate call instead of each
+running its own model on one image at a time.
+
+Protocol: one JSON object per line over a Unix stream socket
+    {"image": "<base64 PNG>"}  ->  {"text": "AB12C", "score": 0.97}
+    {"op": "stats"}            ->  batching statistics
+
+Usage:
+    python ocr_daemon.py [--socket /tmp/legal_ocr.sock]
+    python ocr_daemon.py --stats
+Scrapers use it when OCR_DAEMON_SOCKET is set (see captcha_ocr.solve_captcha).
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import base64
+import signal
+import socket
+import argparse
+import threading
+import socketserver
+
+# Configuration constants
+DEFAULT_SOCKET_PATH = os.getenv('OCR_DAEMON_SOCKET') or '/tmp/legal_ocr.sock'
+OCR_BATCH_WINDOW_MS = float(os.getenv('OCR_BATCH_WINDOW_MS', '25'))
+OCR_MAX_BATCH = int(os.getenv('OCR_MAX_BATCH', '16'))
+OCR_DAEMON_TIMEOUT = float(os.getenv('OCR_DAEMON_TIMEOUT', '30'))
+OCR_THREADS = int(os.getenv('OCR_THREADS', '0'))                     # 0 keeps torch's default
+
+
+class _Request:
+    """One image waiting for its share of a batch"""
+
+    __slots__ = ('image', 'done', 'result', 'error')
+
+    def __init__(self, image):
+        self.image = image
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Collects requests for up to ``window_ms`` and decodes them in one call"""
+
+    def __init__(self, recognize, window_ms=OCR_BATCH_WINDOW_MS, max_batch=OCR_MAX_BATCH):
+        self.recognize = recognize
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'batches': 0, 'errors': 0, 'largest_batch': 0, 'inference_seconds': 0.0}
+        self._thread = threading.Thread(target=self._run, name='ocr-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, image, timeout=OCR_DAEMON_TIMEOUT):
+        """Queue an image and wait for its (text, score)"""
+        request = _Request(image)
+        self._queue.put(request)
+        if not request.done.wait(timeout):
+            raise TimeoutError(f"OCR did not finish within {timeout}s")
+        if request.error:
+            raise RuntimeError(request.error)
+        return request.result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['mean_batch_size'] = round(stats['requests'] / stats['batches'], 2) if stats['batches'] else 0
+        stats['inference_seconds'] = round(stats['inference_seconds'], 3)
+        stats['queued'] = self._queue.qsize()
+        return stats
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            started = time.perf_counter()
+            failed = False
+            try:
+                results = self.recognize([request.image for request in batch])
+                for request, result in zip(batch, results):
+                    request.result = result
+            except Exception as e:
+                failed = True
+                print(f"❌ OCR batch of {len(batch)} failed: {e}")
+                for request in batch:
+                    request.error = str(e)
+            finally:
+                for request in batch:
+                    request.done.set()
+
+            with self._lock:
+                self._stats['requests'] += len(batch)
+                self._stats['batches'] += 1
+                self._stats['errors'] += len(batch) if failed else 0
+                self._stats['largest_batch'] = max(self._stats['largest_batch'], len(batch))
+                self._stats['inference_seconds'] += time.perf_counter() - started
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # A client may send any number of requests on one connection
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if request.get('op') == 'stats':
+                    response = self.server.batcher.stats()
+                else:
+                    # Decoding happens here, in parallel; only inference is batched
+                    image = self.server.load_image(base64.b64decode(request['image']))
+                    text, score = self.server.batcher.submit(image)
+                    response = {'text': text, 'score': score}
+            except Exception as e:
+                response = {'error': str(e)}
+            self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+
+class OCRDaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128  # Bursts of scrapers connect at once; the default backlog is 5
+
+    def __init__(self, socket_path, batcher, load_image):
+        self.batcher = batcher
+        self.load_image = load_image
+        super().__init__(socket_path, _RequestHandler)
+
+
+class OCRDaemonClient:
+    """Client shim used by captcha_ocr.solve_captcha"""
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, timeout=OCR_DAEMON_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _call(self, request):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            sock.sendall((json.dumps(request) + '\n').encode('utf-8'))
+            with sock.makefile('rb') as f:
+                line = f.readline()
+        if not line:
+            raise ConnectionError('OCR daemon closed the connection')
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response
+
+    def recognize(self, image):
+        """Decode a CAPTCHA given as a file path or PNG bytes; returns (text, score)"""
+        if not isinstance(image, (bytes, bytearray)):
+            with open(image, 'rb') as f:
+                image = f.read()
+        response = self._call({'image': base64.b64encode(image).decode('ascii')})
+        return response['text'], response['score']
+
+    def stats(self):
+        return self._call({'op': 'stats'})
+
+
+def _socket_in_use(socket_path):
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+
+
+def serve(socket_path, window_ms=OCR_BATCH_WINDOW_MS, max_batch=OCR_MAX_BATCH):
+    """Load the model and serve OCR requests until SIGTERM/SIGINT"""
+    from captcha_ocr import load_ocr_model, load_captcha_image, recognize_batch
+
+    if os.path.exists(socket_path):
+        if _socket_in_use(socket_path):
+            print(f"❌ An OCR daemon is already listening on {socket_path}")
+            sys.exit(1)
+        os.unlink(socket_path)  # Left behind by a daemon that did not shut down cleanly
+
+    if OCR_THREADS:
+        import torch
+        torch.set_num_threads(OCR_THREADS)
+
+    processor, model = load_ocr_model()
+    batcher = MicroBatcher(lambda images: recognize_batch(images, processor, model), window_ms, max_batch)
+    server = OCRDaemonServer(socket_path, batcher, load_captcha_image)
+    os.chmod(socket_path, 0o660)
+
+    def request_stop(signum, frame):
+        # shutdown() blocks until serve_forever() returns, so it cannot run on this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    print(f"🚀 OCR daemon listening on {socket_path} (window {window_ms}ms, max batch {max_batch})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        print(f"🛑 OCR daemon stopped: {json.dumps(batcher.stats())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shared OCR inference daemon with micro-batching')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help='Unix socket path')
+    parser.add_argument('--window-ms', type=float, default=OCR_BATCH_WINDOW_MS, help='how long to collect a batch')
+    parser.add_argument('--max-batch', type=int, default=OCR_MAX_BATCH, help='largest batch to decode at once')
+    parser.add_argument('--stats', action='store_true', help='print a running daemon\'s statistics and exit')
+    args = parser.parse_args()
+
+    if args.stats:
+        print(json.dumps(OCRDaemonClient(args.socket).stats(), indent=2))
+        return
+
+    serve(args.socket, args.window_ms, args.max_batch)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Public address resolver
+Finds the server's public IP without putting network calls on the import
+or request path. Lookups return immediately with the best known address
+(static override, in-memory value, or the on-disk cache) and a stale value
+is refreshed in a background thread.
+
+Usage:
+    python public_address.py            # show the known address
+    python public_address.py --refresh  # look it up now and update the cache
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import ipaddress
+
+# Configuration constants
+PUBLIC_IP = os.getenv('PUBLIC_IP', '').strip()                                   # Static override, skips discovery
+PUBLIC_IP_DISCOVERY = os.getenv('PUBLIC_IP_DISCOVERY', 'true').lower() == 'true'  # false on offline boxes
+PUBLIC_IP_TTL = int(os.getenv('PUBLIC_IP_TTL', '3600'))
+PUBLIC_IP_RETRY_SECONDS = int(os.getenv('PUBLIC_IP_RETRY_SECONDS', '300'))
+PUBLIC_IP_CACHE_FILE = os.getenv('PUBLIC_IP_CACHE_FILE', '/tmp/legal_api_public_ip.json')
+PUBLIC_IP_SERVICES = os.getenv(
+    'PUBLIC_IP_SERVICES',
+    'https://api.ipify.org,https://checkip.amazonaws.com,https://ipinfo.io/ip'
+).split(',')
+PUBLIC_IP_TIMEOUT = int(os.getenv('API_REQUEST_TIMEOUT', '5'))
+
+
+class PublicAddressResolver:
+    """Cached, background-refreshed public IP lookup"""
+
+    def __init__(self, override=PUBLIC_IP, discovery=PUBLIC_IP_DISCOVERY, ttl=PUBLIC_IP_TTL,
+                 cache_file=PUBLIC_IP_CACHE_FILE, services=PUBLIC_IP_SERVICES, timeout=PUBLIC_IP_TIMEOUT):
+        self.override = override or None
+        self.discovery = discovery
+        self.ttl = ttl
+        self.cache_file = cache_file
+        self.services = [service.strip() for service in services if service.strip()]
+        self.timeout = timeout
+        self._ip = None
+        self._fetched_at = 0
+        self._last_attempt = 0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._cache_loaded = False
+        # A forked child (gunicorn worker) has no refresh thread even if its parent had one
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def get(self):
+        """Return the best known public IP (or None) without blocking on the network"""
+        if self.override:
+            return self.override
+
+        self._load_cache()
+        if self._is_stale():
+            self._refresh_in_background()
+        return self._ip
+
+    def info(self):
+        """Known address plus where it came from and how old it is"""
+        ip = self.get()
+        if self.override:
+            source = 'override'
+        elif ip:
+            source = 'discovered'
+        else:
+            source = 'unknown'
+        return {
+            'public_ip': ip,
+            'source': source,
+            'fetched_at': self._fetched_at or None,
+            'age_seconds': int(time.time() - self._fetched_at) if self._fetched_at and not self.override else None,
+            'discovery_enabled': self.discovery
+        }
+
+    def refresh(self):
+        """Look the address up now (blocking) and update the cache; returns the IP or None"""
+        self._last_attempt = time.time()
+        for service in self.services:
+            try:
+                import requests
+                response = requests.get(service, timeout=self.timeout)
+                if response.status_code != 200:
+                    continue
+                ip = response.text.strip()
+                ipaddress.ip_address(ip)
+            except Exception as e:
+                print(f"Warning: Public IP lookup via {service} failed: {e}")
+                continue
+
+            self._ip = ip
+            self._fetched_at = time.time()
+            self._save_cache()
+            return ip
+        return None
+
+    def _is_stale(self):
+        if not self.discovery:
+            return False
+        if self._ip and time.time() - self._fetched_at < self.ttl:
+            return False
+        # Don't hammer the lookup services while they are unreachable
+        return time.time() - self._last_attempt >= PUBLIC_IP_RETRY_SECONDS
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            self._last_attempt = time.time()
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name='public-address-refresh', daemon=True).start()
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._last_attempt = 0
+
+    def _load_cache(self):
+        if self._cache_loaded:
+            return
+        self._cache_loaded = True
+        try:
+            with open(self.cache_file, 'r') as f:
+                cached = json.load(f)
+            ipaddress.ip_address(cached['ip'])
+            self._ip = cached['ip']
+            self._fetched_at = float(cached['fetched_at'])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable public IP cache {self.cache_file}: {e}")
+
+    def _save_cache(self):
+        try:
+            tmp_path = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'ip': self._ip, 'fetched_at': self._fetched_at}, f)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            print(f"Warning: Could not write public IP cache {self.cache_file}: {e}")
+
+
+# Shared resolver for the API, scraper and scripts
+public_address = PublicAddressResolver()
+
+
+if __name__ == '__main__':
+    if '--refresh' in sys.argv[1:]:
+        if public_address.override:
+            print(f"ℹ️ PUBLIC_IP is set, discovery skipped: {public_address.override}")
+        elif public_address.refresh():
+            print(f"✅ Public IP refreshed: {public_address._ip}")
+        else:
+            print("❌ Could not determine public IP")
+            sys.exit(1)
+    print(json.dumps(public_address.info(), indent=2))
@@ -1,33 +1,48 @@
 #!/bin/bash
-echo "🔄 Restarting backend with CORS fix..."
-
-# Kill any existing backend processes
-echo "🛑 Stopping existing backend processes..."
-sudo pkill -f "python.*legal_api.py" || echo "No existing processes found"
-
-# Wait a moment
-sleep 2
+echo "🔄 Restarting backend..."
 
 # Navigate to project directory (adjust path as needed)
 cd /home/ec2-user/janatasystems 2>/dev/null || cd /home/ubuntu/janatasystems 2>/dev/null || cd . 2>/dev/null
 
+PIDFILE="${API_PIDFILE:-/tmp/legal-api.pid}"
+
 # Pull latest code
 echo "📥 Pulling latest code..."
 git pull origin main
 
-# Start backend
-echo "🚀 Starting backend..."
-nohup python3 legal_api.py > backend.log 2>&1 &
+if [ -f "$PIDFILE" ] && kill -0 "$(cat "$PIDFILE")" 2>/dev/null; then
+    # Graceful reload: USR2 starts a new master (re-importing the new code)
+    # next to the old one, then QUIT lets the old workers finish in-flight requests
+    echo "♻️  Gracefully reloading gunicorn (master PID $(cat "$PIDFILE"))..."
+    kill -USR2 "$(cat "$PIDFILE")"
+    sleep 5
+    if [ -f "$PIDFILE.oldbin" ]; then
+        kill -QUIT "$(cat "$PIDFILE.oldbin")"
+        echo "✅ Old master asked to shut down gracefully"
+    else
+        echo "❌ New master did not start. Check backend.log for errors:"
+        tail -20 backend.log
+    fi
+else
+    # Stop any development server that may still be running
+    echo "🛑 Stopping existing backend processes..."
+    sudo pkill -f "python.*legal_api.py" || echo "No existing processes found"
+    sleep 2
+
+    # Start backend with preforked gunicorn workers (see gunicorn_config.py)
+    echo "🚀 Starting backend..."
+    nohup gunicorn -c gunicorn_config.py wsgi:app > backend.log 2>&1 &
+fi
 
 # Wait for backend to start
 sleep 3
 
 # Check if backend is running
 echo "🔍 Checking if backend started..."
-if pgrep -f "python.*legal_api.py" > /dev/null; then
+if pgrep -f "gunicorn.*wsgi:app" > /dev/null; then
     echo "✅ Backend is running!"
     echo "📋 Process info:"
-    ps aux | grep "python.*legal_api.py" | grep -v grep
+    ps aux | grep "gunicorn.*wsgi:app" | grep -v grep
 else
     echo "❌ Backend failed to start. Check backend.log for errors:"
     tail -20 backend.log
@@ -41,4 +56,4 @@ try:
     print(f'✅ Backend responding: {response.status_code}')
 except Exception as e:
     print(f'❌ Backend not responding: {e}')
-"
\ No newline at end of file
+"
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Bounded storage for scraped-but-unsaved case data
+A scrape result waits here between "Fetch from eCourts" and "Save case" on
+the add-case form. Results expire after a TTL, the store is capped by entry
+count and total size with least-recently-used eviction, and every result is
+owned by the user who triggered the scrape.
+"""
+
+import os
+import json
+import threading
+
+# Configuration constants
+SCRAPE_RESULT_TTL = int(os.getenv('SCRAPE_RESULT_TTL', '1800'))                     # 30 minutes
+SCRAPE_STORE_MAX_ENTRIES = int(os.getenv('SCRAPE_STORE_MAX_ENTRIES', '200'))
+SCRAPE_STORE_MAX_BYTES = int(os.getenv('SCRAPE_STORE_MAX_BYTES', str(20 * 1024 * 1024)))  # 20 MB
+
+
+class ScrapeResultStore:
+    """TTL + LRU bounded scrape result store on top of a state backend"""
+
+    def __init__(self, backend, namespace='scraped_data', ttl=SCRAPE_RESULT_TTL,
+                 max_entries=SCRAPE_STORE_MAX_ENTRIES, max_bytes=SCRAPE_STORE_MAX_BYTES):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._metrics = {'stored': 0, 'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0, 'rejected': 0}
+
+    @staticmethod
+    def _key(cnr_number, user_id):
+        # Two users scraping the same CNR each get their own copy
+        return f"{user_id if user_id is not None else 'anonymous'}:{cnr_number}"
+
+    def _count(self, metric, amount=1):
+        with self._lock:
+            self._metrics[metric] += amount
+
+    def put(self, cnr_number, result, user_id=None):
+        """Store a scrape result for its owner; returns False if it can never fit"""
+        size = len(json.dumps(result, default=str))
+        if size > self.max_bytes:
+            self._count('rejected')
+            print(f"⚠️ Scrape store: result for {cnr_number} is {size} bytes, larger than the {self.max_bytes} byte cap")
+            return False
+
+        self.backend.set(self.namespace, self._key(cnr_number, user_id), result, ttl=self.ttl, size=size)
+        self._count('stored')
+
+        # Expired and least recently used results go first
+        removed = self.backend.evict(self.namespace, max_entries=self.max_entries, max_bytes=self.max_bytes)
+        self._count('expired', removed['expired'])
+        self._count('evicted', removed['evicted'])
+        return True
+
+    def get(self, cnr_number, user_id=None):
+        """Get the caller's own scrape result, or None"""
+        result = self.backend.get(self.namespace, self._key(cnr_number, user_id), touch=True)
+        self._count('hits' if result is not None else 'misses')
+        return result
+
+    def discard(self, cnr_number, user_id=None):
+        """Remove a result once it has been saved"""
+        return self.backend.delete(self.namespace, self._key(cnr_number, user_id))
+
+    def stats(self):
+        """Current size and lifetime counters (counters are per process)"""
+        entries, total_bytes = self.backend.usage(self.namespace)
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics.update({
+            'entries': entries,
+            'bytes': total_bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl
+        })
+        return metrics
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Scraper service
+Runs eCourts scrapes outside the API. The API queues jobs in the scrape_jobs
+table (SCRAPER_MODE=service) and this service's worker processes claim them
+with SELECT ... FOR UPDATE SKIP LOCKED. Each worker loads the OCR model once
+(or uses the shared OCR daemon when OCR_DAEMON_SOCKET is set) and keeps one
+Chrome browser for many jobs, then writes the result back to the job row,
+where the API picks it up.
+
+Usage:
+    python scraper_service.py [--workers 2]
+"""
+
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+import multiprocessing
+
+from database_setup import DatabaseManager
+from log_shipping import log_shipper
+
+# Configuration constants
+SCRAPER_WORKERS = int(os.getenv('SCRAPER_WORKERS', '2'))
+SCRAPER_POLL_INTERVAL = float(os.getenv('SCRAPER_POLL_INTERVAL', '1.0'))
+SCRAPER_DRIVER_MAX_JOBS = int(os.getenv('SCRAPER_DRIVER_MAX_JOBS', '50'))     # Recycle the browser after this many jobs
+SCRAPER_DEBUG_PORT_BASE = int(os.getenv('SCRAPER_DEBUG_PORT_BASE', '9222'))
+SCRAPE_JOB_STALE_SECONDS = int(os.getenv('SCRAPE_JOB_STALE_SECONDS', '600'))
+SCRAPER_SHUTDOWN_TIMEOUT = int(os.getenv('SCRAPER_SHUTDOWN_TIMEOUT', '120'))
+SUPERVISOR_CHECK_INTERVAL = 5
+
+
+def _quit_driver(driver):
+    try:
+        driver.quit()
+    except Exception as e:
+        print(f"Warning: Error closing browser: {e}")
+
+
+def publish_job_event(job, stage, message, **details):
+    """Ship a scrape job progress event to the API, like LegalAPI.publish_job_event does in-process"""
+    data = {'cnr_number': job['cnr_number'], 'stage': stage, 'job_id': job['id'],
+            'attempt': job['attempts'], 'max_attempts': job['max_attempts']}
+    data.update(details)
+    log_shipper.ship(message, 'progress', 'job', data=data)
+
+
+def worker_main(index, stop_event):
+    """Worker process: one OCR model and one browser, reused across jobs"""
+    # Heavy imports happen here, in the worker, never in the supervisor or the API
+    from scrapper import scrape_case_details, create_driver, send_log_to_api, HEADLESS
+    from captcha_ocr import load_ocr_model, OCR_DAEMON_SOCKET
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The supervisor coordinates shutdown
+
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    db = DatabaseManager()
+    if not OCR_DAEMON_SOCKET:
+        load_ocr_model()  # Otherwise the shared OCR daemon holds the only copy
+    print(f"✅ Scraper worker {index} ready ({name})")
+
+    driver = None
+    driver_jobs = 0
+    try:
+        while not stop_event.is_set():
+            job = db.claim_scrape_job(name)
+            if not job:
+                stop_event.wait(SCRAPER_POLL_INTERVAL)
+                continue
+
+            cnr_number = job['cnr_number']
+            print(f"🔄 Worker {index}: job {job['id']} for {cnr_number} (attempt {job['attempts']}/{job['max_attempts']})")
+            send_log_to_api(f"Scrape job {job['id']} for {cnr_number} started (attempt {job['attempts']}/{job['max_attempts']})", 'info', 'scraper')
+            publish_job_event(job, 'started', f"Scrape attempt {job['attempts']} started")
+
+            try:
+                if driver is None:
+                    driver = create_driver(HEADLESS, debugging_port=SCRAPER_DEBUG_PORT_BASE + index)
+                    driver_jobs = 0
+                result = scrape_case_details(cnr_number, driver=driver)
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+            result = result or {'success': False, 'error': 'Scraper returned no result'}
+            driver_jobs += 1
+
+            if result.get('success'):
+                db.complete_scrape_job(job['id'], result)
+                send_log_to_api(f"Scrape job {job['id']} for {cnr_number} completed", 'success', 'scraper')
+                publish_job_event(job, 'completed', f"Scrape completed on attempt {job['attempts']}")
+            else:
+                error = result.get('error', 'Unknown error')
+                db.fail_scrape_job(job['id'], error)
+                send_log_to_api(f"Scrape job {job['id']} for {cnr_number} failed: {error}", 'error', 'scraper')
+                # fail_scrape_job queues the job again while it has attempts left
+                publish_job_event(job, 'retrying' if job['attempts'] < job['max_attempts'] else 'failed', error)
+
+            # A failed scrape can leave the browser on an error page or dead, and
+            # long-lived browsers grow; start a fresh one in either case
+            if driver is not None and (not result.get('success') or driver_jobs >= SCRAPER_DRIVER_MAX_JOBS):
+                _quit_driver(driver)
+                driver = None
+    finally:
+        if driver is not None:
+            _quit_driver(driver)
+        print(f"🛑 Scraper worker {index} stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the out-of-process scraper service')
+    parser.add_argument('--workers', type=int, default=SCRAPER_WORKERS, help='worker processes (one browser + model each)')
+    args = parser.parse_args()
+
+    db = DatabaseManager()
+    db.upgrade_schema()
+    if not db.create_scrape_jobs_table():
+        print("❌ Could not prepare the scrape_jobs table, exiting")
+        sys.exit(1)
+
+    # spawn, not fork: workers start clean and load their own model and browser
+    ctx = multiprocessing.get_context('spawn')
+    stop_event = ctx.Event()
+
+    def start_worker(index):
+        process = ctx.Process(target=worker_main, args=(index, stop_event), name=f'scraper-worker-{index}', daemon=True)
+        process.start()
+        return process
+
+    # The handler only flips a flag; the loop below sets the shared event
+    stopping = []
+
+    def request_stop(signum, frame):
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    print(f"🚀 Starting scraper service with {args.workers} workers")
+    workers = {index: start_worker(index) for index in range(args.workers)}
+
+    last_stale_check = 0
+    while not stopping:
+        for index, process in workers.items():
+            if not process.is_alive():
+                print(f"⚠️ Scraper worker {index} exited with code {process.exitcode}, restarting")
+                workers[index] = start_worker(index)
+
+        if time.monotonic() - last_stale_check > SCRAPE_JOB_STALE_SECONDS / 2:
+            last_stale_check = time.monotonic()
+            released = db.requeue_stale_scrape_jobs(SCRAPE_JOB_STALE_SECONDS)
+            if released:
+                print(f"♻️ Released {released} scrape jobs from unresponsive workers")
+
+        time.sleep(SUPERVISOR_CHECK_INTERVAL)
+
+    print("🛑 Stopping scraper service...")
+    stop_event.set()
+
+    # Let in-flight scrapes finish before forcing the workers down
+    for process in workers.values():
+        process.join(timeout=SCRAPER_SHUTDOWN_TIMEOUT)
+        if process.is_alive():
+            process.terminate()
+    print("✅ Scraper service stopped")
+
+
+if __name__ == '__main__':
+    main()
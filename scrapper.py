@@ -25,13 +25,11 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
-from PIL import Image
-import torch
-from transformers import VisionEncoderDecoderModel, TrOCRProcessor
 from database_setup import DatabaseManager
-
-# Initialize database
-db = DatabaseManager()
+from log_shipping import log_shipper
+from public_address import public_address
+# torch/transformers are only imported when the first CAPTCHA is solved
+from captcha_ocr import OCR_MODEL_NAME, OCR_DAEMON_SOCKET, load_ocr_model, solve_captcha
 
 # ----------------------- CONFIGURATION ---------------------------------
 def get_api_base_url():
@@ -49,10 +47,9 @@ def get_api_base_url():
         if hostname in ['localhost', '127.0.0.1']:
             return 'http://localhost:5002'
         
-        # Try to get public IP
-        response = requests.get('https://api.ipify.org', timeout=TIMEOUT_CONSTANTS['API_REQUEST_TIMEOUT'])
-        if response.status_code == 200:
-            public_ip = response.text.strip()
+        # Use the cached public IP (resolved in the background, never on import)
+        public_ip = public_address.get()
+        if public_ip:
             return f'http://{public_ip}:5002'
     except Exception as e:
         print(f"Warning: Could not detect API URL dynamically: {e}")
@@ -71,10 +68,17 @@ def get_file_paths():
 CNR_NUMBER = None                        # Will be set dynamically by scrape_case_details()
 HEADLESS = os.getenv('SCRAPER_HEADLESS', 'True').lower() == 'true'
 CSV_FOLDER, CAPTCHA_FOLDER = get_file_paths()
-OCR_MODEL_NAME = os.getenv('OCR_MODEL_NAME', 'anuashok/ocr-captcha-v3')
 PAGE_URL = "https://services.ecourts.gov.in/ecourtindia_v6/"
 API_BASE_URL = get_api_base_url()
 
+# Logs are shipped in batches to the bulk endpoint; the API replaces this with
+# a direct in-process sink when the scraper runs inside it
+log_shipper.configure(urls=[
+    f"{API_BASE_URL}/api/logs/add",
+    'http://localhost:5002/api/logs/add',
+    'http://127.0.0.1:5002/api/logs/add'
+])
+
 # Extraction constants
 DEFAULT_VALUES = {
     'case_title': 'Unknown',
@@ -115,7 +119,7 @@ USE_CACHE_IF_FAIL = True   # Enable cache fallback for better reliability
 CACHE_FILE = Path("ecourts_homepage.html")
 
 
-def create_driver(headless: bool = True) -> webdriver.Chrome:
+def create_driver(headless: bool = True, debugging_port: int = 9222) -> webdriver.Chrome:
     try:
         send_log_to_api("Creating Chrome driver...", 'info', 'scraper')
         
@@ -141,7 +145,7 @@ def create_driver(headless: bool = True) -> webdriver.Chrome:
         chrome_options.add_argument("--disable-ipc-flooding-protection")
         chrome_options.add_argument("--single-process")  # Use single process for stability
         chrome_options.add_argument("--disable-web-security")  # If needed for CORS
-        chrome_options.add_argument("--remote-debugging-port=9222")  # For debugging
+        chrome_options.add_argument(f"--remote-debugging-port={debugging_port}")  # For debugging (unique per browser)
         
         # Window size and position
         chrome_options.add_argument("--window-size=1920,1080")
@@ -194,24 +198,14 @@ def save_captcha(driver) -> Path:
     return filepath
 
 
-def solve_captcha(img_path: Path, processor, model) -> str:
-    image = Image.open(img_path).convert("RGBA")
-    bg = Image.new("RGBA", image.size, (255, 255, 255))
-    image = Image.alpha_composite(bg, image).convert("RGB")
-
-    with torch.no_grad():
-        pixel_vals = processor(image, return_tensors="pt").pixel_values
-        ids = model.generate(pixel_vals)
-        txt = processor.batch_decode(ids, skip_special_tokens=True)[0]
-    return txt.strip()
-
-
 # API FUNCTION: scrape_case_details(cnr_number) - Called by Flask API, no database insertion - LINE 125
-def scrape_case_details(cnr_number):
+def scrape_case_details(cnr_number, driver=None):
     """
     Scrape case details from eCourts for a given CNR number
     Returns a dictionary with case information (NO DATABASE INSERTION)
     This function is called by the API and does NOT insert into database
+    Pass a driver to reuse a long-lived browser (scraper service); otherwise
+    one is created for this scrape and quit afterwards.
     """
     # Validate CNR number
     if not cnr_number or not isinstance(cnr_number, str) or len(cnr_number.strip()) == 0:
@@ -228,13 +222,13 @@ def scrape_case_details(cnr_number):
     start_time = time.perf_counter()
     CSV_FOLDER.mkdir(parents=True, exist_ok=True)
 
-    print("Loading TrOCR model …")
-    model_start = time.perf_counter()
-    processor = TrOCRProcessor.from_pretrained(OCR_MODEL_NAME)
-    model = VisionEncoderDecoderModel.from_pretrained(OCR_MODEL_NAME)
-    print(f"Model loaded in {time.perf_counter() - model_start:.2f}s")
+    # Loaded once per process and reused by later scrapes (the OCR daemon holds it when configured)
+    if not OCR_DAEMON_SOCKET:
+        load_ocr_model(OCR_MODEL_NAME)
 
-    driver = create_driver(HEADLESS)
+    owns_driver = driver is None
+    if owns_driver:
+        driver = create_driver(HEADLESS)
     try:
         get_start = time.perf_counter()
         try:
@@ -302,7 +296,7 @@ def scrape_case_details(cnr_number):
 
         img_path = save_captcha(driver)
         print("Saved CAPTCHA:", img_path)
-        captcha_text = solve_captcha(img_path, processor, model)
+        captcha_text = solve_captcha(img_path)
         print("OCR decoded CAPTCHA:", captcha_text)
 
         cap_box = driver.find_element(By.ID, "fcaptcha_code")
@@ -380,7 +374,8 @@ def scrape_case_details(cnr_number):
         return {'success': False, 'error': str(e)}
 
     finally:
-        driver.quit()
+        if owns_driver:
+            driver.quit()
 
 
 def sanitize_text(text):
@@ -617,53 +612,18 @@ def extract_case_details(driver):
 
 
 def send_log_to_api(message, log_type='info', source='scraper'):
-    """Send log message to API server using dynamic URL detection"""
-    try:
-        # Use the dynamically configured API base URL
-        log_url = f"{API_BASE_URL}/api/logs/add"
-        
-        # Try the configured URL first
-        try:
-            response = requests.post(log_url, 
-                                   json={'message': message, 'type': log_type, 'source': source},
-                                   timeout=TIMEOUT_CONSTANTS['API_REQUEST_TIMEOUT'])
-            if response.status_code == 200:
-                return
-        except Exception as e:
-            print(f"Failed to send log to {log_url}: {e}")
-        
-        # Fallback URLs (only if main URL fails)
-        fallback_urls = [
-            'http://localhost:5002/api/logs/add',
-            'http://127.0.0.1:5002/api/logs/add'
-        ]
-        
-        for url in fallback_urls:
-            try:
-                response = requests.post(url, 
-                                       json={'message': message, 'type': log_type, 'source': source},
-                                       timeout=TIMEOUT_CONSTANTS['API_REQUEST_TIMEOUT'])
-                if response.status_code == 200:
-                    return
-            except Exception as e:
-                print(f"Failed to send log to {url}: {e}")
-                continue
-        
-        print(f"All log endpoints failed for message: {message}")
-        
-    except Exception as e:
-        print(f"Error in send_log_to_api: {e}")
+    """Queue a log message for batched delivery to the API log store (non-blocking)"""
+    log_shipper.ship(message, log_type, source)
 
 
 def main():
     start_time = time.perf_counter()
     CSV_FOLDER.mkdir(parents=True, exist_ok=True)
+    db = DatabaseManager()
 
-    print("Loading TrOCR model …")
-    model_start = time.perf_counter()
-    processor = TrOCRProcessor.from_pretrained(OCR_MODEL_NAME)
-    model = VisionEncoderDecoderModel.from_pretrained(OCR_MODEL_NAME)
-    print(f"Model loaded in {time.perf_counter() - model_start:.2f}s")
+    # Loaded once per process and reused by later scrapes (the OCR daemon holds it when configured)
+    if not OCR_DAEMON_SOCKET:
+        load_ocr_model(OCR_MODEL_NAME)
 
     driver = create_driver(HEADLESS)
     try:
@@ -733,7 +693,7 @@ def main():
 
         img_path = save_captcha(driver)
         print("Saved CAPTCHA:", img_path)
-        captcha_text = solve_captcha(img_path, processor, model)
+        captcha_text = solve_captcha(img_path)
         print("OCR decoded CAPTCHA:", captcha_text)
 
         cap_box = driver.find_element(By.ID, "fcaptcha_code")
@@ -840,11 +800,3 @@ if __name__ == "__main__":
                 print("❌ All attempts failed. Restarting script as a new process.")
                 python = sys.executable
                 os.execv(python, [python] + sys.argv)
-
-
-
-
-
-
-
-:q
\ No newline at end of file
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Shared state backends for the Legal API
+Holds the state that used to live in module globals (scraped-but-unsaved
+cases, the system log buffer, the auth cache) behind one interface, so every
+worker process can see the same data when more than one is running.
+
+Two kinds of state are supported:
+• Key/value namespaces with optional TTL (scrape results, user cache)
+• Append-only streams with sequence ids and a length cap (system logs)
+
+Backends:
+• memory - process-local dicts and deques (single process, the default)
+• sqlite - a SQLite database in WAL mode shared by all processes on the host
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import deque, OrderedDict
+
+# Configuration constants
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'memory').lower()
+STATE_DB_PATH = os.getenv('STATE_DB_PATH', os.path.expanduser('~/.legal_api/state.db'))   # Holds auth tokens; keep it private
+STATE_POLL_INTERVAL = float(os.getenv('STATE_POLL_INTERVAL', '0.5'))
+
+
+class StateBackend(ABC):
+    """Interface shared by all state backends"""
+
+    # ---- key/value namespaces -------------------------------------------
+    @abstractmethod
+    def get(self, namespace, key, default=None, touch=False):
+        """Return the value stored under key, or default if missing/expired.
+
+        ``touch`` marks the key as recently used for LRU eviction.
+        """
+
+    @abstractmethod
+    def set(self, namespace, key, value, ttl=None, size=0):
+        """Store a JSON-serialisable value, expiring after ttl seconds if given.
+
+        ``size`` is the caller's estimate of the value's footprint in bytes,
+        used by ``evict()`` and ``usage()``.
+        """
+
+    @abstractmethod
+    def delete(self, namespace, key):
+        """Remove key; returns True if it existed"""
+
+    @abstractmethod
+    def clear(self, namespace):
+        """Remove every key in the namespace"""
+
+    @abstractmethod
+    def evict(self, namespace, max_entries=None, max_bytes=None):
+        """Drop expired keys, then least recently used keys until within limits.
+
+        Returns {'expired': n, 'evicted': m}.
+        """
+
+    @abstractmethod
+    def usage(self, namespace):
+        """Return (entries, bytes) currently held in the namespace"""
+
+    # ---- streams ---------------------------------------------------------
+    @abstractmethod
+    def append(self, stream, record, maxlen):
+        """Append a record, assigning it the next sequence id as record['id']"""
+
+    @abstractmethod
+    def read(self, stream, since=None, limit=None, match=None):
+        """Read records oldest first.
+
+        Without ``since``: the newest ``limit`` matching records.
+        With ``since``: the oldest ``limit`` matching records with id > since.
+        ``match`` is a dict of field -> value equality filters.
+        """
+
+    @abstractmethod
+    def last_id(self, stream):
+        """Sequence id of the newest record ever appended (0 if none)"""
+
+    def wait(self, stream, since, timeout):
+        """Block until a record with id > since exists; False on timeout"""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.last_id(stream) > since:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(STATE_POLL_INTERVAL, remaining))
+
+    @abstractmethod
+    def truncate(self, stream):
+        """Drop all records in the stream (sequence ids keep increasing)"""
+
+
+def _matches(record, match):
+    if not match:
+        return True
+    return all(value is None or record.get(field) == value for field, value in match.items())
+
+
+class MemoryStateBackend(StateBackend):
+    """Process-local state; fastest, but not shared between workers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._namespaces = {}
+        self._streams = {}
+        self._last_ids = {}
+        self._new_record = threading.Condition(self._lock)
+
+    def get(self, namespace, key, default=None, touch=False):
+        with self._lock:
+            items = self._namespaces.get(namespace)
+            item = items.get(key) if items else None
+            if item is None:
+                return default
+            value, expires_at, _ = item
+            if expires_at is not None and time.time() >= expires_at:
+                del items[key]
+                return default
+            if touch:
+                items.move_to_end(key)
+            return value
+
+    def set(self, namespace, key, value, ttl=None, size=0):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            items = self._namespaces.setdefault(namespace, OrderedDict())
+            items[key] = (value, expires_at, size)
+            items.move_to_end(key)
+
+    def delete(self, namespace, key):
+        with self._lock:
+            return self._namespaces.get(namespace, {}).pop(key, None) is not None
+
+    def clear(self, namespace):
+        with self._lock:
+            self._namespaces.pop(namespace, None)
+
+    def evict(self, namespace, max_entries=None, max_bytes=None):
+        now = time.time()
+        with self._lock:
+            items = self._namespaces.get(namespace)
+            if not items:
+                return {'expired': 0, 'evicted': 0}
+
+            expired = [key for key, (_, expires_at, _) in items.items() if expires_at is not None and now >= expires_at]
+            for key in expired:
+                del items[key]
+
+            # OrderedDict keeps least recently used keys first
+            evicted = 0
+            total_bytes = sum(size for _, _, size in items.values())
+            while items and ((max_entries is not None and len(items) > max_entries) or
+                             (max_bytes is not None and total_bytes > max_bytes)):
+                _, (_, _, size) = items.popitem(last=False)
+                total_bytes -= size
+                evicted += 1
+
+            return {'expired': len(expired), 'evicted': evicted}
+
+    def usage(self, namespace):
+        with self._lock:
+            items = self._namespaces.get(namespace, {})
+            return len(items), sum(size for _, _, size in items.values())
+
+    def append(self, stream, record, maxlen):
+        with self._lock:
+            records = self._streams.get(stream)
+            if records is None:
+                records = self._streams[stream] = deque(maxlen=maxlen)
+            last_id = self._last_ids.get(stream, 0) + 1
+            self._last_ids[stream] = last_id
+            record['id'] = last_id
+            records.append(record)
+            self._new_record.notify_all()
+            return record
+
+    def read(self, stream, since=None, limit=None, match=None):
+        with self._lock:
+            matched = []
+            # Walk from the newest record so a cursor read costs O(new records)
+            for record in reversed(self._streams.get(stream, ())):
+                if since is not None and record['id'] <= since:
+                    break
+                if _matches(record, match):
+                    matched.append(record)
+                    if since is None and limit and len(matched) >= limit:
+                        break
+        matched.reverse()
+        if since is not None and limit:
+            matched = matched[:limit]
+        return matched
+
+    def last_id(self, stream):
+        return self._last_ids.get(stream, 0)
+
+    def wait(self, stream, since, timeout):
+        with self._lock:
+            return self._new_record.wait_for(lambda: self._last_ids.get(stream, 0) > since, timeout)
+
+    def truncate(self, stream):
+        with self._lock:
+            if stream in self._streams:
+                self._streams[stream].clear()
+
+
+def _create_private_file(path):
+    """Create the database file readable by its owner only (SQLite gives -wal/-shm the same mode)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+    os.chmod(path, 0o600)
+
+
+class SQLiteStateBackend(StateBackend):
+    """State shared by every process on the host through a WAL-mode SQLite file"""
+
+    def __init__(self, path=STATE_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        _create_private_file(path)
+        conn = self._connection()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS kv (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                size INTEGER NOT NULL DEFAULT 0,
+                accessed_at REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (namespace, key)
+            );
+            CREATE TABLE IF NOT EXISTS stream_records (
+                stream TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (stream, id)
+            );
+            CREATE TABLE IF NOT EXISTS stream_seq (
+                stream TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL
+            );
+        """)
+
+    def _connection(self):
+        # One connection per thread, and never reuse one across fork()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, namespace, key, default=None, touch=False):
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires_at FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None:
+            return default
+        if row[1] is not None and time.time() >= row[1]:
+            self.delete(namespace, key)
+            return default
+        if touch:
+            conn.execute("UPDATE kv SET accessed_at = ? WHERE namespace = ? AND key = ?", (time.time(), namespace, key))
+        return json.loads(row[0])
+
+    def set(self, namespace, key, value, ttl=None, size=0):
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        self._connection().execute(
+            "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at, size, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (namespace, key, json.dumps(value, default=str), expires_at, size, now)
+        )
+
+    def delete(self, namespace, key):
+        cursor = self._connection().execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+        return cursor.rowcount > 0
+
+    def clear(self, namespace):
+        self._connection().execute("DELETE FROM kv WHERE namespace = ?", (namespace,))
+
+    def evict(self, namespace, max_entries=None, max_bytes=None):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = conn.execute(
+                "DELETE FROM kv WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (namespace, time.time())
+            ).rowcount
+
+            entries, total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM kv WHERE namespace = ?", (namespace,)
+            ).fetchone()
+
+            victims = []
+            if (max_entries is not None and entries > max_entries) or (max_bytes is not None and total_bytes > max_bytes):
+                for key, size in conn.execute(
+                    "SELECT key, size FROM kv WHERE namespace = ? ORDER BY accessed_at ASC", (namespace,)
+                ).fetchall():
+                    if not ((max_entries is not None and entries > max_entries) or
+                            (max_bytes is not None and total_bytes > max_bytes)):
+                        break
+                    victims.append((namespace, key))
+                    entries -= 1
+                    total_bytes -= size
+                conn.executemany("DELETE FROM kv WHERE namespace = ? AND key = ?", victims)
+
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {'expired': expired, 'evicted': len(victims)}
+
+    def usage(self, namespace):
+        row = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM kv WHERE namespace = ?", (namespace,)
+        ).fetchone()
+        return row[0], row[1]
+
+    def append(self, stream, record, maxlen):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                INSERT INTO stream_seq (stream, last_id) VALUES (?, 1)
+                ON CONFLICT (stream) DO UPDATE SET last_id = last_id + 1
+            """, (stream,))
+            last_id = conn.execute("SELECT last_id FROM stream_seq WHERE stream = ?", (stream,)).fetchone()[0]
+            record['id'] = last_id
+            conn.execute("INSERT INTO stream_records (stream, id, payload) VALUES (?, ?, ?)",
+                         (stream, last_id, json.dumps(record, default=str)))
+            conn.execute("DELETE FROM stream_records WHERE stream = ? AND id <= ?", (stream, last_id - maxlen))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return record
+
+    def read(self, stream, since=None, limit=None, match=None):
+        conditions = ["stream = ?"]
+        values = [stream]
+        if since is not None:
+            conditions.append("id > ?")
+            values.append(since)
+        for field, value in (match or {}).items():
+            if value is not None:
+                conditions.append(f"json_extract(payload, '$.{field}') = ?")
+                values.append(value)
+
+        order = "ASC" if since is not None else "DESC"
+        query = f"SELECT payload FROM stream_records WHERE {' AND '.join(conditions)} ORDER BY id {order}"
+        if limit:
+            query += " LIMIT ?"
+            values.append(limit)
+
+        records = [json.loads(row[0]) for row in self._connection().execute(query, values)]
+        if since is None:
+            records.reverse()
+        return records
+
+    def last_id(self, stream):
+        row = self._connection().execute("SELECT last_id FROM stream_seq WHERE stream = ?", (stream,)).fetchone()
+        return row[0] if row else 0
+
+    def truncate(self, stream):
+        self._connection().execute("DELETE FROM stream_records WHERE stream = ?", (stream,))
+
+
+def create_state_backend(kind=STATE_BACKEND):
+    """Create the configured state backend (STATE_BACKEND=memory|sqlite)"""
+    if kind == 'sqlite':
+        print(f"🗃️ State backend: SQLite ({STATE_DB_PATH})")
+        return SQLiteStateBackend(STATE_DB_PATH)
+    if kind != 'memory':
+        print(f"Warning: Unknown STATE_BACKEND '{kind}', using in-memory state")
+    return MemoryStateBackend()
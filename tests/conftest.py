@@ -0,0 +1,115 @@
+"""
+Shared pytest fixtures
+Database tests run against a throwaway database created on the PostgreSQL
+server in TEST_DATABASE_URL (e.g. postgresql://postgres@localhost/postgres)
+and dropped afterwards. Without TEST_DATABASE_URL they are skipped.
+"""
+
+import os
+import sys
+import uuid
+import itertools
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# No public IP lookups when legal_api is imported
+os.environ.setdefault('PUBLIC_IP_DISCOVERY', 'false')
+
+# Configuration constants
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+# Tables emptied after every test (users and sessions other than admin too)
+DATA_TABLES = ('case_history', 'case_clients', 'clients', 'case_tombstones', 'cases', 'user_sessions', 'scrape_jobs')
+
+
+@pytest.fixture(scope='session')
+def database_url():
+    """DSN of a fresh database, dropped at the end of the session"""
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL is not set')
+    psycopg2 = pytest.importorskip('psycopg2')
+    from psycopg2.extensions import make_dsn
+
+    name = f"legal_test_{uuid.uuid4().hex[:8]}"
+    server = psycopg2.connect(TEST_DATABASE_URL)
+    server.autocommit = True
+    server.cursor().execute(f"CREATE DATABASE {name}")
+    try:
+        yield make_dsn(TEST_DATABASE_URL, dbname=name)
+    finally:
+        server.cursor().execute(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")
+        server.close()
+
+
+@pytest.fixture(scope='session')
+def schema_db(database_url):
+    """DatabaseManager on the test database with every table created"""
+    from database_setup import DatabaseManager
+
+    db = DatabaseManager()
+    db.db_params = {'dsn': database_url}
+    assert db.create_tables()
+    return db
+
+
+@pytest.fixture
+def db(schema_db):
+    """The test DatabaseManager, emptied again after the test"""
+    yield schema_db
+    conn = schema_db.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"TRUNCATE {', '.join(DATA_TABLES)} CASCADE")
+        cursor.execute("DELETE FROM users WHERE username <> 'admin'")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def make_user(db):
+    """Create a user and return its id"""
+    counter = itertools.count(1)
+
+    def make(role='user'):
+        name = f"user{next(counter)}_{uuid.uuid4().hex[:6]}"
+        return db.create_user(name, 'x', f"{name}@example.invalid", name.title(), role=role)
+    return make
+
+
+@pytest.fixture
+def make_case(db):
+    """Insert a case through insert_case (so its clients are synced) and return its CNR"""
+    counter = itertools.count(1)
+
+    def make(user_id, **fields):
+        cnr = fields.pop('cnr_number', None) or f"TEST{next(counter):012d}"
+        assert db.insert_case(cnr, fields.pop('case_title', f"Case {cnr}"), user_id=user_id, **fields)
+        return cnr
+    return make
+
+
+@pytest.fixture
+def api(db):
+    """Flask test client of legal_api on the test database"""
+    pytest.importorskip('flask')
+    import legal_api
+
+    legal_api.legal_api.db.db_params = db.db_params
+    legal_api.state.clear(legal_api.USER_CACHE_NAMESPACE)
+    return legal_api.app.test_client()
+
+
+@pytest.fixture
+def auth_headers(db, make_user):
+    """Create a user with a session and return (user_id, headers carrying its Bearer token)"""
+    from datetime import datetime, timedelta
+
+    def login(role='user'):
+        user_id = make_user(role=role)
+        token = uuid.uuid4().hex
+        assert db.create_user_session(user_id, token, datetime.now() + timedelta(hours=1))
+        return user_id, {'Authorization': f"Bearer {token}"}
+    return login
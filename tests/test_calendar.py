@@ -0,0 +1,30 @@
+"""
+Tests for /api/calendar-events
+"""
+
+from datetime import date
+
+
+def test_events_in_the_requested_range(api, auth_headers, db, make_case):
+    user_id, headers = auth_headers()
+    cnr = make_case(user_id, court_name='District Court')
+    assert db.insert_case_history(cnr, 'Judge A', '2026-03-01', '2026-03-10', 'Evidence')
+    assert db.insert_case_history(cnr, 'Judge A', '2026-03-10', '2026-04-20', 'Arguments')
+
+    response = api.get('/api/calendar-events?from=2026-03-01&to=2026-03-31', headers=headers)
+    assert response.status_code == 200
+    events = response.get_json()['calendar_events']
+    assert [(event['date'], event['title']) for event in events] == [('2026-03-10', f"Case {cnr} - Evidence")]
+
+
+def test_database_error_is_not_an_empty_calendar(api, auth_headers, db, monkeypatch):
+    import legal_api
+
+    # A failed read is None, not []
+    assert db.get_calendar_events(1, date_from='not a date') is None
+
+    _, headers = auth_headers()
+    monkeypatch.setattr(legal_api.legal_api.db, 'get_calendar_events', lambda *args, **kwargs: None)
+    response = api.get(f'/api/calendar-events?from={date.today().isoformat()}', headers=headers)
+    assert response.status_code == 500
+    assert response.get_json()['success'] is False
@@ -0,0 +1,89 @@
+"""
+Tests for the vectorized CAPTCHA preprocessing steps, checked against plain loops
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+import captcha_preprocess as cp
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(40)
+
+
+def test_parse_steps_orders_and_validates():
+    assert cp.parse_steps('crop, threshold') == ('threshold', 'crop')
+    assert cp.parse_steps('none') == ()
+    with pytest.raises(ValueError):
+        cp.parse_steps('threshold,sharpen')
+
+
+def test_box_mean_matches_a_plain_window_mean(rng):
+    gray = rng.uniform(0, 255, size=(12, 17)).astype(np.float32)
+    block = 5
+    padded = np.pad(gray, block // 2, mode='edge')
+    expected = np.array([[padded[y:y + block, x:x + block].mean() for x in range(gray.shape[1])]
+                         for y in range(gray.shape[0])])
+    assert np.allclose(cp.box_mean(gray, block), expected, atol=1e-3)
+
+
+def test_adaptive_threshold_finds_dark_text_on_an_uneven_background():
+    # Background brightens left to right; the text is a little darker than its surroundings everywhere
+    gray = np.tile(np.linspace(120, 240, 60, dtype=np.float32), (20, 1))
+    gray[8:12, 5:55] -= 40
+    mask = cp.adaptive_threshold(gray, block=15, offset=10)
+    assert mask[8:12, 10:50].all()
+    assert not mask[:6].any() and not mask[14:].any()
+
+
+def test_denoise_matches_a_plain_neighbour_count(rng):
+    mask = rng.random((15, 20)) < 0.3
+    padded = np.pad(mask, 1)
+    counts = np.array([[padded[y:y + 3, x:x + 3].sum() - mask[y, x] for x in range(mask.shape[1])]
+                       for y in range(mask.shape[0])])
+    assert np.array_equal(cp.denoise(mask, min_neighbors=2), mask & (counts >= 2))
+
+
+def test_remove_lines_drops_thin_strokes_and_keeps_thick_ones():
+    mask = np.zeros((20, 30), dtype=bool)
+    mask[3, :] = True               # 1 px noise line
+    mask[8:14, 5:12] = True         # Character stroke
+    cleaned = cp.remove_lines(mask, line_width=1)
+    assert not cleaned[3].any()
+    assert np.array_equal(cleaned[8:14, 5:12], mask[8:14, 5:12])
+    assert cleaned.sum() == mask[8:14, 5:12].sum()
+
+
+def test_crop_to_ink_keeps_a_margin_within_the_image():
+    mask = np.zeros((20, 30), dtype=bool)
+    mask[5:8, 1:10] = True
+    cropped = cp.crop_to_ink(mask, margin=2)
+    assert cropped.shape == (3 + 4, 9 + 1 + 2)     # The left margin is clipped at the edge
+    assert cropped.sum() == mask.sum()
+    empty = np.zeros((4, 4), dtype=bool)
+    assert cp.crop_to_ink(empty) is empty
+
+
+@pytest.mark.parametrize('degrees', [-8.0, 0.0, 5.0, 12.0])
+def test_skew_angle_of_a_tilted_bar(degrees):
+    mask = np.zeros((80, 200), dtype=bool)
+    slope = math.tan(math.radians(degrees))
+    for x in range(20, 180):
+        y = int(round(40 + (x - 100) * slope))
+        mask[y - 2:y + 3, x] = True
+    assert cp.skew_angle(mask) == pytest.approx(degrees, abs=0.5)
+
+
+def test_pipeline_output_is_black_text_on_white():
+    rgb = np.full((30, 80, 3), 230, dtype=np.uint8)
+    rgb[10:20, 10:70] = 40
+    cleaned, angle = cp.preprocess_array(rgb, cp.parse_steps('threshold,denoise,crop'))
+    assert angle == 0.0
+    assert set(np.unique(cleaned)) == {0, 255}
+    assert (cleaned == 0).sum() > 0
+    gray, _ = cp.preprocess_array(rgb, cp.parse_steps('grayscale'))
+    assert gray.shape == (30, 80) and gray[0, 0] == 230
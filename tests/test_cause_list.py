@@ -0,0 +1,117 @@
+"""
+Tests for the daily cause lists (get_cause_lists, CauseListStore, export)
+"""
+
+from datetime import date
+
+import pytest
+
+from cause_list import CauseListStore, merge_cause_lists, export_cause_list
+from state_backend import MemoryStateBackend
+
+HEARING_DAY = date(2026, 3, 12)
+
+
+@pytest.fixture
+def listed(db, make_user, make_case):
+    """Two users' cases, plus an unassigned one, listed on HEARING_DAY"""
+    owner, other = make_user(), make_user()
+    cases = {
+        'b_first': make_case(owner, case_title='B case', court_name='City Court', judge_name='Judge Z'),
+        'a_first': make_case(owner, case_title='A case', court_name='City Court'),
+        'district': make_case(owner, case_title='C case', court_name='District Court'),
+        'other': make_case(other, case_title='Other case', court_name='City Court'),
+        'unassigned': make_case(None, case_title='Orphan case'),
+        'later': make_case(owner, case_title='Later case', court_name='City Court'),
+    }
+    hearing = HEARING_DAY.isoformat()
+    # An empty judge falls back to the case's judge_name
+    assert db.insert_case_history(cases['b_first'], '', '2026-02-01', hearing, 'Evidence')
+    assert db.insert_case_history(cases['a_first'], 'Judge A', '2026-02-01', hearing, 'Evidence')
+    # Listed twice for the day: the most recent row wins
+    assert db.insert_case_history(cases['a_first'], 'Judge A', '2026-02-02', hearing, 'Arguments')
+    assert db.insert_case_history(cases['district'], 'Judge A', '2026-02-01', hearing, None)
+    assert db.insert_case_history(cases['other'], 'Judge A', '2026-02-01', hearing, 'Orders')
+    assert db.insert_case_history(cases['unassigned'], 'Judge Q', '2026-02-01', hearing, 'Orders')
+    assert db.insert_case_history(cases['later'], 'Judge A', '2026-02-01', '2026-03-13', 'Orders')
+    return owner, other, cases
+
+
+def case_rows(cause_list):
+    return [(court['court'], judge['judge'], case['cnr_number'], case['purpose'])
+            for court in cause_list['courts'] for judge in court['judges'] for case in judge['cases']]
+
+
+def test_cause_lists_are_grouped_per_user_court_and_judge(db, listed):
+    owner, other, cases = listed
+    lists = db.get_cause_lists(HEARING_DAY)
+
+    assert set(lists) == {owner, other, None}
+    assert case_rows(lists[owner]) == [
+        ('City Court', 'Judge A', cases['a_first'], 'Arguments'),
+        ('City Court', 'Judge Z', cases['b_first'], 'Evidence'),
+        ('District Court', 'Judge A', cases['district'], 'Hearing'),
+    ]
+    assert lists[owner]['total'] == 3
+    assert [court['total'] for court in lists[owner]['courts']] == [2, 1]
+    assert case_rows(lists[None]) == [('Unknown Court', 'Judge Q', cases['unassigned'], 'Orders')]
+
+
+def test_merged_list_keeps_the_grouping(db, listed):
+    owner, other, cases = listed
+    lists = db.get_cause_lists(HEARING_DAY)
+    merged = merge_cause_lists([lists[owner], lists[other]])
+
+    city = merged['courts'][0]
+    assert city['court'] == 'City Court' and city['total'] == 3
+    assert [case['cnr_number'] for case in city['judges'][0]['cases']] == [cases['a_first'], cases['other']]
+    assert merged['total'] == 4
+
+
+def test_store_reuses_a_date_until_a_write(db, listed, make_case):
+    owner, _, cases = listed
+    store = CauseListStore(db, MemoryStateBackend())
+
+    first = store.for_user(HEARING_DAY, owner)
+    assert store.for_user(HEARING_DAY, owner) == first
+    assert store.stats()['generated'] == 1 and store.stats()['hits'] == 1
+
+    assert db.insert_case_history(cases['later'], 'Judge A', '2026-02-03', HEARING_DAY.isoformat(), 'Orders')
+    updated = store.for_user(HEARING_DAY, owner)
+    assert updated['total'] == 4
+    assert store.stats()['stale'] == 1
+
+    assert store.for_user(HEARING_DAY, 999999) == {'date': HEARING_DAY.isoformat(),
+                                                    'generated_at': updated['generated_at'],
+                                                    'courts': [], 'total': 0}
+    assert store.for_user(HEARING_DAY)['total'] == 6
+
+
+def test_export_numbers_rows_across_the_list(db, listed):
+    owner, _, cases = listed
+    cause_list = CauseListStore(db, MemoryStateBackend()).for_user(HEARING_DAY, owner)
+    document = export_cause_list(cause_list)
+
+    assert document['title'] == 'Cause List - Thursday, 12 March 2026'
+    assert document['filename'] == 'cause-list-2026-03-12.pdf'
+    rows = [row for section in document['sections'] for table in section['tables'] for row in table['rows']]
+    assert [row[0] for row in rows] == [1, 2, 3]
+    assert [row[2] for row in rows] == [cases['a_first'], cases['b_first'], cases['district']]
+
+
+def test_cause_list_route(api, auth_headers, db, make_case):
+    import legal_api
+
+    legal_api.cause_lists.invalidate()
+    user_id, headers = auth_headers()
+    cnr = make_case(user_id, court_name='City Court')
+    assert db.insert_case_history(cnr, 'Judge A', '2026-02-01', HEARING_DAY.isoformat(), 'Evidence')
+
+    response = api.get(f'/api/cause-list?date={HEARING_DAY.isoformat()}', headers=headers)
+    assert response.status_code == 200
+    assert case_rows(response.get_json()['cause_list']) == [('City Court', 'Judge A', cnr, 'Evidence')]
+
+    document = api.get(f'/api/cause-list?date={HEARING_DAY.isoformat()}&format=pdf', headers=headers).get_json()
+    assert document['document']['total'] == 1
+    assert api.get('/api/cause-list?date=12-03-2026', headers=headers).status_code == 400
+    legal_api.cause_lists.invalidate()
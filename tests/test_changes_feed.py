@@ -0,0 +1,80 @@
+"""
+Tests for the delta-sync changes feed (get_changes_since / get_change_version)
+"""
+
+from database_setup import CHANGE_VERSION
+
+
+def changed_cnrs(delta):
+    return {change['case']['cnr_number'] for change in delta['changes']}
+
+
+def test_changes_since_returns_changed_cases_and_deletions(db, make_user, make_case):
+    user_id = make_user()
+    kept = make_case(user_id)
+    removed = make_case(user_id)
+    start = db.get_changes_since(0, user_id)
+    assert changed_cnrs(start) == {kept, removed}
+
+    assert db.insert_case_history(kept, 'Judge A', '2026-01-05', '2026-02-05', 'Arguments')
+    assert db.delete_case_for_user(removed, user_id)[0] == 'ok'
+
+    delta = db.get_changes_since(start['version'], user_id)
+    assert changed_cnrs(delta) == {kept}
+    assert delta['deleted'] == [removed]
+    assert delta['changes'][0]['history'][0]['purpose'] == 'Arguments'
+
+
+def test_changes_only_include_the_users_cases(db, make_user, make_case):
+    owner, other = make_user(), make_user()
+    make_case(owner)
+    assert changed_cnrs(db.get_changes_since(0, other)) == set()
+    assert len(db.get_changes_since(0, other, is_admin=True)['changes']) == 1
+
+
+def test_late_committing_write_is_still_delivered(db, make_user, make_case):
+    """A write that started before, but commits after, a newer write must not be skipped"""
+    user_id = make_user()
+    slow_cnr, fast_cnr = make_case(user_id), make_case(user_id)
+    since = db.get_changes_since(0, user_id)['version']
+
+    # The slow writer takes its version first and holds its transaction open
+    slow = db.get_connection()
+    try:
+        cursor = slow.cursor()
+        cursor.execute(f"UPDATE cases SET case_title = 'Slow write', change_version = {CHANGE_VERSION} "
+                       f"WHERE cnr_number = %s RETURNING change_version", (slow_cnr,))
+        slow_version = cursor.fetchone()[0]
+
+        # A later writer commits while the slow one is still open
+        assert db.update_case(fast_cnr, {'case_title': 'Fast write'})
+        first = db.get_changes_since(since, user_id)
+        assert changed_cnrs(first) == {fast_cnr}
+        # The highest committed version is past the slow write; the watermark is not
+        assert first['version'] < slow_version
+
+        slow.commit()
+    finally:
+        slow.close()
+
+    second = db.get_changes_since(first['version'], user_id)
+    assert slow_cnr in changed_cnrs(second)
+    slow_case = next(change['case'] for change in second['changes'] if change['case']['cnr_number'] == slow_cnr)
+    assert slow_case['case_title'] == 'Slow write'
+
+
+def test_version_ahead_of_the_database_asks_for_a_reset(db, make_user, make_case):
+    user_id = make_user()
+    make_case(user_id)
+    delta = db.get_changes_since(2 ** 62, user_id)
+    assert delta['reset'] is True
+    assert delta['changes'] == [] and delta['deleted'] == []
+
+
+def test_has_changes_since(db, make_user, make_case):
+    user_id = make_user()
+    make_case(user_id)
+    version = db.get_change_version()
+    assert db.has_changes_since(version) is False
+    make_case(user_id)
+    assert db.has_changes_since(version) is True
@@ -0,0 +1,85 @@
+"""
+Tests for the clients tables kept in step with cases (sync_case_clients)
+"""
+
+
+def admin_id(db):
+    conn = db.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM users WHERE username = 'admin'")
+        return cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_unowned_cases_move_to_admin_with_their_clients(db, make_case):
+    cnr = make_case(None, client_name='Ravi Kumar')
+    admin = admin_id(db)
+    version = db.get_change_version()
+
+    assert db.assign_unowned_cases_to_admin()
+
+    # The admin's delta sync sees the case, and the client moved with it
+    delta = db.get_changes_since(version, admin)
+    assert [change['case']['cnr_number'] for change in delta['changes']] == [cnr]
+    clients = db.get_clients(admin)
+    assert [(client['name'], client['activeCases']) for client in clients] == [('Ravi Kumar', 1)]
+    assert len(db.get_clients(None, is_admin=True)) == 1
+
+
+def client_counts(db, user_id):
+    return {client['name']: client['activeCases'] for client in db.get_clients(user_id)}
+
+
+def test_case_writes_keep_clients_counted(db, make_user, make_case):
+    user_id = make_user()
+    first = make_case(user_id, client_name='Asha Rao', petitioner='Asha Rao')
+    second = make_case(user_id, client_name='Asha Rao', petitioner='Mohan Das')
+    assert client_counts(db, user_id) == {'Asha Rao': 2, 'Mohan Das': 1}
+
+    # Renaming the client moves the case; deleting a case recounts and drops clients left without cases
+    assert db.update_case(second, {'client_name': 'Meera Iyer'})
+    assert client_counts(db, user_id) == {'Asha Rao': 1, 'Mohan Das': 1, 'Meera Iyer': 1}
+    assert db.delete_case_for_user(second, user_id)[0] == 'ok'
+    assert client_counts(db, user_id) == {'Asha Rao': 1}
+    assert db.get_clients(user_id)[0]['cnr'] == first
+
+
+def test_clients_are_per_owner(db, make_user, make_case):
+    owner, other = make_user(), make_user()
+    make_case(owner, client_name='Asha Rao')
+    make_case(other, client_name='Asha Rao')
+    assert client_counts(db, owner) == {'Asha Rao': 1}
+    assert client_counts(db, other) == {'Asha Rao': 1}
+
+
+def test_client_search_matches_name_email_location_and_phone(db, make_user, make_case):
+    user_id = make_user()
+    make_case(user_id, client_name='Asha Rao', client_email='asha@example.invalid', client_phone='9876543210',
+              court_name='Mysuru District Court')
+    make_case(user_id, client_name='Mohan Das', court_name='Bengaluru City Court')
+
+    def names(search):
+        return [client['name'] for client in db.get_clients_page(user_id, search=search)['clients']]
+
+    assert names('rao') == ['Asha Rao']
+    assert names('ASHA@') == ['Asha Rao']
+    assert names('mysuru') == ['Asha Rao']
+    assert names('9876') == ['Asha Rao']
+    assert names('543') == []          # Phone numbers match from the start
+    assert names('100%') == []         # LIKE wildcards are literal
+
+
+def test_client_search_index(db):
+    conn = db.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT to_regclass('idx_clients_name'), to_regclass('idx_clients_search')")
+        old_index, search_index = cursor.fetchone()
+        cursor.execute("SELECT COUNT(*) FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        trigrams = cursor.fetchone()[0] == 1
+    finally:
+        conn.close()
+    assert old_index is None
+    assert (search_index is not None) == trigrams
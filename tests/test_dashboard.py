@@ -0,0 +1,38 @@
+"""
+Tests for /api/user/dashboard-data: the Python and SQL engines must agree
+"""
+
+
+def dashboard(api, headers, engine):
+    response = api.get(f'/api/user/dashboard-data?engine={engine}', headers=headers)
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload['success'] is True
+    return payload['dashboard_data']
+
+
+def test_engines_agree_on_null_fields(api, auth_headers, db, make_case):
+    user_id, headers = auth_headers()
+    untitled = make_case(user_id, case_title=None, client_name='Asha Rao', court_name='District Court')
+    make_case(user_id, status='Active', filing_date='2025-11-03')
+    # No hearing date, judge or purpose, as in scraped history
+    assert db.insert_case_history(untitled, None, '2026-01-05', None, None)
+    assert db.insert_case_history(untitled, 'Judge A', '2026-01-05', '2026-02-05', 'Arguments')
+
+    python_data = dashboard(api, headers, 'python')
+    sql_data = dashboard(api, headers, 'sql')
+    assert python_data == sql_data
+
+    events = sql_data['calendar_events']
+    assert {event['caseTitle'] for event in events} == {'Unknown Case'}
+    assert sorted(event['title'] for event in events) == ['Unknown Case - Arguments', 'Unknown Case - N/A']
+    assert sql_data['case_histories'][untitled]['case_title'] is None
+    assert sql_data['summary'] == {'total_cases': 2, 'total_clients': 1, 'total_events': 2, 'active_cases': 1}
+
+
+def test_engines_agree_for_admins(api, auth_headers, make_user, make_case):
+    make_case(make_user(), case_title='Other user case')
+    _, headers = auth_headers(role='admin')
+    python_data = dashboard(api, headers, 'python')
+    assert python_data == dashboard(api, headers, 'sql')
+    assert python_data['summary']['total_cases'] == 1
@@ -0,0 +1,69 @@
+"""
+Tests for the /api/events/stream SSE endpoint
+"""
+
+import pytest
+
+
+@pytest.fixture
+def legal_api_module(api):
+    import legal_api
+    return legal_api
+
+
+def stream_token(api, headers):
+    response = api.post('/api/events/stream-token', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['stream_token']
+
+
+def test_stream_token_is_single_use(api, auth_headers):
+    _, headers = auth_headers(role='admin')
+    token = stream_token(api, headers)
+
+    first = api.get(f'/api/events/stream?stream_token={token}', buffered=False)
+    assert first.status_code == 200
+    first.close()
+
+    again = api.get(f'/api/events/stream?stream_token={token}')
+    assert again.status_code == 401
+
+
+def test_stream_needs_an_admin(api, auth_headers):
+    _, headers = auth_headers()
+    assert api.post('/api/events/stream-token', headers=headers).status_code == 403
+    assert api.get('/api/events/stream', headers=headers).status_code == 403
+    assert api.get('/api/events/stream?token=anything').status_code == 401
+
+
+def test_cursor_ahead_of_the_log_is_clamped(api, auth_headers, legal_api_module):
+    """A browser resuming with an id from before a restart still gets new events"""
+    _, headers = auth_headers(role='admin')
+    system_logs = legal_api_module.system_logs
+    stale_id = system_logs.last_id + 100
+
+    response = api.get('/api/events/stream', headers={**headers, 'Last-Event-ID': str(stale_id)}, buffered=False)
+    try:
+        entry = system_logs.append('after restart', 'info', 'test')
+        chunks = iter(response.response)
+        assert next(chunks).startswith(b'retry:')
+        event = next(chunks).decode()
+        assert event.startswith(f"id: {entry['id']}\n")
+        assert 'after restart' in event
+    finally:
+        response.close()
+
+
+def test_subscriber_slot_is_released_without_reading(api, auth_headers, legal_api_module):
+    _, headers = auth_headers(role='admin')
+    slots = legal_api_module.sse_slots
+    free = slots._value
+
+    response = api.get('/api/events/stream', headers=headers, buffered=False)
+    assert slots._value == free - 1
+    response.close()
+    assert slots._value == free
+
+
+def test_subscriber_limit_leaves_request_threads_free(legal_api_module):
+    assert 1 <= legal_api_module.SSE_MAX_SUBSCRIBERS < max(legal_api_module.API_THREADS, 2)
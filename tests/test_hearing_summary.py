@@ -0,0 +1,100 @@
+"""
+Tests for the hearing summary kept on cases (next/last hearing date, history count)
+"""
+
+from datetime import date, timedelta
+
+
+def summary(db, cnr):
+    conn = db.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT next_hearing_date, last_hearing_date, history_count FROM cases WHERE cnr_number = %s",
+                       (cnr,))
+        return cursor.fetchone()
+    finally:
+        conn.close()
+
+
+def test_history_writes_keep_the_summary_current(db, make_user, make_case):
+    cnr = make_case(make_user())
+    assert summary(db, cnr) == (None, None, 0)
+    today = date.today()
+    past, soon, later = today - timedelta(days=20), today + timedelta(days=5), today + timedelta(days=40)
+
+    assert db.insert_case_history(cnr, 'Judge A', (past - timedelta(days=30)).isoformat(), past.isoformat(),
+                                  'Evidence')
+    assert db.insert_case_history(cnr, 'Judge A', past.isoformat(), later.isoformat(), 'Arguments')
+    assert db.insert_case_history(cnr, 'Judge A', past.isoformat(), soon.isoformat(), 'Arguments')
+    assert db.insert_case_history(cnr, 'Judge A', past.isoformat(), soon.isoformat(), 'Arguments')
+    assert summary(db, cnr) == (soon, past, 4)
+
+    assert db.clean_duplicate_case_history()
+    assert summary(db, cnr) == (soon, past, 3)
+
+    assert db.delete_case_history(cnr)
+    assert summary(db, cnr) == (None, None, 0)
+
+
+def test_all_past_hearings_leave_no_next_hearing(db, make_user, make_case):
+    user_id = make_user()
+    cnr = make_case(user_id)
+    today = date.today()
+    earlier, latest = today - timedelta(days=60), today - timedelta(days=10)
+    assert db.insert_case_history(cnr, 'Judge A', (earlier - timedelta(days=7)).isoformat(), earlier.isoformat(),
+                                  'Evidence')
+    assert db.insert_case_history(cnr, 'Judge A', earlier.isoformat(), latest.isoformat(), 'Arguments')
+    assert summary(db, cnr) == (None, latest, 2)
+
+    full = db.get_case_with_history(cnr)
+    assert full['summary']['next_hearing_date'] is None
+    assert full['summary']['last_hearing_date'] == latest.isoformat()
+    assert full['summary']['history_count'] == 2
+
+
+def test_lapsed_next_hearing_rolls_forward_on_read(db, make_user, make_case):
+    user_id = make_user()
+    cnr = make_case(user_id)
+    today = date.today()
+    lapsed, upcoming = today - timedelta(days=2), today + timedelta(days=3)
+    assert db.insert_case_history(cnr, 'Judge A', today.isoformat(), lapsed.isoformat(), 'Evidence')
+    assert db.insert_case_history(cnr, 'Judge A', today.isoformat(), upcoming.isoformat(), 'Arguments')
+
+    # A summary computed before the earlier hearing passed
+    conn = db.get_connection()
+    try:
+        conn.cursor().execute("UPDATE cases SET next_hearing_date = %s, last_hearing_date = NULL WHERE cnr_number = %s",
+                              (lapsed, cnr))
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert [case['cnr_number'] for case in db.get_upcoming_hearings(user_id)] == [cnr]
+    assert summary(db, cnr) == (upcoming, lapsed, 2)
+
+
+def test_unchanged_summary_keeps_the_change_version(db, make_user, make_case):
+    cnr = make_case(make_user())
+    assert db.insert_case_history(cnr, 'Judge A', '2026-01-05', '2026-02-05', 'Evidence')
+    version = db.get_change_version()
+
+    conn = db.get_connection()
+    try:
+        db.refresh_hearing_summary(conn, None)
+        conn.commit()
+    finally:
+        conn.close()
+    assert db.has_changes_since(version) is False
+
+
+def test_upcoming_hearings_come_from_the_summary(db, make_user, make_case):
+    user_id = make_user()
+    soon, later, other = make_case(user_id), make_case(user_id), make_case(make_user())
+    today = date.today()
+    for cnr, days in ((soon, 3), (later, 30), (other, 2)):
+        assert db.insert_case_history(cnr, 'Judge A', today.isoformat(), (today + timedelta(days=days)).isoformat(),
+                                      'Hearing')
+
+    assert [case['cnr_number'] for case in db.get_upcoming_hearings(user_id)] == [soon]
+    assert [case['cnr_number'] for case in db.get_upcoming_hearings(user_id, days=31)] == [soon, later]
+    assert [case['cnr_number'] for case in db.get_upcoming_hearings(user_id, is_admin=True)] == [other, soon]
@@ -0,0 +1,53 @@
+"""
+Tests for log shipping into /api/logs/add
+"""
+
+import threading
+
+from log_shipping import LogShipper
+
+
+def test_shipped_timestamps_are_kept(api):
+    import legal_api
+
+    since = legal_api.system_logs.last_id
+    response = api.post('/api/logs/add', json={'logs': [
+        {'message': 'Captcha solved', 'type': 'info', 'source': 'scraper', 'timestamp': '2026-01-05 10:15:00'},
+        {'message': 'No timestamp', 'type': 'info', 'source': 'scraper', 'timestamp': 'yesterday'}
+    ]})
+    assert response.get_json() == {'success': True, 'count': 2}
+
+    entries, _ = legal_api.legal_api.get_logs_since(since, source='scraper')
+    assert entries[0]['timestamp'] == '2026-01-05 10:15:00'
+    assert entries[1]['timestamp'] != 'yesterday'
+
+
+def test_local_sink_gets_the_timestamp_and_data():
+    received = []
+    shipper = LogShipper(flush_interval=0.05)
+    shipper.set_local_sink(lambda *args: received.append(args))
+    shipper.ship('Page loaded', 'info', 'scraper')
+    shipper.ship('Captcha rejected', 'progress', 'job', data={'cnr_number': 'TEST000000000001', 'stage': 'failed'})
+    shipper.flush(timeout=2)
+    assert len(received) == 2
+    message, log_type, source, timestamp, data = received[0]
+    assert (message, log_type, source, data) == ('Page loaded', 'info', 'scraper', None)
+    assert len(timestamp) == len('2026-01-05 10:15:00')
+    assert received[1][4] == {'cnr_number': 'TEST000000000001', 'stage': 'failed'}
+    assert shipper.shipped == 2
+
+
+def test_drops_are_counted_across_threads(monkeypatch):
+    shipper = LogShipper(queue_size=1)
+    monkeypatch.setattr(shipper, '_ensure_started', lambda: None)   # Nothing drains the queue
+
+    def ship_many():
+        for _ in range(2000):
+            shipper.ship('x')
+
+    threads = [threading.Thread(target=ship_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert shipper.dropped == 8 * 2000 - 1
@@ -0,0 +1,16 @@
+"""
+Tests for GET /api/logs
+"""
+
+
+def test_history_cursor_pages(api):
+    response = api.get('/api/logs', query_string={'before': '2026-01-05 10:15:00,12'})
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+
+
+def test_malformed_history_cursor_is_a_bad_request(api):
+    for before in ('2026-01-05 10:15:00', 'yesterday,12', '2026-01-05 10:15:00,abc'):
+        response = api.get('/api/logs', query_string={'before': before})
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
@@ -0,0 +1,64 @@
+"""
+Tests for public-IP CORS origins and the public address resolver
+"""
+
+import os
+
+import pytest
+
+from public_address import PublicAddressResolver
+
+
+@pytest.fixture
+def app_client(monkeypatch):
+    pytest.importorskip('flask')
+    import legal_api
+
+    monkeypatch.delenv('CORS_ORIGINS', raising=False)
+    return legal_api, legal_api.app.test_client()
+
+
+def test_public_ip_learned_after_startup_is_a_cors_origin(app_client, monkeypatch):
+    legal_api, client = app_client
+    origin = 'http://203.0.113.7:8000'
+
+    monkeypatch.setattr(legal_api.public_address, 'override', None)
+    monkeypatch.setattr(legal_api.public_address, '_ip', None)
+    monkeypatch.setattr(legal_api.public_address, 'discovery', False)
+    response = client.options('/api/server-info', headers={'Origin': origin, 'Access-Control-Request-Method': 'GET'})
+    assert 'Access-Control-Allow-Origin' not in response.headers
+
+    # Discovered in the background after import
+    monkeypatch.setattr(legal_api.public_address, '_ip', '203.0.113.7')
+    response = client.options('/api/server-info', headers={'Origin': origin, 'Access-Control-Request-Method': 'GET'})
+    assert response.headers['Access-Control-Allow-Origin'] == origin
+    assert response.headers['Access-Control-Allow-Credentials'] == 'true'
+    assert 'Authorization' in response.headers['Access-Control-Allow-Headers']
+
+    other = client.options('/api/server-info', headers={'Origin': 'http://198.51.100.1:8000'})
+    assert 'Access-Control-Allow-Origin' not in other.headers
+
+
+def test_static_origins_still_come_from_flask_cors(app_client):
+    _, client = app_client
+    response = client.options('/api/server-info', headers={'Origin': 'http://localhost:8000',
+                                                           'Access-Control-Request-Method': 'GET'})
+    assert response.headers['Access-Control-Allow-Origin'] == 'http://localhost:8000'
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork()')
+def test_forked_child_can_start_its_own_refresh(tmp_path):
+    resolver = PublicAddressResolver(override='', discovery=True, cache_file=str(tmp_path / 'ip.json'), services=[])
+    resolver._refreshing = True  # A refresh thread running in the parent
+    resolver._last_attempt = 10 ** 12
+
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        os.write(write_end, b'1' if not resolver._refreshing and resolver._is_stale() else b'0')
+        os._exit(0)
+    os.close(write_end)
+    os.waitpid(pid, 0)
+    assert os.read(read_end, 1) == b'1'
+    assert resolver._refreshing
@@ -0,0 +1,65 @@
+"""
+Tests for save_case_with_history (the add-case save path)
+"""
+
+
+def test_oversized_history_values_do_not_lose_the_case(db, make_user):
+    user_id = make_user()
+    status, saved = db.save_case_with_history(
+        {'cnr_number': 'TEST000000000010', 'case_title': 'Scraped case', 'user_id': user_id},
+        [{'judge': 'J' * 150, 'business_date': '05-01-2026', 'hearing_date': '05-02-2026',
+          'purpose': 'Evidence\x00', 'status': 'S' * 60},
+         {'judge': 'Judge B', 'business_date': '2026-02-05', 'hearing_date': 'N/A', 'purpose': None, 'status': None}]
+    )
+    assert status == 'ok'
+    assert saved['history_inserted'] == 2
+    assert saved['case']['history_count'] == 2
+    assert saved['case']['next_hearing_date'] is None
+    assert saved['case']['last_hearing_date'].isoformat() == '2026-02-05'
+
+    judges = {entry['judge'] for entry in saved['history']}
+    assert judges == {'J' * 100, 'Judge B'}
+    assert {entry['purpose'] for entry in saved['history']} == {'Evidence', 'N/A'}
+
+
+def save(api, headers, cnr, title):
+    return api.post('/api/cases/save', headers=headers,
+                    json={'cnr_number': cnr, 'user_data': {'case_title': title}})
+
+
+def owner_of(db, cnr):
+    conn = db.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT user_id, case_title FROM cases WHERE cnr_number = %s", (cnr,))
+        return cursor.fetchone()
+    finally:
+        conn.close()
+
+
+def test_saving_another_users_cnr_is_refused(api, auth_headers, db):
+    owner, owner_headers = auth_headers()
+    _, other_headers = auth_headers()
+    cnr = 'TEST000000000011'
+    assert save(api, owner_headers, cnr, 'Original').get_json()['success'] is True
+    version = db.get_change_version()
+
+    response = save(api, other_headers, cnr, 'Taken over')
+    assert response.status_code == 403
+    assert owner_of(db, cnr) == (owner, 'Original')
+    assert db.has_changes_since(version) is False
+
+    # The owner can still save over their own case
+    assert save(api, owner_headers, cnr, 'Updated').get_json()['case']['case_title'] == 'Updated'
+
+
+def test_admin_save_reassigns_with_a_tombstone(api, auth_headers, db):
+    owner, owner_headers = auth_headers()
+    admin, admin_headers = auth_headers(role='admin')
+    cnr = 'TEST000000000012'
+    assert save(api, owner_headers, cnr, 'Original').get_json()['success'] is True
+    version = db.get_changes_since(0, owner)['version']
+
+    assert save(api, admin_headers, cnr, 'Admin copy').get_json()['case']['user_id'] == admin
+    assert owner_of(db, cnr) == (admin, 'Admin copy')
+    assert db.get_changes_since(version, owner)['deleted'] == [cnr]
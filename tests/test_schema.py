@@ -0,0 +1,33 @@
+"""
+Tests for the start-up schema upgrade (DatabaseManager.upgrade_schema)
+"""
+
+
+def test_upgrade_schema_is_idempotent(db):
+    assert db.upgrade_schema()
+    assert db.upgrade_schema()
+
+
+def test_upgrade_schema_adds_and_backfills_missing_columns(db, make_user, make_case):
+    user_id = make_user()
+    cnr = make_case(user_id)
+    assert db.insert_case_history(cnr, 'Judge A', '2026-01-05', '2026-02-05', 'Arguments')
+
+    # A database from before the hearing summary columns
+    conn = db.get_connection()
+    try:
+        conn.cursor().execute("""
+            ALTER TABLE cases DROP COLUMN next_hearing_date, DROP COLUMN last_hearing_date, DROP COLUMN history_count
+        """)
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert db.upgrade_schema()
+    case = next(case for case in db.get_cases_for_user(user_id) if case['cnr_number'] == cnr)
+    assert case['next_hearing_date'] is None
+    assert str(case['last_hearing_date']) == '2026-02-05'
+    assert case['history_count'] == 1
+
+    # Writes work again straight after the upgrade
+    assert db.insert_case_history(cnr, 'Judge A', '2026-02-05', '2026-03-05', 'Evidence')
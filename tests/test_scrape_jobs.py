@@ -0,0 +1,73 @@
+"""
+Tests for queued scrapes (SCRAPER_MODE=service): job events and result pickup
+"""
+
+import pytest
+
+
+@pytest.fixture
+def legal_api_module(api):
+    import legal_api
+    return legal_api
+
+
+def test_service_job_events_reach_the_event_stream(api, legal_api_module, monkeypatch):
+    """Events shipped by a scraper service worker are published like the in-process ones"""
+    import scraper_service
+
+    shipped = []
+    monkeypatch.setattr(scraper_service.log_shipper, 'ship',
+                        lambda message, log_type, source, data=None: shipped.append(
+                            {'message': message, 'type': log_type, 'source': source, 'data': data}))
+    job = {'id': 7, 'cnr_number': 'TEST000000000001', 'attempts': 3, 'max_attempts': 3}
+    scraper_service.publish_job_event(job, 'failed', 'Captcha rejected')
+
+    since = legal_api_module.system_logs.last_id
+    response = api.post('/api/logs/add', json={'logs': shipped})
+    assert response.get_json()['success'] is True
+
+    events, _ = legal_api_module.legal_api.get_logs_since(since, source='job')
+    assert len(events) == 1
+    assert events[0]['type'] == 'progress'
+    assert events[0]['message'] == 'Captcha rejected'
+    assert events[0]['data'] == {'cnr_number': 'TEST000000000001', 'stage': 'failed', 'job_id': 7,
+                                 'attempt': 3, 'max_attempts': 3}
+
+
+def test_completed_result_is_stored_only_once(db, make_user, legal_api_module):
+    """Polling a completed job again must not bring back a result that was already saved"""
+    user_id = make_user()
+    cnr = 'TEST000000000002'
+    job_id = db.enqueue_scrape_job(cnr, user_id)
+    job = db.claim_scrape_job('test-worker')
+    assert job['id'] == job_id
+    assert db.complete_scrape_job(job_id, {'success': True, 'case_title': 'Scraped'})
+
+    status = legal_api_module.legal_api.get_scrape_job_status(job_id, user_id)
+    assert status['status'] == 'completed'
+    assert legal_api_module.scrape_results.get(cnr, user_id)['case_title'] == 'Scraped'
+
+    # The case is saved, which discards the stored result; the client polls once more
+    assert legal_api_module.scrape_results.discard(cnr, user_id)
+    status = legal_api_module.legal_api.get_scrape_job_status(job_id, user_id)
+    assert status['data']['case_title'] == 'Scraped'
+    assert legal_api_module.scrape_results.get(cnr, user_id) is None
+
+
+def test_another_users_poll_does_not_collect_the_result(api, auth_headers, db, legal_api_module):
+    """A poll for someone else's job is answered as not found before anything is collected"""
+    owner, owner_headers = auth_headers()
+    _, other_headers = auth_headers()
+    cnr = 'TEST000000000003'
+    job_id = db.enqueue_scrape_job(cnr, owner)
+    assert db.claim_scrape_job('test-worker')['id'] == job_id
+    assert db.complete_scrape_job(job_id, {'success': True, 'case_title': 'Scraped'})
+
+    response = api.get(f'/api/scraping/jobs/{job_id}', headers=other_headers)
+    assert response.status_code == 404
+    assert db.get_scrape_job(job_id, owner)['collected_at'] is None
+    assert legal_api_module.scrape_results.get(cnr, owner) is None
+
+    response = api.get(f'/api/scraping/jobs/{job_id}', headers=owner_headers)
+    assert response.get_json()['data']['case_title'] == 'Scraped'
+    assert legal_api_module.scrape_results.get(cnr, owner)['case_title'] == 'Scraped'
@@ -0,0 +1,45 @@
+"""
+Tests for the shared state backends
+"""
+
+import os
+import stat
+
+import pytest
+
+from state_backend import StateBackend, MemoryStateBackend, SQLiteStateBackend
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_sqlite_state_file_is_private(tmp_path):
+    path = tmp_path / 'state' / 'state.db'
+    backend = SQLiteStateBackend(str(path))
+    backend.set('user_cache', 'token', {'id': 1})
+
+    assert mode(path.parent) == 0o700
+    assert mode(path) == 0o600
+    assert mode(f"{path}-wal") == 0o600
+    assert backend.get('user_cache', 'token') == {'id': 1}
+
+
+def test_existing_state_file_is_made_private(tmp_path):
+    path = tmp_path / 'state.db'
+    path.touch(mode=0o644)
+    SQLiteStateBackend(str(path))
+    assert mode(path) == 0o600
+
+
+def test_backends_implement_the_whole_interface():
+    with pytest.raises(TypeError):
+        StateBackend()
+
+    class Partial(StateBackend):
+        def get(self, namespace, key, default=None, touch=False):
+            return default
+
+    with pytest.raises(TypeError):
+        Partial()
+    assert isinstance(MemoryStateBackend(), StateBackend)
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for the Legal API
+Used by production servers, e.g.: gunicorn -c gunicorn_config.py wsgi:app
+"""
+
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from legal_api import app
+
+application = app